@@ -9,14 +9,70 @@ class Settings(BaseSettings):
     gcp_region: str = "asia-northeast1"
     apple_bundle_id: str = "com.akitoando.CycleJournal"
     google_client_id: str = ""  # iOS用Google OAuth Client ID
+    # 検証済みトークンのキャッシュ件数（0で無効）
+    auth_token_cache_size: int = 10000
+    # サインイン時に既存ユーザーの読み取りを省略するキャッシュ。別インスタンスでの
+    # アカウント削除はこの秒数まで反映されない（その間は /users/me などで作り直す）
+    known_user_cache_size: int = 10000
+    known_user_cache_ttl: int = 300
 
     # Vertex AI Claude
     claude_model: str = "claude-sonnet-4-20250514"
     claude_max_tokens: int = 500
     claude_temperature: float = 0.7
+    claude_timeout: float = 60.0
+    # システムプロンプトと会話履歴のプレフィックスにキャッシュのブレークポイントを置く
+    claude_prompt_cache: bool = True
+
+    # Vertex AI Claude クライアントの接続プール（プロセスで共有）
+    claude_max_connections: int = 20
+    claude_max_keepalive_connections: int = 10
+    claude_keepalive_expiry: float = 60.0
+    # アクセストークンを失効の何秒前に更新するか
+    claude_token_refresh_margin: int = 300
+    claude_token_refresh_retry: int = 30
+    # 起動時に認証情報の解決と接続確立を済ませる（コールドスタート対策）
+    claude_warmup: bool = False
+
+    # コーチに渡す履歴: 直近の件数と推定トークン数の上限
+    coach_history_limit: int = 20
+    coach_history_max_tokens: int = 2000
+    # 古いターンをセッションの要約にまとめ、直近のメッセージだけをそのまま送る
+    coach_summary_enabled: bool = True
+    # 要約されていないメッセージがこの件数を超えたら、直近の keep 件を残して要約する
+    coach_summary_trigger_messages: int = 12
+    coach_summary_keep_messages: int = 6
+    coach_summary_max_tokens: int = 400
 
     # LangGraphフローを有効にする（感情分析・Cycle要素判定・安全フィルター）
     use_langgraph: bool = False
+    # Cycle要素の判定に感情分析の結果を使う（有効にすると2つの分類が直列になる）
+    coach_cycle_uses_emotion: bool = False
+    # 感情・Cycle要素の分類器: "llm" | "lexicon" | "ngram"
+    # ローカル分類器は確信度が閾値未満のときだけLLMにフォールバックする
+    coach_classifier: str = "llm"
+    coach_classifier_min_confidence: float = 0.6
+    # ngram 分類器の学習済みモデル（emotion.json / cycle.json）の置き場所
+    coach_classifier_model_dir: str = "app/services/classifier_models"
+    # 安全性チェックの前にルールで判定し、疑わしい応答だけLLMに回す
+    coach_safety_prescreen: bool = True
+
+    # サブコレクションのカスケード削除: 1コミットの件数と同時コミット数
+    cascade_delete_batch_size: int = 500
+    cascade_delete_concurrency: int = 4
+    # メッセージ数がこれを超えるセッションは 202 を返してバックグラウンドで削除
+    cascade_delete_background_threshold: int = 2000
+    # アカウント単位のエクスポート/削除で1回に読むドキュメント数
+    account_page_size: int = 200
+    # 更新がこの秒数より古い実行中の削除ジョブは中断したとみなして再開する
+    account_deletion_stale_after: int = 600
+
+    # 差分同期: 1回に返す種類ごとの最大件数
+    sync_page_size: int = 200
+    # 直近この秒数の変更は次回の同期に回す（コミットの遅れを吸収）
+    sync_settle_seconds: int = 5
+    # 削除の記録（tombstones）の保持日数。これより古い since は全件の再取得が必要
+    tombstone_ttl_days: int = 90
 
     model_config = {"env_prefix": "", "case_sensitive": False}
 
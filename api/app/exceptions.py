@@ -36,6 +36,18 @@ class NotFoundError(AppError):
         super().__init__("NotFound", f"{resource} not found", 404)
 
 
+class ConflictError(AppError):
+    def __init__(self, message: str = "Resource was modified concurrently"):
+        super().__init__("Conflict", message, 409)
+
+
+class WatermarkExpiredError(AppError):
+    def __init__(self):
+        super().__init__(
+            "WatermarkExpired", "Sync watermark is too old; run a full sync", 410
+        )
+
+
 class InternalError(AppError):
     def __init__(self, message: str = "Internal server error"):
         super().__init__("InternalError", message, 500)
@@ -1,16 +1,31 @@
 """CycleJournal API - FastAPI application."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.exceptions import AppError, app_error_handler
-from app.routers import auth, coach, health, sessions, tasks, users
+from app.routers import auth, coach, health, sessions, sync, tasks, users
+from app.services import claude_client
+from app.services.http_client import close_http_client
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    if settings.claude_warmup:
+        await claude_client.warmup()
+    yield
+    await claude_client.close()
+    await close_http_client()
+
 
 app = FastAPI(
     title="CycleJournal API",
     version="0.1.0",
     docs_url="/docs" if settings.environment == "dev" else None,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -29,3 +44,4 @@ app.include_router(coach.router)
 app.include_router(sessions.router)
 app.include_router(tasks.router)
 app.include_router(users.router)
+app.include_router(sync.router)
@@ -1,15 +1,29 @@
 """Bearer token extraction and JWT verification middleware.
 
 Supports both Apple Identity Tokens and Google ID Tokens.
-Determines provider by attempting Apple verification first, then Google.
+Determines provider from the unverified `iss` claim and dispatches
+to that provider's verifier only (see app/services/auth_providers.py).
+Verified tokens are cached until their `exp`, keyed by a hash of the token.
 """
 
+import hashlib
+import time
+
 import jwt as pyjwt
 from fastapi import Request
 
+from app.config import settings
 from app.exceptions import AuthenticationError, InvalidTokenError, TokenExpiredError
-from app.services.apple_auth import verify_apple_token
-from app.services.google_auth import verify_google_token
+from app.services.auth_providers import provider_for_issuer
+from app.services.cache import TTLCache
+
+# 検証済みトークンのハッシュ -> user_id（エントリはトークンの exp で失効する）
+# 同じアプリセッションからの連続したリクエストで署名検証を省略する
+token_cache = TTLCache(settings.auth_token_cache_size)
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
 
 
 async def get_current_user_id(request: Request) -> str:
@@ -26,24 +40,32 @@ async def get_current_user_id(request: Request) -> str:
     if not token:
         raise AuthenticationError("Token is required")
 
-    # Apple JWTを先に試行
+    cached_user_id = token_cache.get(_token_key(token))
+    if cached_user_id is not None:
+        return cached_user_id
+
+    # 署名検証前のクレームからプロバイダーを判定（検証は各プロバイダーで行う）
     try:
-        claims = await verify_apple_token(token)
-        user_id = claims.get("sub")
-        if not user_id:
-            raise InvalidTokenError("Token missing sub claim")
-        return user_id
-    except (pyjwt.ExpiredSignatureError, pyjwt.InvalidTokenError, ValueError):
-        pass
-
-    # Google ID Tokenを試行
+        unverified = pyjwt.decode(token, options={"verify_signature": False})
+    except pyjwt.InvalidTokenError:
+        raise InvalidTokenError("Malformed token")
+
+    provider = provider_for_issuer(unverified.get("iss"))
+    if provider is None:
+        raise InvalidTokenError("Unsupported token issuer")
+
     try:
-        claims = await verify_google_token(token)
-        google_user_id = claims.get("sub")
-        if not google_user_id:
-            raise InvalidTokenError("Token missing sub claim")
-        return f"google_{google_user_id}"
-    except ValueError:
-        pass
-
-    raise InvalidTokenError("Token could not be verified by any provider")
+        claims = await provider.verify(token)
+    except pyjwt.ExpiredSignatureError:
+        raise TokenExpiredError()
+    except (pyjwt.InvalidTokenError, ValueError):
+        raise InvalidTokenError(f"Token could not be verified by {provider.name}")
+
+    subject = claims.get("sub")
+    if not subject:
+        raise InvalidTokenError("Token missing sub claim")
+
+    user_id = provider.user_id(subject)
+    if isinstance(claims.get("exp"), int | float):
+        token_cache.put(_token_key(token), user_id, ttl=claims["exp"] - time.time())
+    return user_id
@@ -32,6 +32,18 @@ class ErrorResponse(BaseModel):
     error: ErrorBody
 
 
+# 一括操作（:batch）の1リクエストあたりの最大件数
+BATCH_MAX_ITEMS = 500
+
+
+class BatchItemResult(BaseModel):
+    """一括操作のアイテムごとの結果（index はリクエスト内の位置）."""
+
+    index: int
+    status: int
+    error: ErrorBody | None = None
+
+
 class DataResponse(BaseModel):
     """Generic wrapper: {"data": ...}"""
 
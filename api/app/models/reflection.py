@@ -4,6 +4,8 @@ from datetime import datetime
 
 from pydantic import BaseModel, Field
 
+from app.models.common import BATCH_MAX_ITEMS, BatchItemResult
+
 
 class CreateReflectionRequest(BaseModel):
     what_i_did: str = Field(..., min_length=1)
@@ -20,3 +22,23 @@ class ReflectionData(BaseModel):
     what_i_want_to_try: str | None = None
     overall_feeling: str | None = None
     created_at: datetime
+
+
+class BatchReflectionItem(CreateReflectionRequest):
+    task_id: str
+
+
+class BatchCreateReflectionsRequest(BaseModel):
+    reflections: list[BatchReflectionItem] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_ITEMS
+    )
+
+
+class ReflectionBatchResult(BatchItemResult):
+    task_id: str
+    reflection_id: str | None = None
+    data: ReflectionData | None = None
+
+
+class ReflectionBatchData(BaseModel):
+    results: list[ReflectionBatchResult]
@@ -42,6 +42,8 @@ class CreateSessionRequest(BaseModel):
 
 class SessionListData(BaseModel):
     sessions: list[SessionSummary]
-    total: int
+    total: int | None = None  # include_total=false の場合は省略
     limit: int
     offset: int
+    next_cursor: str | None = None
+    has_more: bool = False
@@ -0,0 +1,28 @@
+"""Delta sync Pydantic models."""
+
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+from app.models.session import MessageData, SessionSummary
+from app.models.task import TaskData
+
+
+class SyncMessage(MessageData):
+    session_id: str
+
+
+class DeletedResource(BaseModel):
+    kind: Literal["session", "task"]
+    id: str
+    deleted_at: datetime
+
+
+class SyncData(BaseModel):
+    sessions: list[SessionSummary]
+    tasks: list[TaskData]
+    messages: list[SyncMessage]
+    deleted: list[DeletedResource]
+    watermark: datetime  # 次回の since に指定する
+    has_more: bool = False  # True なら watermark ですぐに続きを取得する
@@ -4,7 +4,7 @@ from datetime import datetime
 
 from pydantic import BaseModel, Field
 
-from app.models.common import CycleElement
+from app.models.common import BATCH_MAX_ITEMS, BatchItemResult, CycleElement
 
 
 class CreateTaskRequest(BaseModel):
@@ -37,6 +37,33 @@ class TaskData(BaseModel):
 
 class TaskListData(BaseModel):
     tasks: list[TaskData]
-    total: int
+    total: int | None = None  # include_total=false の場合は省略
     limit: int
     offset: int
+    next_cursor: str | None = None
+    has_more: bool = False
+
+
+class BatchCreateTasksRequest(BaseModel):
+    tasks: list[CreateTaskRequest] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_ITEMS
+    )
+
+
+class BatchUpdateTaskItem(UpdateTaskRequest):
+    task_id: str
+
+
+class BatchUpdateTasksRequest(BaseModel):
+    tasks: list[BatchUpdateTaskItem] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_ITEMS
+    )
+
+
+class TaskBatchResult(BatchItemResult):
+    task_id: str
+    data: TaskData | None = None
+
+
+class TaskBatchData(BaseModel):
+    results: list[TaskBatchResult]
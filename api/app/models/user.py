@@ -1,6 +1,7 @@
 """User-related Pydantic models."""
 
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel
 
@@ -18,3 +19,27 @@ class UserData(BaseModel):
     settings: UserSettings = UserSettings()
     created_at: datetime
     updated_at: datetime
+
+
+class TaskStatusCounts(BaseModel):
+    pending: int = 0
+    completed: int = 0
+
+
+class UserStats(BaseModel):
+    session_count: int = 0
+    task_count: int = 0
+    tasks_by_status: TaskStatusCounts = TaskStatusCounts()
+    updated_at: datetime | None = None
+
+
+class AccountDeletionData(BaseModel):
+    status: Literal["running", "completed", "failed"]
+    sessions_deleted: int = 0
+    messages_deleted: int = 0
+    tasks_deleted: int = 0
+    reflections_deleted: int = 0
+    error: str | None = None
+    started_at: datetime
+    updated_at: datetime
+    completed_at: datetime | None = None
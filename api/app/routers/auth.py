@@ -4,17 +4,25 @@ from datetime import UTC, datetime
 
 import jwt as pyjwt
 from fastapi import APIRouter, Depends
+from google.api_core.exceptions import AlreadyExists
 from google.cloud.firestore import AsyncClient
 
+from app.config import settings
 from app.dependencies import get_firestore
 from app.exceptions import InvalidTokenError, TokenExpiredError, ValidationError
 from app.models.auth import GoogleVerifyRequest, VerifyTokenData, VerifyTokenRequest
 from app.services.apple_auth import verify_apple_token
+from app.services.cache import TTLCache
 from app.services.firestore_client import users_ref
 from app.services.google_auth import verify_google_token
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+# 作成済みユーザーの user_id -> created_at
+known_users = TTLCache(
+    maxsize=settings.known_user_cache_size, ttl=settings.known_user_cache_ttl
+)
+
 
 @router.post("/verify")
 async def verify_token(
@@ -67,6 +75,8 @@ async def verify_google(
 
     try:
         claims = await verify_google_token(body.id_token)
+    except pyjwt.ExpiredSignatureError:
+        raise TokenExpiredError()
     except ValueError as e:
         raise InvalidTokenError(str(e))
 
@@ -99,26 +109,52 @@ async def _find_or_create_user(
     provider_field: str,
     provider_value: str,
 ) -> tuple[str, bool, datetime]:
-    """Firestoreでユーザーを検索 or 作成."""
-    ref = users_ref(db)
-    user_doc = ref.document(user_id)
+    """Firestoreでユーザーを検索 or 作成.
+
+    既知のユーザーはキャッシュで読み取りを省略し、それ以外は読み取り1回で確認して
+    見つからない場合だけ create() する。create() は既存ドキュメントがあれば
+    失敗するため、同時の初回サインインでも作成されるのは1件だけになる。
+
+    別のインスタンスでアカウントが削除されると、キャッシュの ttl の間は
+    ユーザードキュメントがないまま既知ユーザーとして扱われる。その場合は
+    /users/me と /users/me/export で作り直す（app/routers/users.py）。
+    """
+    cached_created_at = known_users.get(user_id)
+    if cached_created_at is not None:
+        return user_id, False, cached_created_at
+
+    user_doc = users_ref(db).document(user_id)
     snapshot = await user_doc.get()
+    if snapshot.exists:
+        created_at = _created_at(snapshot)
+        known_users.put(user_id, created_at)
+        return user_id, False, created_at
 
     now = datetime.now(UTC)
-    is_new_user = not snapshot.exists
-
-    if is_new_user:
-        user_data = {
-            provider_field: provider_value,
-            "email": email,
-            "display_name": None,
-            "settings": {"notification_enabled": False, "reminder_time": None},
-            "created_at": now,
-            "updated_at": now,
-        }
-        await user_doc.set(user_data)
-        created_at = now
-    else:
-        created_at = snapshot.get("created_at") or now
-
-    return user_id, is_new_user, created_at
+    try:
+        await user_doc.create(new_user_data(provider_field, provider_value, email, now))
+    except AlreadyExists:
+        # 同時の初回サインインで他のリクエストが先に作成した
+        created_at = _created_at(await user_doc.get())
+        known_users.put(user_id, created_at)
+        return user_id, False, created_at
+    known_users.put(user_id, now)
+    return user_id, True, now
+
+
+def new_user_data(
+    provider_field: str, provider_value: str, email: str | None, now: datetime
+) -> dict:
+    """新規ユーザードキュメントの内容."""
+    return {
+        provider_field: provider_value,
+        "email": email,
+        "display_name": None,
+        "settings": {"notification_enabled": False, "reminder_time": None},
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _created_at(snapshot) -> datetime:
+    return snapshot.get("created_at") or datetime.now(UTC)
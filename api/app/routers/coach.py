@@ -1,133 +1,413 @@
 """Coach endpoint - AI coaching with Vertex AI Claude."""
 
+import asyncio
+import json
+import logging
 import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
 from datetime import UTC, datetime
 
-from fastapi import APIRouter, Depends
-from google.cloud.firestore import AsyncClient
+from fastapi import APIRouter, BackgroundTasks, Depends, Request
+from fastapi.responses import StreamingResponse
+from google.cloud.firestore import AsyncClient, AsyncDocumentReference, Increment
 
 from app.config import settings
 from app.dependencies import get_current_user, get_firestore
 from app.models.coach import CoachData, CoachMetadata, CoachRequest
 from app.services import coach_service
-from app.services.coach_graph import run_coach_flow
+from app.services.coach_graph import run_coach_flow, stream_coach_flow
 from app.services.firestore_client import sessions_ref
+from app.services.user_stats import add_stats_delta
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Coach"])
 
 
+@dataclass
+class _SessionContext:
+    """応答生成前に読み込んだセッションの状態."""
+
+    session_id: str
+    doc: AsyncDocumentReference
+    # None の場合は未作成。最初のターンの保存と同じバッチで作成する
+    data: dict | None
+    # 要約に含まれていない直近のメッセージ（created_at付き、古い順）
+    recent: list[dict]
+    history: list[dict]
+    summary: str | None = None
+
+
 @router.post("/coach")
 async def chat(
     body: CoachRequest,
+    background_tasks: BackgroundTasks,
     user_id: str = Depends(get_current_user),
     db: AsyncClient = Depends(get_firestore),
 ):
     """ユーザーのメッセージに対してAIコーチが応答."""
     now = datetime.now(UTC)
-    ref = sessions_ref(db)
-
-    # セッション取得 or 新規作成
-    if body.session_id:
-        session_doc = ref.document(body.session_id)
-        session_snap = await session_doc.get()
-        if not session_snap.exists or session_snap.get("user_id") != user_id:
-            # セッションが存在しないか別ユーザーの場合は新規作成
-            session_id = str(uuid.uuid4())
-            session_doc = ref.document(session_id)
-        else:
-            session_id = body.session_id
-    else:
-        session_id = str(uuid.uuid4())
-        session_doc = ref.document(session_id)
-
-    # セッションが未作成の場合は作成
-    session_snap = await session_doc.get()
-    if not session_snap.exists:
-        cycle_element = body.context.cycle_element.value if body.context and body.context.cycle_element else None
-        await session_doc.set({
-            "user_id": user_id,
-            "title": None,
-            "cycle_element": cycle_element,
-            "has_diary_context": body.diary_content is not None,
-            "message_count": 0,
-            "last_message_at": now,
-            "created_at": now,
-            "updated_at": now,
-        })
-
-    # 過去のメッセージ履歴を取得
-    messages_ref = session_doc.collection("messages")
-    history_query = messages_ref.order_by("created_at").limit(50)
-    history_docs = [doc async for doc in history_query.stream()]
-    history = [
-        {"role": doc.get("role"), "content": doc.get("content")}
-        for doc in history_docs
-    ]
+    session = await _prepare_session(db, body, user_id)
+    history = session.history
 
     # コーチ応答を取得（LangGraph or シンプル呼び出し）
     detected_emotion = None
     response_cycle_element = None
+    usage: dict[str, int] = {}
+    labels = None
 
     if settings.use_langgraph:
         flow_result = await run_coach_flow(
             user_message=body.message,
             history=history,
             diary_content=body.diary_content,
+            summary=session.summary,
         )
         response_text = flow_result["response"]
+        usage = flow_result.get("usage", {})
+        labels = _labels(flow_result)
         detected_emotion = flow_result.get("detected_emotion")
-        response_cycle_element = flow_result.get("cycle_element")
+        # グラフは "Root" 形式で返すため、APIのCycleElement（小文字）に揃える
+        if flow_result.get("cycle_element"):
+            response_cycle_element = flow_result["cycle_element"].lower()
+    else:
+        reply = await coach_service.chat(
+            user_message=body.message,
+            history=history,
+            diary_content=body.diary_content,
+            summary=session.summary,
+        )
+        response_text, usage = reply.text, reply.usage
+
+    saved = await _save_turn(
+        db, session, body, user_id, response_text, usage, labels, now
+    )
+    _schedule_summary(background_tasks, session, saved)
+
+    data = _coach_data(
+        body,
+        session.session_id,
+        response_text,
+        response_cycle_element,
+        detected_emotion,
+    )
+    return {"data": data}
+
+
+@router.post("/coach/stream")
+async def chat_stream(
+    body: CoachRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    user_id: str = Depends(get_current_user),
+    db: AsyncClient = Depends(get_firestore),
+):
+    """AIコーチの応答をServer-Sent Eventsで逐次返す.
+
+    Events:
+        session: {"session_id"} - 最初に1回
+        token:   {"text"} - 応答テキストの断片
+        safety:  {"is_safe", "message"} - LangGraph有効時のみ。unsafeの場合は
+                 表示済みの応答を message で置き換える
+        done:    CoachData - 保存完了後の最終結果
+        error:   {"code", "message"} - 生成中の失敗
+    """
+    now = datetime.now(UTC)
+    session = await _prepare_session(db, body, user_id)
+
+    return StreamingResponse(
+        _stream_events(request, db, body, user_id, session, now, background_tasks),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_events(
+    request: Request,
+    db: AsyncClient,
+    body: CoachRequest,
+    user_id: str,
+    session: _SessionContext,
+    now: datetime,
+    background_tasks: BackgroundTasks,
+) -> AsyncIterator[str]:
+    """SSEイベント列を生成し、完了時に会話を保存する.
+
+    クライアントが切断した場合は上流のストリームを閉じて何も保存しない
+    （新規セッションも作成されない）。
+    """
+    history = session.history
+    yield _sse("session", {"session_id": session.session_id})
+
+    detected_emotion = None
+    response_cycle_element = None
+    usage: dict[str, int] = {}
+    labels = None
+    chunks: list[str] = []
+
+    if settings.use_langgraph:
+        events = stream_coach_flow(
+            user_message=body.message,
+            history=history,
+            diary_content=body.diary_content,
+            summary=session.summary,
+        )
     else:
-        response_text = await coach_service.chat(
+        events = coach_service.stream_chat(
             user_message=body.message,
             history=history,
             diary_content=body.diary_content,
+            summary=session.summary,
+        )
+
+    try:
+        async for kind, value in events:
+            if await request.is_disconnected():
+                return
+            if kind == "token":
+                chunks.append(value)
+                yield _sse("token", {"text": value})
+            elif kind == "usage":
+                usage = value
+            elif kind == "result":
+                usage = value.get("usage", {})
+                labels = _labels(value)
+                detected_emotion = value.get("detected_emotion")
+                if value.get("cycle_element"):
+                    response_cycle_element = value["cycle_element"].lower()
+                if not value["is_safe"]:
+                    chunks = [value["response"]]
+                yield _sse(
+                    "safety",
+                    {"is_safe": value["is_safe"], "message": value["response"]},
+                )
+    except Exception:
+        yield _sse(
+            "error",
+            {"code": "InternalError", "message": "Failed to generate response"},
         )
+        return
+    finally:
+        # 途中終了時にも上流ストリーム（Vertex AI接続）を確実に閉じる
+        await events.aclose()
 
-    # ユーザーメッセージを保存
-    user_msg_id = str(uuid.uuid4())
-    await messages_ref.document(user_msg_id).set({
-        "role": "user",
-        "content": body.message,
-        "metadata": None,
-        "created_at": now,
-    })
-
-    # アシスタント応答を保存
-    assistant_msg_id = str(uuid.uuid4())
+    response_text = "".join(chunks)
+    saved = await _save_turn(
+        db, session, body, user_id, response_text, usage, labels, now
+    )
+    _schedule_summary(background_tasks, session, saved)
+
+    data = _coach_data(
+        body,
+        session.session_id,
+        response_text,
+        response_cycle_element,
+        detected_emotion,
+    )
+    yield _sse("done", data.model_dump(mode="json"))
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _prepare_session(
+    db: AsyncClient,
+    body: CoachRequest,
+    user_id: str,
+) -> _SessionContext:
+    """セッションと履歴を並行に読み込む."""
+    ref = sessions_ref(db)
+
+    if body.session_id:
+        session_doc = ref.document(body.session_id)
+        session_snap, recent = await asyncio.gather(
+            session_doc.get(), _load_recent(session_doc)
+        )
+        if session_snap.exists and session_snap.get("user_id") == user_id:
+            data = session_snap.to_dict() or {}
+            summary = data.get("summary") if settings.coach_summary_enabled else None
+            if summary:
+                # 要約済みのメッセージはそのまま送らない
+                until = data.get("summary_until")
+                recent = [m for m in recent if until is None or m["created_at"] > until]
+            history = coach_service.trim_history(
+                [{"role": m["role"], "content": m["content"]} for m in recent],
+                settings.coach_history_max_tokens,
+            )
+            return _SessionContext(
+                body.session_id, session_doc, data, recent, history, summary
+            )
+
+    # セッションが存在しないか別ユーザーの場合は新規作成（読み込んだ履歴は使わない）
+    session_id = str(uuid.uuid4())
+    return _SessionContext(session_id, ref.document(session_id), None, [], [])
+
+
+async def _load_recent(session_doc: AsyncDocumentReference) -> list[dict]:
+    """直近のメッセージを古い順で取得."""
+    messages_ref = session_doc.collection("messages")
+    recent_query = messages_ref.order_by("created_at", direction="DESCENDING").limit(
+        settings.coach_history_limit
+    )
+    recent_docs = [doc async for doc in recent_query.stream()]
+    return [
+        {
+            "role": doc.get("role"),
+            "content": doc.get("content"),
+            "created_at": doc.get("created_at"),
+        }
+        for doc in reversed(recent_docs)
+    ]
+
+
+async def _save_turn(
+    db: AsyncClient,
+    session: _SessionContext,
+    body: CoachRequest,
+    user_id: str,
+    response_text: str,
+    usage: dict[str, int],
+    labels: dict | None,
+    now: datetime,
+) -> list[dict]:
+    """ユーザーメッセージ・アシスタント応答・セッション更新を1回のコミットで保存.
+
+    labels（LangGraphの分類結果）はユーザーメッセージの metadata に残し、
+    ローカル分類器の学習・評価データにする。
+
+    Returns:
+        保存したメッセージ（古い順）
+    """
+    messages_ref = session.doc.collection("messages")
     assistant_now = datetime.now(UTC)
-    await messages_ref.document(assistant_msg_id).set({
-        "role": "assistant",
-        "content": response_text,
-        "metadata": {
-            "model": settings.claude_model,
+    batch = db.batch()
+
+    saved = [
+        {
+            "role": "user",
+            "content": body.message,
+            "metadata": labels,
+            "created_at": now,
+        },
+        {
+            "role": "assistant",
+            "content": response_text,
+            "metadata": {
+                "model": settings.claude_model,
+                # キャッシュの読み書きを含むトークン使用量
+                "usage": usage,
+            },
+            "created_at": assistant_now,
         },
-        "created_at": assistant_now,
-    })
+    ]
+    for message in saved:
+        # user_id / session_id / written_at は差分同期（messages のコレクション
+        # グループ）用。created_at はユーザーメッセージではリクエスト開始時刻で、
+        # 応答生成の間に進んだウォーターマークより前になりうるため、同期には
+        # コミット直前の時刻を使う
+        batch.set(
+            messages_ref.document(str(uuid.uuid4())),
+            {
+                **message,
+                "user_id": user_id,
+                "session_id": session.session_id,
+                "written_at": assistant_now,
+            },
+        )
+
+    if session.data is None:
+        cycle_element = body.context.cycle_element.value if body.context and body.context.cycle_element else None
+        batch.set(session.doc, {
+            "user_id": user_id,
+            "title": None,
+            "cycle_element": cycle_element,
+            "has_diary_context": body.diary_content is not None,
+            "message_count": 2,
+            "last_message_at": assistant_now,
+            "created_at": now,
+            "updated_at": assistant_now,
+        })
+        add_stats_delta(batch, db, user_id, sessions=1)
+    else:
+        # 同じセッションへの呼び出しが重なってもカウントを失わない
+        batch.update(session.doc, {
+            "message_count": Increment(2),
+            "last_message_at": assistant_now,
+            "updated_at": assistant_now,
+        })
+
+    await batch.commit()
+    return saved
 
-    # セッションのメッセージ数を更新
-    session_data = (await session_doc.get()).to_dict() or {}
-    await session_doc.update({
-        "message_count": session_data.get("message_count", 0) + 2,
-        "last_message_at": assistant_now,
-        "updated_at": assistant_now,
-    })
 
+def _labels(result: dict) -> dict:
+    """フローの結果から分類ラベルとその出所を取り出す."""
+    return {
+        "detected_emotion": result.get("detected_emotion"),
+        "emotion_source": result.get("emotion_source"),
+        "cycle_element": result.get("cycle_element"),
+        "cycle_source": result.get("cycle_source"),
+    }
+
+
+def _schedule_summary(
+    background_tasks: BackgroundTasks,
+    session: _SessionContext,
+    saved: list[dict],
+) -> None:
+    """要約されていないメッセージが増えたら、古い分の要約を応答後に実行する."""
+    if not settings.coach_summary_enabled:
+        return
+    unsummarized = session.recent + saved
+    if len(unsummarized) <= settings.coach_summary_trigger_messages:
+        return
+    keep = settings.coach_summary_keep_messages
+    background_tasks.add_task(_update_summary, session.doc, unsummarized[:-keep])
+
+
+async def _update_summary(
+    session_doc: AsyncDocumentReference,
+    messages: list[dict],
+) -> None:
+    """セッションの要約に messages を畳み込む（応答の送信後に実行）."""
+    try:
+        data = (await session_doc.get()).to_dict() or {}
+        # 重なったターンが先に要約した分は除く
+        until = data.get("summary_until")
+        messages = [m for m in messages if until is None or m["created_at"] > until]
+        if not messages:
+            return
+        summary = await coach_service.summarize(data.get("summary"), messages)
+        await session_doc.update({
+            "summary": summary,
+            "summary_until": messages[-1]["created_at"],
+        })
+    except Exception:
+        logger.warning("Failed to update conversation summary", exc_info=True)
+
+
+def _coach_data(
+    body: CoachRequest,
+    session_id: str,
+    response_text: str,
+    response_cycle_element: str | None,
+    detected_emotion: str | None,
+) -> CoachData:
     # Cycle要素: LangGraphの判定結果 > リクエストの指定
     final_cycle_element = (
         response_cycle_element
         or (body.context.cycle_element if body.context else None)
     )
 
-    return {
-        "data": CoachData(
-            message=response_text,
-            session_id=session_id,
-            metadata=CoachMetadata(
-                stage=settings.environment,
-                model=settings.claude_model,
-                cycle_element=final_cycle_element,
-                detected_emotion=detected_emotion,
-            ),
-        )
-    }
+    return CoachData(
+        message=response_text,
+        session_id=session_id,
+        metadata=CoachMetadata(
+            stage=settings.environment,
+            model=settings.claude_model,
+            cycle_element=final_cycle_element,
+            detected_emotion=detected_emotion,
+        ),
+    )
@@ -5,6 +5,8 @@ from datetime import UTC, datetime
 from fastapi import APIRouter
 
 from app.config import settings
+from app.middleware.auth_middleware import token_cache
+from app.services.safety import safety_counters
 
 router = APIRouter(tags=["System"])
 
@@ -15,4 +17,6 @@ async def health():
         "status": "healthy",
         "stage": settings.environment,
         "timestamp": datetime.now(UTC).isoformat(),
+        "auth_token_cache": token_cache.stats(),
+        "safety_prescreen": safety_counters.stats(),
     }
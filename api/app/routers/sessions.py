@@ -3,9 +3,10 @@
 import uuid
 from datetime import UTC, datetime
 
-from fastapi import APIRouter, Depends, Query, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Query, Response
 from google.cloud.firestore import AsyncClient
 
+from app.config import settings
 from app.dependencies import get_current_user, get_firestore
 from app.exceptions import NotFoundError
 from app.models.session import (
@@ -15,34 +16,39 @@ from app.models.session import (
     SessionListData,
     SessionSummary,
 )
+from app.services.cascade_delete import delete_collection, delete_session_messages
+from app.services.etag import etag_matches, make_etag, not_modified, set_etag
 from app.services.firestore_client import sessions_ref
+from app.services.pagination import fetch_page_with_total
+from app.services.sync import add_tombstone
+from app.services.user_stats import add_stats_delta
 
 router = APIRouter(prefix="/sessions", tags=["Sessions"])
 
 
 @router.get("")
 async def list_sessions(
-    limit: int = Query(default=20, le=100),
-    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(default=None),
+    offset: int = Query(default=0, ge=0, deprecated=True),
+    include_total: bool = Query(default=True),
     user_id: str = Depends(get_current_user),
     db: AsyncClient = Depends(get_firestore),
 ):
-    """ユーザーの会話セッション一覧を取得."""
-    ref = sessions_ref(db)
-    query = (
-        ref.where("user_id", "==", user_id)
-        .order_by("created_at", direction="DESCENDING")
-    )
+    """ユーザーの会話セッション一覧を取得.
 
-    # 全件数を取得
-    all_docs = [doc async for doc in query.stream()]
-    total = len(all_docs)
+    次ページは前のレスポンスの next_cursor を cursor に指定して取得する。
+    total はサーバー側の count() 集計で求める。不要なら include_total=false。
+    """
+    ref = sessions_ref(db)
+    query = ref.where("user_id", "==", user_id)
 
-    # ページネーション適用
-    paginated = all_docs[offset : offset + limit]
+    docs, next_cursor, has_more, total = await fetch_page_with_total(
+        query, limit, cursor, offset, include_total
+    )
 
     sessions = []
-    for doc in paginated:
+    for doc in docs:
         data = doc.to_dict() or {}
         sessions.append(
             SessionSummary(
@@ -61,6 +67,8 @@ async def list_sessions(
             total=total,
             limit=limit,
             offset=offset,
+            next_cursor=next_cursor,
+            has_more=has_more,
         )
     }
 
@@ -86,7 +94,10 @@ async def create_session(
         "created_at": now,
         "updated_at": now,
     }
-    await ref.document(session_id).set(session_data)
+    batch = db.batch()
+    batch.set(ref.document(session_id), session_data)
+    add_stats_delta(batch, db, user_id, sessions=1)
+    await batch.commit()
 
     return {
         "data": SessionSummary(
@@ -103,10 +114,16 @@ async def create_session(
 @router.get("/{session_id}")
 async def get_session(
     session_id: str,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
     user_id: str = Depends(get_current_user),
     db: AsyncClient = Depends(get_firestore),
 ):
-    """特定のセッションの詳細とメッセージ履歴を取得."""
+    """特定のセッションの詳細とメッセージ履歴を取得.
+
+    ETag はセッションの updated_at と message_count から作る。If-None-Match が
+    一致すればセッション1件の読み取りだけで 304 を返す。
+    """
     ref = sessions_ref(db)
     doc = ref.document(session_id)
     snapshot = await doc.get()
@@ -118,6 +135,13 @@ async def get_session(
     if data.get("user_id") != user_id:
         raise NotFoundError("Session")
 
+    etag = make_etag(
+        "session", session_id, data.get("updated_at"), data.get("message_count", 0)
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     # メッセージ取得
     messages_ref = doc.collection("messages")
     msg_query = messages_ref.order_by("created_at")
@@ -147,13 +171,23 @@ async def get_session(
     }
 
 
-@router.delete("/{session_id}", status_code=204)
+@router.delete(
+    "/{session_id}",
+    status_code=204,
+    responses={202: {"description": "メッセージの削除をバックグラウンドで継続中"}},
+)
 async def delete_session(
     session_id: str,
+    background_tasks: BackgroundTasks,
     user_id: str = Depends(get_current_user),
     db: AsyncClient = Depends(get_firestore),
 ):
-    """セッションを削除."""
+    """セッションを削除.
+
+    メッセージ数が多いセッションはセッション本体だけを先に削除して 202 を返し、
+    メッセージはレスポンス後に削除する（途中で失敗した分は /sync と
+    アカウント削除で再び削除する）。
+    """
     ref = sessions_ref(db)
     doc = ref.document(session_id)
     snapshot = await doc.get()
@@ -165,10 +199,23 @@ async def delete_session(
     if data.get("user_id") != user_id:
         raise NotFoundError("Session")
 
-    # サブコレクション（messages）も削除
     messages_ref = doc.collection("messages")
-    async for msg_doc in messages_ref.stream():
-        await msg_doc.reference.delete()
+    background = (
+        data.get("message_count", 0) > settings.cascade_delete_background_threshold
+    )
+    # サブコレクション（messages）も削除
+    if not background:
+        await delete_collection(db, messages_ref)
+
+    batch = db.batch()
+    batch.delete(doc)
+    add_stats_delta(batch, db, user_id, sessions=-1)
+    add_tombstone(
+        batch, db, user_id, "session", session_id, children_pending=background
+    )
+    await batch.commit()
 
-    await doc.delete()
+    if background:
+        background_tasks.add_task(delete_session_messages, db, session_id)
+        return Response(status_code=202)
     return Response(status_code=204)
@@ -0,0 +1,73 @@
+"""Delta sync endpoint."""
+
+from datetime import UTC, datetime, timedelta
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Query
+from google.cloud.firestore import AsyncClient
+
+from app.config import settings
+from app.dependencies import get_current_user, get_firestore
+from app.exceptions import WatermarkExpiredError
+from app.models.session import SessionSummary
+from app.models.sync import DeletedResource, SyncData, SyncMessage
+from app.models.task import TaskData
+from app.services.cascade_delete import delete_session_messages
+from app.services.sync import fetch_changes
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+@router.get("")
+async def sync(
+    background_tasks: BackgroundTasks,
+    since: datetime = Query(description="前回のレスポンスの watermark"),
+    limit: int = Query(default=settings.sync_page_size, ge=1, le=500),
+    user_id: str = Depends(get_current_user),
+    db: AsyncClient = Depends(get_firestore),
+):
+    """since 以降に変更されたセッション・タスク、新しいメッセージ、削除を取得.
+
+    返された watermark を次回の since に指定する。has_more が true の場合は
+    すぐに続きを取得する。since が削除の記録の保持期間より古い場合は 410 を返す
+    （一覧APIで全件を取得し直す）。
+    """
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
+    if since < datetime.now(UTC) - timedelta(days=settings.tombstone_ttl_days):
+        raise WatermarkExpiredError()
+
+    changes = await fetch_changes(db, user_id, since, limit)
+    for doc in changes.tombstones:
+        # セッション削除後のメッセージの削除が終わっていなければ再実行する
+        tombstone = doc.to_dict()
+        if tombstone["kind"] == "session" and tombstone.get("children_pending"):
+            background_tasks.add_task(
+                delete_session_messages, db, tombstone["resource_id"]
+            )
+
+    return {
+        "data": SyncData(
+            sessions=[
+                SessionSummary.model_validate({**doc.to_dict(), "session_id": doc.id})
+                for doc in changes.sessions
+            ],
+            tasks=[
+                TaskData.model_validate({**doc.to_dict(), "task_id": doc.id})
+                for doc in changes.tasks
+            ],
+            messages=[
+                SyncMessage.model_validate({**doc.to_dict(), "message_id": doc.id})
+                for doc in changes.messages
+            ],
+            deleted=[
+                DeletedResource(
+                    kind=doc.get("kind"),
+                    id=doc.get("resource_id"),
+                    deleted_at=doc.get("deleted_at"),
+                )
+                for doc in changes.tombstones
+            ],
+            watermark=changes.watermark,
+            has_more=changes.has_more,
+        )
+    }
@@ -1,43 +1,108 @@
 """Task endpoints - CRUD for tasks and reflections."""
 
+import logging
 import uuid
+from collections import Counter
+from collections.abc import Sequence
 from datetime import UTC, datetime
 
-from fastapi import APIRouter, Depends, Query, Response
-from google.cloud.firestore import AsyncClient
+from fastapi import APIRouter, Depends, Header, Query, Response
+from google.api_core.exceptions import FailedPrecondition
+from google.cloud.firestore import AsyncClient, AsyncWriteBatch
 
 from app.dependencies import get_current_user, get_firestore
-from app.exceptions import NotFoundError
-from app.models.reflection import CreateReflectionRequest, ReflectionData
-from app.models.task import CreateTaskRequest, TaskData, TaskListData, UpdateTaskRequest
-from app.services.firestore_client import tasks_ref
+from app.exceptions import (
+    AppError,
+    ConflictError,
+    InternalError,
+    NotFoundError,
+    ValidationError,
+)
+from app.models.common import ErrorBody
+from app.models.reflection import (
+    BatchCreateReflectionsRequest,
+    CreateReflectionRequest,
+    ReflectionBatchData,
+    ReflectionBatchResult,
+    ReflectionData,
+)
+from app.models.task import (
+    BatchCreateTasksRequest,
+    BatchUpdateTasksRequest,
+    CreateTaskRequest,
+    TaskBatchData,
+    TaskBatchResult,
+    TaskData,
+    TaskListData,
+    UpdateTaskRequest,
+)
+from app.services.batch_writes import MAX_BATCH_WRITES, commit_in_chunks
+from app.services.cascade_delete import delete_collection
+from app.services.etag import etag_matches, make_etag, not_modified, set_etag
+from app.services.firestore_client import tasks_ref, user_stats_ref
+from app.services.pagination import fetch_page_with_total
+from app.services.sync import add_tombstone
+from app.services.user_stats import add_stats_delta
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
 @router.get("")
 async def list_tasks(
+    response: Response,
     status: str | None = Query(default=None),
-    limit: int = Query(default=20, le=100),
-    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(default=None),
+    offset: int = Query(default=0, ge=0, deprecated=True),
+    include_total: bool = Query(default=True),
+    if_none_match: str | None = Header(default=None),
     user_id: str = Depends(get_current_user),
     db: AsyncClient = Depends(get_firestore),
 ):
-    """ユーザーのタスク一覧を取得."""
+    """ユーザーのタスク一覧を取得.
+
+    次ページは前のレスポンスの next_cursor を cursor に指定して取得する。
+    total はサーバー側の count() 集計で求める。不要なら include_total=false。
+
+    ETag はユーザーの tasks_version とクエリパラメータから作る。If-None-Match が
+    一致すればカウンタドキュメント1件の読み取りだけで 304 を返す。
+    アカウント削除でカウンタドキュメントが消えると tasks_version は0からやり直す
+    ため、ドキュメントの create_time も含めて削除前の ETag と区別する。
+    """
+    # 一覧より先にバージョンを読む（間に書き込みがあっても ETag が内容より
+    # 古くなるだけで、更新を見逃す 304 にはならない）
+    stats = await user_stats_ref(db, user_id).get()
+    version = (stats.get("tasks_version") if stats.exists else None) or 0
+    created = stats.create_time if stats.exists else None
+    etag = make_etag(
+        "tasks",
+        user_id,
+        created,
+        version,
+        status,
+        limit,
+        cursor,
+        offset,
+        include_total,
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     ref = tasks_ref(db)
     query = ref.where("user_id", "==", user_id)
 
     if status:
         query = query.where("status", "==", status)
 
-    query = query.order_by("created_at", direction="DESCENDING")
-
-    all_docs = [doc async for doc in query.stream()]
-    total = len(all_docs)
-    paginated = all_docs[offset : offset + limit]
+    docs, next_cursor, has_more, total = await fetch_page_with_total(
+        query, limit, cursor, offset, include_total
+    )
 
     tasks = []
-    for doc in paginated:
+    for doc in docs:
         data = doc.to_dict() or {}
         tasks.append(_doc_to_task(doc.id, data))
 
@@ -47,6 +112,8 @@ async def list_tasks(
             total=total,
             limit=limit,
             offset=offset,
+            next_cursor=next_cursor,
+            has_more=has_more,
         )
     }
 
@@ -60,21 +127,12 @@ async def create_task(
     """新しいタスクを作成."""
     ref = tasks_ref(db)
     task_id = str(uuid.uuid4())
-    now = datetime.now(UTC)
+    task_data = _new_task_data(body, user_id, datetime.now(UTC))
 
-    task_data = {
-        "user_id": user_id,
-        "title": body.title,
-        "description": body.description,
-        "status": "pending",
-        "session_id": body.session_id,
-        "cycle_element": body.cycle_element.value if body.cycle_element else None,
-        "due_date": body.due_date,
-        "completed_at": None,
-        "created_at": now,
-        "updated_at": now,
-    }
-    await ref.document(task_id).set(task_data)
+    batch = db.batch()
+    batch.set(ref.document(task_id), task_data)
+    add_stats_delta(batch, db, user_id, tasks=1, status_changes={"pending": 1})
+    await batch.commit()
 
     return {"data": _doc_to_task(task_id, task_data)}
 
@@ -86,7 +144,12 @@ async def update_task(
     user_id: str = Depends(get_current_user),
     db: AsyncClient = Depends(get_firestore),
 ):
-    """タスクを更新."""
+    """タスクを更新.
+
+    読み取った時点から変更されていない場合だけ書き込み（last_update_time の
+    前提条件）、同時に編集されていたら 409 を返す。レスポンスは読み取った
+    データに更新内容を重ねて作るため、再読み込みはしない。
+    """
     ref = tasks_ref(db)
     doc = ref.document(task_id)
     snapshot = await doc.get()
@@ -98,24 +161,21 @@ async def update_task(
     if data.get("user_id") != user_id:
         raise NotFoundError("Task")
 
-    now = datetime.now(UTC)
-    updates: dict = {"updated_at": now}
-
-    if body.title is not None:
-        updates["title"] = body.title
-    if body.description is not None:
-        updates["description"] = body.description
-    if body.status is not None:
-        updates["status"] = body.status
-        if body.status == "completed":
-            updates["completed_at"] = now
-    if body.due_date is not None:
-        updates["due_date"] = body.due_date
-
-    await doc.update(updates)
+    updates = _task_updates(body, datetime.now(UTC))
+    option = db.write_option(last_update_time=snapshot.update_time)
+    status_changes = _status_changes(data, updates)
+    # ステータス別カウンタと tasks_version は同じバッチで反映
+    batch = db.batch()
+    batch.update(doc, updates, option=option)
+    add_stats_delta(
+        batch, db, user_id, status_changes=status_changes, tasks_changed=True
+    )
+    try:
+        await batch.commit()
+    except FailedPrecondition:
+        raise ConflictError("Task was modified concurrently")
 
-    updated_snap = await doc.get()
-    return {"data": _doc_to_task(task_id, updated_snap.to_dict() or {})}
+    return {"data": _doc_to_task(task_id, {**data, **updates})}
 
 
 @router.delete("/{task_id}", status_code=204)
@@ -137,11 +197,19 @@ async def delete_task(
         raise NotFoundError("Task")
 
     # サブコレクション（reflections）も削除
-    reflections_ref = doc.collection("reflections")
-    async for refl_doc in reflections_ref.stream():
-        await refl_doc.reference.delete()
-
-    await doc.delete()
+    await delete_collection(db, doc.collection("reflections"))
+
+    batch = db.batch()
+    batch.delete(doc)
+    add_stats_delta(
+        batch,
+        db,
+        user_id,
+        tasks=-1,
+        status_changes={data.get("status", "pending"): -1},
+    )
+    add_tombstone(batch, db, user_id, "task", task_id)
+    await batch.commit()
     return Response(status_code=204)
 
 
@@ -165,9 +233,246 @@ async def create_reflection(
         raise NotFoundError("Task")
 
     reflection_id = str(uuid.uuid4())
+    reflection_data = _new_reflection_data(task_id, body, datetime.now(UTC))
+
+    reflections_ref = doc.collection("reflections")
+    await reflections_ref.document(reflection_id).set(reflection_data)
+
+    return {"data": ReflectionData(reflection_id=reflection_id, **reflection_data)}
+
+
+@router.post(":batch")
+async def create_tasks_batch(
+    body: BatchCreateTasksRequest,
+    user_id: str = Depends(get_current_user),
+    db: AsyncClient = Depends(get_firestore),
+):
+    """複数のタスクをまとめて作成（オフラインで作成したタスクの同期用）.
+
+    WriteBatch 単位でコミットし、アイテムごとの結果をリクエストと同じ順で返す。
+    """
+    ref = tasks_ref(db)
     now = datetime.now(UTC)
+    items = [
+        (str(uuid.uuid4()), _new_task_data(task, user_id, now)) for task in body.tasks
+    ]
+
+    def write(batch: AsyncWriteBatch, chunk: Sequence[tuple[str, dict]]) -> None:
+        for task_id, task_data in chunk:
+            batch.set(ref.document(task_id), task_data)
+        add_stats_delta(
+            batch,
+            db,
+            user_id,
+            tasks=len(chunk),
+            status_changes={"pending": len(chunk)},
+        )
 
-    reflection_data = {
+    # カウンタ更新の1件を残してチャンクに詰める
+    errors = await commit_in_chunks(db, items, write, MAX_BATCH_WRITES - 1)
+
+    results = []
+    for index, ((task_id, task_data), error) in enumerate(
+        zip(items, errors, strict=True)
+    ):
+        if error is None:
+            results.append(
+                TaskBatchResult(
+                    index=index,
+                    status=201,
+                    task_id=task_id,
+                    data=_doc_to_task(task_id, task_data),
+                )
+            )
+        else:
+            status, detail = _item_error(error)
+            results.append(
+                TaskBatchResult(
+                    index=index, status=status, task_id=task_id, error=detail
+                )
+            )
+    return {"data": TaskBatchData(results=results)}
+
+
+@router.patch(":batch")
+async def update_tasks_batch(
+    body: BatchUpdateTasksRequest,
+    user_id: str = Depends(get_current_user),
+    db: AsyncClient = Depends(get_firestore),
+):
+    """複数のタスクをまとめて更新.
+
+    対象は get_all の1回の読み取りで確認し、PUT /tasks/{task_id} と同じく
+    last_update_time の前提条件つきで書き込む。同時に編集されたタスクを含む
+    チャンクは1件ずつコミットし直し、競合したアイテムだけを 409 にする。
+    """
+    task_ids = [item.task_id for item in body.tasks]
+    if len(set(task_ids)) != len(task_ids):
+        raise ValidationError("Duplicate task_id in batch")
+
+    ref = tasks_ref(db)
+    snapshots = {
+        snapshot.id: snapshot
+        async for snapshot in db.get_all([ref.document(i) for i in task_ids])
+    }
+    now = datetime.now(UTC)
+
+    results: dict[int, TaskBatchResult] = {}
+    # (index, snapshot, 読み取ったデータ, 更新内容)
+    items = []
+    for index, item in enumerate(body.tasks):
+        snapshot = snapshots.get(item.task_id)
+        data = snapshot.to_dict() if snapshot and snapshot.exists else None
+        if not data or data.get("user_id") != user_id:
+            status, detail = _item_error(NotFoundError("Task"))
+            results[index] = TaskBatchResult(
+                index=index, status=status, task_id=item.task_id, error=detail
+            )
+            continue
+        items.append((index, snapshot, data, _task_updates(item, now)))
+
+    def write(batch: AsyncWriteBatch, chunk: Sequence[tuple]) -> None:
+        status_changes: Counter[str] = Counter()
+        for _index, snapshot, data, updates in chunk:
+            option = db.write_option(last_update_time=snapshot.update_time)
+            batch.update(snapshot.reference, updates, option=option)
+            status_changes.update(_status_changes(data, updates))
+        add_stats_delta(
+            batch, db, user_id, status_changes=status_changes, tasks_changed=True
+        )
+
+    errors = await commit_in_chunks(db, items, write, MAX_BATCH_WRITES - 1)
+    conflicted = [
+        item
+        for item, error in zip(items, errors, strict=True)
+        if isinstance(error, FailedPrecondition)
+    ]
+    if conflicted:
+        retried = await commit_in_chunks(db, conflicted, write, 1)
+        # リクエスト内の位置 -> 1件ずつコミットし直した結果
+        retry_errors = {
+            item[0]: error for item, error in zip(conflicted, retried, strict=True)
+        }
+        errors = [
+            retry_errors.get(item[0], error)
+            for item, error in zip(items, errors, strict=True)
+        ]
+
+    for (index, snapshot, data, updates), error in zip(items, errors, strict=True):
+        if error is None:
+            results[index] = TaskBatchResult(
+                index=index,
+                status=200,
+                task_id=snapshot.id,
+                data=_doc_to_task(snapshot.id, {**data, **updates}),
+            )
+        else:
+            status, detail = _item_error(error)
+            results[index] = TaskBatchResult(
+                index=index, status=status, task_id=snapshot.id, error=detail
+            )
+    return {"data": TaskBatchData(results=[results[i] for i in sorted(results)])}
+
+
+@router.post("/reflections:batch")
+async def create_reflections_batch(
+    body: BatchCreateReflectionsRequest,
+    user_id: str = Depends(get_current_user),
+    db: AsyncClient = Depends(get_firestore),
+):
+    """複数のふりかえりをまとめて登録（タスクをまたいでよい）."""
+    ref = tasks_ref(db)
+    task_ids = list(dict.fromkeys(item.task_id for item in body.reflections))
+    owned = {
+        snapshot.id
+        async for snapshot in db.get_all([ref.document(i) for i in task_ids])
+        if snapshot.exists and snapshot.get("user_id") == user_id
+    }
+    now = datetime.now(UTC)
+
+    results: dict[int, ReflectionBatchResult] = {}
+    # (index, reflection_id, ふりかえりのデータ)
+    items = []
+    for index, item in enumerate(body.reflections):
+        if item.task_id not in owned:
+            status, detail = _item_error(NotFoundError("Task"))
+            results[index] = ReflectionBatchResult(
+                index=index, status=status, task_id=item.task_id, error=detail
+            )
+            continue
+        data = _new_reflection_data(item.task_id, item, now)
+        items.append((index, str(uuid.uuid4()), data))
+
+    def write(batch: AsyncWriteBatch, chunk: Sequence[tuple]) -> None:
+        for _index, reflection_id, data in chunk:
+            doc = ref.document(data["task_id"]).collection("reflections")
+            batch.set(doc.document(reflection_id), data)
+
+    errors = await commit_in_chunks(db, items, write)
+
+    for (index, reflection_id, data), error in zip(items, errors, strict=True):
+        if error is None:
+            results[index] = ReflectionBatchResult(
+                index=index,
+                status=201,
+                task_id=data["task_id"],
+                reflection_id=reflection_id,
+                data=ReflectionData(reflection_id=reflection_id, **data),
+            )
+        else:
+            status, detail = _item_error(error)
+            results[index] = ReflectionBatchResult(
+                index=index, status=status, task_id=data["task_id"], error=detail
+            )
+    return {
+        "data": ReflectionBatchData(results=[results[i] for i in sorted(results)])
+    }
+
+
+def _new_task_data(body: CreateTaskRequest, user_id: str, now: datetime) -> dict:
+    return {
+        "user_id": user_id,
+        "title": body.title,
+        "description": body.description,
+        "status": "pending",
+        "session_id": body.session_id,
+        "cycle_element": body.cycle_element.value if body.cycle_element else None,
+        "due_date": body.due_date,
+        "completed_at": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _task_updates(body: UpdateTaskRequest, now: datetime) -> dict:
+    updates: dict = {"updated_at": now}
+
+    if body.title is not None:
+        updates["title"] = body.title
+    if body.description is not None:
+        updates["description"] = body.description
+    if body.status is not None:
+        updates["status"] = body.status
+        if body.status == "completed":
+            updates["completed_at"] = now
+    if body.due_date is not None:
+        updates["due_date"] = body.due_date
+    return updates
+
+
+def _status_changes(data: dict, updates: dict) -> dict[str, int]:
+    """ステータス別カウンタの増分（ステータスが変わらなければ空）."""
+    old_status = data.get("status", "pending")
+    new_status = updates.get("status", old_status)
+    if new_status == old_status:
+        return {}
+    return {old_status: -1, new_status: 1}
+
+
+def _new_reflection_data(
+    task_id: str, body: CreateReflectionRequest, now: datetime
+) -> dict:
+    return {
         "task_id": task_id,
         "what_i_did": body.what_i_did,
         "what_i_noticed": body.what_i_noticed,
@@ -176,20 +481,15 @@ async def create_reflection(
         "created_at": now,
     }
 
-    reflections_ref = doc.collection("reflections")
-    await reflections_ref.document(reflection_id).set(reflection_data)
 
-    return {
-        "data": ReflectionData(
-            reflection_id=reflection_id,
-            task_id=task_id,
-            what_i_did=body.what_i_did,
-            what_i_noticed=body.what_i_noticed,
-            what_i_want_to_try=body.what_i_want_to_try,
-            overall_feeling=body.overall_feeling,
-            created_at=now,
-        )
-    }
+def _item_error(error: Exception) -> tuple[int, ErrorBody]:
+    """一括操作のアイテムの失敗を (ステータスコード, エラー内容) に変換."""
+    if isinstance(error, FailedPrecondition):
+        error = ConflictError("Task was modified concurrently")
+    elif not isinstance(error, AppError):
+        logger.error("Batch write failed", exc_info=error)
+        error = InternalError()
+    return error.status_code, ErrorBody(code=error.code, message=error.message)
 
 
 def _doc_to_task(task_id: str, data: dict) -> TaskData:
@@ -1,12 +1,30 @@
 """User endpoints."""
 
-from fastapi import APIRouter, Depends
-from google.cloud.firestore import AsyncClient
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, BackgroundTasks, Depends
+from fastapi.responses import StreamingResponse
+from google.api_core.exceptions import AlreadyExists
+from google.cloud.firestore import AsyncClient, DocumentSnapshot
 
 from app.dependencies import get_current_user, get_firestore
 from app.exceptions import NotFoundError
-from app.models.user import UserData, UserSettings
-from app.services.firestore_client import users_ref
+from app.models.user import (
+    AccountDeletionData,
+    TaskStatusCounts,
+    UserData,
+    UserSettings,
+    UserStats,
+)
+from app.routers.auth import known_users, new_user_data
+from app.services.account import delete_user_data, export_user_data, start_deletion
+from app.services.auth_providers import GOOGLE
+from app.services.firestore_client import (
+    account_deletions_ref,
+    user_stats_ref,
+    users_ref,
+)
+from app.services.user_stats import rebuild_user_stats
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -17,13 +35,7 @@ async def get_me(
     db: AsyncClient = Depends(get_firestore),
 ):
     """認証済みユーザー自身の情報を取得."""
-    ref = users_ref(db)
-    doc = ref.document(user_id)
-    snapshot = await doc.get()
-
-    if not snapshot.exists:
-        raise NotFoundError("User")
-
+    snapshot = await _get_user(db, user_id)
     data = snapshot.to_dict() or {}
     user_settings = data.get("settings", {})
 
@@ -38,3 +50,104 @@ async def get_me(
             updated_at=data.get("updated_at"),
         )
     }
+
+
+@router.get("/me/stats")
+async def get_my_stats(
+    user_id: str = Depends(get_current_user),
+    db: AsyncClient = Depends(get_firestore),
+):
+    """セッション数・タスク数（ステータス別）を取得.
+
+    カウンタドキュメント1件の読み取りで返す。カウンタが未初期化の場合のみ
+    集計クエリで作り直す。
+    """
+    snapshot = await user_stats_ref(db, user_id).get()
+    data = snapshot.to_dict() if snapshot.exists else None
+    if not data or not data.get("initialized"):
+        data = await rebuild_user_stats(db, user_id)
+
+    return {
+        "data": UserStats(
+            session_count=data.get("session_count", 0),
+            task_count=data.get("task_count", 0),
+            tasks_by_status=TaskStatusCounts(**data.get("tasks_by_status", {})),
+            updated_at=data.get("updated_at"),
+        )
+    }
+
+
+@router.get("/me/export")
+async def export_me(
+    user_id: str = Depends(get_current_user),
+    db: AsyncClient = Depends(get_firestore),
+):
+    """ユーザーの全データを NDJSON（1ドキュメント1行）でストリーミング."""
+    snapshot = await _get_user(db, user_id)
+    return StreamingResponse(
+        export_user_data(db, snapshot),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="export.ndjson"'},
+    )
+
+
+@router.delete("/me", status_code=202)
+async def delete_me(
+    background_tasks: BackgroundTasks,
+    user_id: str = Depends(get_current_user),
+    db: AsyncClient = Depends(get_firestore),
+):
+    """ユーザーの全データの削除を開始.
+
+    削除はレスポンス後にバックグラウンドで進み、進捗は GET /users/me/deletion で
+    確認できる。失敗・中断したジョブは再度呼び出すと続きから再開する。
+    """
+    job, start = await start_deletion(db, user_id)
+    if start:
+        background_tasks.add_task(_delete_account, db, user_id)
+    return {"data": AccountDeletionData(**job)}
+
+
+@router.get("/me/deletion")
+async def get_my_deletion(
+    user_id: str = Depends(get_current_user),
+    db: AsyncClient = Depends(get_firestore),
+):
+    """削除ジョブの進捗を取得."""
+    snapshot = await account_deletions_ref(db).document(user_id).get()
+    if not snapshot.exists:
+        raise NotFoundError("Deletion job")
+    return {"data": AccountDeletionData(**snapshot.to_dict())}
+
+
+async def _get_user(db: AsyncClient, user_id: str) -> DocumentSnapshot:
+    """users/{id} を取得.
+
+    アカウント削除が完了しているのにドキュメントがない場合は、削除後の再サインインが
+    別インスタンスのキャッシュで既知ユーザーとして扱われたものとみなして作り直す
+    （有効なトークンを持っているのでサインインと同じ扱いにする）。
+    """
+    doc = users_ref(db).document(user_id)
+    snapshot = await doc.get()
+    if snapshot.exists:
+        return snapshot
+
+    deletion = await account_deletions_ref(db).document(user_id).get()
+    if not deletion.exists or deletion.get("status") != "completed":
+        raise NotFoundError("User")
+
+    if user_id.startswith(GOOGLE.user_id_prefix):
+        provider = ("google_user_id", user_id.removeprefix(GOOGLE.user_id_prefix))
+    else:
+        provider = ("apple_user_id", user_id)
+    try:
+        await doc.create(new_user_data(*provider, None, datetime.now(UTC)))
+    except AlreadyExists:
+        pass
+    return await doc.get()
+
+
+async def _delete_account(db: AsyncClient, user_id: str) -> None:
+    await delete_user_data(db, user_id)
+    # このインスタンスでは再サインイン時にすぐ作り直されるようにする
+    known_users.discard(user_id)
@@ -0,0 +1,207 @@
+"""Account-wide export and deletion.
+
+ユーザーのデータ（users/{id}、sessions と messages、tasks と reflections、
+users/{id}/stats、削除の記録 tombstones）をページ単位で読み進めて処理する。
+
+- エクスポート: 1ドキュメント1行の NDJSON を逐次生成（保持するのは1ページ分）
+- 削除: account_deletions/{user_id} に進捗を記録しながらページごとに
+  WriteBatch で削除する。親セッションが先に削除されて残ったメッセージは
+  messages のコレクショングループから user_id で探して削除する。
+  削除済みのドキュメントはクエリに現れないため、中断しても同じジョブを
+  再実行すれば残りから続けられる
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from google.cloud.firestore import AsyncClient, DocumentSnapshot, Increment
+
+from app.config import settings
+from app.services.batch_writes import MAX_BATCH_WRITES
+from app.services.cascade_delete import delete_collection
+from app.services.firestore_client import (
+    account_deletions_ref,
+    sessions_ref,
+    tasks_ref,
+    tombstones_ref,
+    users_ref,
+)
+from app.services.pagination import iter_pages
+
+logger = logging.getLogger(__name__)
+
+# (親コレクション, サブコレクション, 親のtype, 子のtype)
+# type は NDJSON の type と削除件数のキー（{type}s_deleted）に使う
+_OWNED = (
+    ("sessions", "messages", "session", "message"),
+    ("tasks", "reflections", "task", "reflection"),
+)
+
+
+def _page_size() -> int:
+    # 削除ではページ内のドキュメントと進捗の更新を1コミットにまとめる
+    return min(settings.account_page_size, MAX_BATCH_WRITES - 1)
+
+
+def _owned_query(db: AsyncClient, collection: str, user_id: str):
+    ref = sessions_ref(db) if collection == "sessions" else tasks_ref(db)
+    return ref.where("user_id", "==", user_id).order_by("__name__")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _line(record: dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, default=_json_default) + "\n"
+
+
+async def export_user_data(
+    db: AsyncClient, user: DocumentSnapshot
+) -> AsyncIterator[str]:
+    """ユーザーのデータを NDJSON の行として順に返す.
+
+    1行目が user、続いて各 session の直後にその messages（作成順）、
+    各 task の直後にその reflections。
+    """
+    page_size = _page_size()
+    yield _line({"type": "user", "id": user.id, "data": user.to_dict()})
+
+    for collection, child, kind, child_kind in _OWNED:
+        async for parents in iter_pages(
+            _owned_query(db, collection, user.id), page_size
+        ):
+            for parent in parents:
+                yield _line({"type": kind, "id": parent.id, "data": parent.to_dict()})
+                children = (
+                    parent.reference.collection(child)
+                    .order_by("created_at")
+                    .order_by("__name__")
+                )
+                async for page in iter_pages(children, page_size):
+                    for doc in page:
+                        yield _line(
+                            {
+                                "type": child_kind,
+                                "id": doc.id,
+                                f"{kind}_id": parent.id,
+                                "data": doc.to_dict(),
+                            }
+                        )
+
+
+async def start_deletion(db: AsyncClient, user_id: str) -> tuple[dict[str, Any], bool]:
+    """削除ジョブを開始または再開.
+
+    Returns:
+        (ジョブの状態, 削除処理を新たに実行するか)
+        実行中のジョブがあればその状態を返し、二重には実行しない
+    """
+    ref = account_deletions_ref(db).document(user_id)
+    snapshot = await ref.get()
+    job = snapshot.to_dict() if snapshot.exists else None
+    now = datetime.now(UTC)
+
+    stale_after = timedelta(seconds=settings.account_deletion_stale_after)
+    if job and job["status"] == "running" and now - job["updated_at"] < stale_after:
+        return job, False
+
+    if job is None or job["status"] == "completed":
+        job = {
+            "status": "running",
+            "sessions_deleted": 0,
+            "messages_deleted": 0,
+            "tasks_deleted": 0,
+            "reflections_deleted": 0,
+            "error": None,
+            "started_at": now,
+            "completed_at": None,
+        }
+    else:
+        # 失敗・中断したジョブは件数を引き継いで再開
+        job = {**job, "status": "running", "error": None}
+    job["updated_at"] = now
+    await ref.set(job)
+    return job, True
+
+
+async def delete_user_data(db: AsyncClient, user_id: str) -> None:
+    """ユーザーのデータをすべて削除し、ジョブを completed にする.
+
+    失敗した場合はジョブを failed にして記録する（再実行で続きから再開）。
+    """
+    job_ref = account_deletions_ref(db).document(user_id)
+    try:
+        for owned in _OWNED:
+            await _delete_owned(db, job_ref, user_id, *owned)
+        # セッション削除のバックグラウンド処理が途中で終わって残ったメッセージ
+        orphans = await delete_collection(
+            db, db.collection_group("messages").where("user_id", "==", user_id)
+        )
+        if orphans:
+            await job_ref.update({
+                "messages_deleted": Increment(orphans),
+                "updated_at": datetime.now(UTC),
+            })
+
+        await delete_collection(
+            db, tombstones_ref(db).where("user_id", "==", user_id)
+        )
+        user_doc = users_ref(db).document(user_id)
+        await delete_collection(db, user_doc.collection("stats"))
+        batch = db.batch()
+        batch.delete(user_doc)
+        now = datetime.now(UTC)
+        batch.update(
+            job_ref, {"status": "completed", "updated_at": now, "completed_at": now}
+        )
+        await batch.commit()
+    except Exception as e:
+        logger.exception("Account deletion failed for %s", user_id)
+        await job_ref.update(
+            {
+                "status": "failed",
+                "error": type(e).__name__,
+                "updated_at": datetime.now(UTC),
+            }
+        )
+
+
+async def _delete_owned(
+    db: AsyncClient,
+    job_ref,
+    user_id: str,
+    collection: str,
+    child: str,
+    kind: str,
+    child_kind: str,
+) -> None:
+    """親ドキュメントをページごとに、サブコレクションを先に消してから削除."""
+    slots = asyncio.Semaphore(settings.cascade_delete_concurrency)
+
+    async def delete_children(parent: DocumentSnapshot) -> int:
+        async with slots:
+            return await delete_collection(db, parent.reference.collection(child))
+
+    query = _owned_query(db, collection, user_id).select([])
+    async for parents in iter_pages(query, _page_size()):
+        children = await asyncio.gather(*(delete_children(p) for p in parents))
+
+        batch = db.batch()
+        for parent in parents:
+            batch.delete(parent.reference)
+        batch.update(
+            job_ref,
+            {
+                f"{kind}s_deleted": Increment(len(parents)),
+                f"{child_kind}s_deleted": Increment(sum(children)),
+                "updated_at": datetime.now(UTC),
+            },
+        )
+        await batch.commit()
@@ -0,0 +1,52 @@
+"""Identity provider registry - routes a token to its verifier by issuer.
+
+プロバイダーを追加する場合は AuthProvider を register_provider で登録する。
+"""
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from app.services import apple_auth, google_auth
+
+
+@dataclass
+class AuthProvider:
+    name: str
+    issuers: tuple[str, ...]
+    verify: Callable[[str], Awaitable[dict[str, Any]]]
+    # アプリ内のuser_idにするときの接頭辞（Appleは既存ユーザーとの互換のためなし）
+    user_id_prefix: str = ""
+
+    def user_id(self, subject: str) -> str:
+        return f"{self.user_id_prefix}{subject}"
+
+
+_providers: dict[str, AuthProvider] = {}
+
+
+def register_provider(provider: AuthProvider) -> None:
+    for issuer in provider.issuers:
+        _providers[issuer] = provider
+
+
+def provider_for_issuer(issuer: str | None) -> AuthProvider | None:
+    if not issuer:
+        return None
+    return _providers.get(issuer)
+
+
+APPLE = AuthProvider(
+    name="apple",
+    issuers=(apple_auth.APPLE_ISSUER,),
+    verify=apple_auth.verify_apple_token,
+)
+GOOGLE = AuthProvider(
+    name="google",
+    issuers=google_auth.GOOGLE_ISSUERS,
+    verify=google_auth.verify_google_token,
+    user_id_prefix="google_",
+)
+
+register_provider(APPLE)
+register_provider(GOOGLE)
@@ -0,0 +1,46 @@
+"""Chunked WriteBatch commits for bulk endpoints.
+
+アイテムを WriteBatch の上限以下のチャンクに分けて並行してコミットする。
+チャンク内はアトミックだが、チャンク同士は独立して成功・失敗する。
+"""
+
+import asyncio
+from collections.abc import Callable, Sequence
+
+from google.cloud.firestore import AsyncClient, AsyncWriteBatch
+
+# Firestoreの1コミットあたりの書き込み上限
+MAX_BATCH_WRITES = 500
+
+
+async def commit_in_chunks(
+    db: AsyncClient,
+    items: Sequence,
+    write: Callable[[AsyncWriteBatch, Sequence], None],
+    chunk_size: int = MAX_BATCH_WRITES,
+) -> list[Exception | None]:
+    """items を chunk_size 件ずつ write でバッチに積んでコミット.
+
+    Returns:
+        アイテムごとの結果（入力順）。所属するチャンクのコミットが成功していれば
+        None、失敗していればその例外
+    """
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    async def commit(chunk: Sequence) -> None:
+        batch = db.batch()
+        write(batch, chunk)
+        await batch.commit()
+
+    outcomes = await asyncio.gather(
+        *(commit(chunk) for chunk in chunks), return_exceptions=True
+    )
+    for outcome in outcomes:
+        # キャンセルなどはアイテムの失敗ではないので呼び出し元に伝える
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+            raise outcome
+    return [
+        outcome if isinstance(outcome, Exception) else None
+        for chunk, outcome in zip(chunks, outcomes, strict=True)
+        for _ in chunk
+    ]
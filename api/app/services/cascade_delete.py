@@ -0,0 +1,74 @@
+"""Cascading deletes for subcollections (messages, reflections).
+
+ドキュメントIDの順にページングして読み取り（IDのみ）、ページごとに
+WriteBatch でまとめて削除する。次のページの読み取りと前のページの
+コミットを重ね、同時に走るコミット数は settings で制限する。
+
+AsyncClient には BulkWriter がないため、500件上限の WriteBatch を使う。
+"""
+
+import asyncio
+import logging
+
+from google.cloud.firestore import AsyncClient, AsyncCollectionReference, AsyncQuery
+
+from app.config import settings
+from app.services.batch_writes import MAX_BATCH_WRITES
+from app.services.firestore_client import sessions_ref, tombstones_ref
+from app.services.pagination import iter_pages
+
+logger = logging.getLogger(__name__)
+
+
+async def delete_collection(
+    db: AsyncClient,
+    collection: AsyncCollectionReference | AsyncQuery,
+    batch_size: int | None = None,
+    concurrency: int | None = None,
+) -> int:
+    """コレクション（またはクエリの結果）のドキュメントをすべて削除し、件数を返す.
+
+    サブコレクションの下にさらにサブコレクションがある場合は対象外。
+    """
+    batch_size = min(
+        batch_size or settings.cascade_delete_batch_size, MAX_BATCH_WRITES
+    )
+    slots = asyncio.Semaphore(concurrency or settings.cascade_delete_concurrency)
+    # フィールドは読まずドキュメント名だけを取得
+    query = collection.select([]).order_by("__name__")
+
+    async def commit(refs: list) -> None:
+        try:
+            batch = db.batch()
+            for ref in refs:
+                batch.delete(ref)
+            await batch.commit()
+        finally:
+            slots.release()
+
+    deleted = 0
+    async with asyncio.TaskGroup() as group:
+        async for snapshots in iter_pages(query, batch_size):
+            await slots.acquire()
+            group.create_task(commit([s.reference for s in snapshots]))
+            deleted += len(snapshots)
+    return deleted
+
+
+async def delete_session_messages(db: AsyncClient, session_id: str) -> None:
+    """削除済みセッションに残ったメッセージを削除（バックグラウンド用）.
+
+    完了したら削除の記録の children_pending を下ろす。失敗してもログに残すだけに
+    する。残ったメッセージは /sync がそのセッションの削除を返すときと、
+    アカウント削除のときに再び削除する。
+    """
+    messages = sessions_ref(db).document(session_id).collection("messages")
+    try:
+        await delete_collection(db, messages)
+        await tombstones_ref(db).document(f"session_{session_id}").update(
+            {"children_pending": False}
+        )
+    except Exception:
+        logger.warning(
+            "Failed to delete messages of session %s", session_id, exc_info=True
+        )
@@ -0,0 +1,219 @@
+"""In-process classifiers for emotion and Cycle element.
+
+LangGraphフローの感情分析・Cycle要素判定は固定の語彙から1語を選ぶだけなので、
+ローカルの分類器で確信度が十分なときはLLM呼び出しを省略する。
+
+- lexicon: キーワード辞書による判定（学習不要）
+- ngram:   文字n-gramのナイーブベイズ。LLMが付けたラベルから学習した
+           モデル（JSON）を settings.coach_classifier_model_dir から読み込む
+
+学習と一致率の評価は benchmarks/eval_classifiers.py で行う。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import Any, Protocol
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+EMOTION_LEXICON: dict[str, tuple[str, ...]] = {
+    "喜び": ("嬉しい", "うれしい", "楽しい", "楽しかった", "幸せ", "最高", "よかった"),
+    "不安": ("不安", "心配", "怖い", "こわい", "緊張", "落ち着かない", "どうしよう"),
+    "怒り": ("腹が立", "ムカ", "むかつ", "イライラ", "いらいら", "許せない", "怒"),
+    "悲しみ": ("悲しい", "かなしい", "寂しい", "さみしい", "つらい", "辛い", "泣"),
+    "迷い": ("迷", "わからない", "分からない", "決められない", "どっち", "悩"),
+    "期待": ("楽しみ", "ワクワク", "わくわく", "期待", "待ち遠しい", "挑戦したい"),
+    "疲れ": ("疲れ", "つかれ", "しんどい", "眠い", "だるい", "ヘトヘト", "くたくた"),
+    "安心": ("安心", "ほっと", "ホッと", "落ち着いた", "大丈夫", "穏やか"),
+}
+
+CYCLE_LEXICON: dict[str, tuple[str, ...]] = {
+    "Soil": ("環境", "家族", "実家", "育った", "昔", "子供の頃", "思い出", "記憶"),
+    "Water": ("続け", "習慣", "毎日", "継続", "ルーティン", "三日坊主", "柔軟"),
+    "Root": ("価値観", "信念", "大切にしたい", "本当は", "根っこ", "自分らしさ"),
+    "Trunk": ("決め", "決断", "選んだ", "覚悟", "意志", "姿勢", "貫"),
+    "Branch": ("考え", "アイデア", "可能性", "選択肢", "視点", "見方", "広げ"),
+    "Leaf": ("行動", "仕事", "やってみ", "やった", "作業", "家事", "日常"),
+    "Fruit": ("達成", "成果", "できた", "合格", "褒められ", "気づ", "実っ"),
+    "Sky": ("友達", "仲間", "つながり", "人間関係", "将来", "未来", "人生"),
+}
+
+LEXICONS = {"emotion": EMOTION_LEXICON, "cycle": CYCLE_LEXICON}
+
+# キーワードの直後に続くと意味が反転する表現（「大丈夫じゃない」「心配ない」など）
+NEGATIONS = ("ない", "なく", "なかっ", "じゃな", "ではな", "でもな", "できな", "しな")
+
+
+@dataclass
+class Prediction:
+    label: str
+    confidence: float
+
+
+class Classifier(Protocol):
+    def predict(self, text: str) -> Prediction | None:
+        """ラベルと確信度（0〜1）を返す。判断材料がなければ None."""
+        ...
+
+
+def normalize(text: str) -> str:
+    """全角半角・大文字小文字の揺れをそろえ、空白を除く."""
+    return "".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+class LexiconClassifier:
+    """キーワードの出現数が最も多いラベルを選ぶ.
+
+    確信度は (最多ラベルのヒット数 - 2位のヒット数) / (最多ラベルのヒット数 + 1)。
+    1語だけのヒットは 0.5 にとどまり、同じラベルに2語以上ヒットして他のラベルとの
+    差があるときだけ高くなる。否定が続くキーワードがあれば判定しない（None）。
+    """
+
+    def __init__(self, lexicon: dict[str, tuple[str, ...]]):
+        self.lexicon = {
+            label: tuple(normalize(word) for word in words)
+            for label, words in lexicon.items()
+        }
+
+    def predict(self, text: str) -> Prediction | None:
+        text = normalize(text)
+        scores: Counter[str] = Counter()
+        for label, words in self.lexicon.items():
+            for word in words:
+                start = text.find(word)
+                while start >= 0:
+                    end = start + len(word)
+                    if text.startswith(NEGATIONS, end):
+                        return None
+                    scores[label] += 1
+                    start = text.find(word, end)
+        if not scores:
+            return None
+        (label, top), *rest = scores.most_common(2)
+        runner_up = rest[0][1] if rest else 0
+        return Prediction(label, (top - runner_up) / (top + 1))
+
+
+@dataclass
+class NgramClassifier:
+    """文字n-gramの多項ナイーブベイズ."""
+
+    min_n: int = 1
+    max_n: int = 3
+    alpha: float = 1.0
+    docs: Counter[str] = field(default_factory=Counter)
+    grams: dict[str, Counter[str]] = field(default_factory=dict)
+    _vocab: int = field(default=0, init=False, repr=False)
+    _totals: dict[str, int] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._index()
+
+    def _index(self) -> None:
+        self._vocab = len(set().union(*self.grams.values()))
+        self._totals = {label: sum(c.values()) for label, c in self.grams.items()}
+
+    def ngrams(self, text: str) -> Counter[str]:
+        text = normalize(text)
+        return Counter(
+            text[i : i + n]
+            for n in range(self.min_n, self.max_n + 1)
+            for i in range(len(text) - n + 1)
+        )
+
+    def fit(self, examples: Iterable[tuple[str, str]]) -> NgramClassifier:
+        """(テキスト, ラベル) の組から学習."""
+        for text, label in examples:
+            self.docs[label] += 1
+            self.grams.setdefault(label, Counter()).update(self.ngrams(text))
+        self._index()
+        return self
+
+    def predict(self, text: str) -> Prediction | None:
+        features = self.ngrams(text)
+        if not self.docs or not features:
+            return None
+
+        n_docs = sum(self.docs.values())
+        scores = {}
+        for label, counts in self.grams.items():
+            denominator = self._totals[label] + self.alpha * self._vocab
+            scores[label] = math.log(self.docs[label] / n_docs) + sum(
+                n * math.log((counts[gram] + self.alpha) / denominator)
+                for gram, n in features.items()
+            )
+
+        # 事後確率（softmax）
+        best = max(scores, key=scores.__getitem__)
+        z = sum(math.exp(s - scores[best]) for s in scores.values())
+        return Prediction(best, 1 / z)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "type": "ngram",
+            "min_n": self.min_n,
+            "max_n": self.max_n,
+            "alpha": self.alpha,
+            "docs": dict(self.docs),
+            "grams": {label: dict(counts) for label, counts in self.grams.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> NgramClassifier:
+        return cls(
+            min_n=data["min_n"],
+            max_n=data["max_n"],
+            alpha=data["alpha"],
+            docs=Counter(data["docs"]),
+            grams={label: Counter(c) for label, c in data["grams"].items()},
+        )
+
+    def save(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False))
+
+    @classmethod
+    def load(cls, path: Path) -> NgramClassifier:
+        return cls.from_dict(json.loads(path.read_text()))
+
+
+@cache
+def _load(kind: str, task: str, model_dir: str) -> Classifier | None:
+    if kind == "lexicon":
+        return LexiconClassifier(LEXICONS[task])
+    if kind == "ngram":
+        path = Path(model_dir) / f"{task}.json"
+        try:
+            return NgramClassifier.load(path)
+        except (OSError, ValueError, KeyError):
+            logger.warning("Failed to load %s classifier from %s", task, path)
+            return None
+    return None
+
+
+def get_classifier(task: str) -> Classifier | None:
+    """settings.coach_classifier で選ばれた分類器（"llm" の場合は None）."""
+    return _load(settings.coach_classifier, task, settings.coach_classifier_model_dir)
+
+
+def classify_locally(task: str, text: str) -> Prediction | None:
+    """ローカル分類器の予測。確信度が閾値未満なら None（LLMにフォールバック）."""
+    classifier = get_classifier(task)
+    if classifier is None:
+        return None
+    prediction = classifier.predict(text)
+    if prediction is None:
+        return None
+    if prediction.confidence < settings.coach_classifier_min_confidence:
+        return None
+    return prediction
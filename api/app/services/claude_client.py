@@ -0,0 +1,114 @@
+"""Process-wide Vertex AI Claude client.
+
+リクエストごとにクライアントを作るとADC解決・TLSハンドシェイク・
+コネクションプール生成を毎回払うため、プロセスで1つを共有する。
+"""
+
+import asyncio
+import logging
+from datetime import UTC, datetime
+
+import anthropic
+import httpx
+from anthropic.lib.vertex._auth import load_auth, refresh_auth
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: anthropic.AsyncAnthropicVertex | None = None
+_http_client: httpx.AsyncClient | None = None
+_refresh_task: asyncio.Task | None = None
+
+
+def get_client() -> anthropic.AsyncAnthropicVertex:
+    """共有クライアントを取得（遅延初期化）."""
+    global _client, _http_client
+    if _client is None:
+        _http_client = anthropic.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.claude_max_connections,
+                max_keepalive_connections=settings.claude_max_keepalive_connections,
+                keepalive_expiry=settings.claude_keepalive_expiry,
+            ),
+            timeout=settings.claude_timeout,
+        )
+        _client = anthropic.AsyncAnthropicVertex(
+            region=settings.gcp_region,
+            project_id=settings.gcp_project_id,
+            http_client=_http_client,
+        )
+    return _client
+
+
+async def _ensure_credentials(client: anthropic.AsyncAnthropicVertex) -> None:
+    """ADC認証情報を解決してクライアントに設定（ブロッキング処理は別スレッド）."""
+    if client.credentials is None:
+        credentials, _project_id = await asyncio.to_thread(
+            load_auth, project_id=client.project_id
+        )
+        client.credentials = credentials
+
+
+def _seconds_until_refresh(client: anthropic.AsyncAnthropicVertex) -> float:
+    expiry = getattr(client.credentials, "expiry", None)
+    if expiry is None:
+        return float(settings.claude_token_refresh_margin)
+    # google-authのexpiryはnaiveなUTC
+    remaining = (expiry.replace(tzinfo=UTC) - datetime.now(UTC)).total_seconds()
+    return max(remaining - settings.claude_token_refresh_margin, 0.0)
+
+
+async def _refresh_loop(client: anthropic.AsyncAnthropicVertex) -> None:
+    """アクセストークンを失効前にバックグラウンドで更新し続ける.
+
+    リクエスト経路でトークン更新（同期HTTP）が走らないようにする。
+    """
+    while True:
+        try:
+            await _ensure_credentials(client)
+            await asyncio.sleep(_seconds_until_refresh(client))
+            await asyncio.to_thread(refresh_auth, client.credentials)
+        except Exception:
+            logger.warning("Vertex AI credential refresh failed", exc_info=True)
+            await asyncio.sleep(settings.claude_token_refresh_retry)
+
+
+def start_credential_refresh() -> None:
+    """トークン更新タスクを起動（起動済みなら何もしない）."""
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh_loop(get_client()))
+
+
+async def warmup() -> None:
+    """コールドスタート後の最初のリクエストの初期化コストを先払いする.
+
+    認証情報の解決とVertex AIエンドポイントへの接続確立を済ませておく。
+    失敗しても起動は継続し、通常の遅延初期化にフォールバックする。
+    """
+    client = get_client()
+    try:
+        await _ensure_credentials(client)
+        # 接続をプールに載せておく（応答ステータスは問わない）
+        if _http_client is not None:
+            await _http_client.head(str(client.base_url), timeout=5)
+    except Exception:
+        logger.warning("Vertex AI client warmup failed", exc_info=True)
+    start_credential_refresh()
+
+
+async def close() -> None:
+    """トークン更新タスクを停止し、コネクションプールを閉じる."""
+    global _client, _http_client, _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+    if _client is not None:
+        await _client.close()
+        _client = None
+        _http_client = None
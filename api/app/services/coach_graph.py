@@ -5,22 +5,35 @@ Nodes:
   2. determine_cycle  - Cycleモデルの要素を判定
   3. generate_response - コーチの応答を生成
   4. safety_filter     - 応答の安全性チェック
+
+1と2は互いに独立しているため並列に実行する。
+settings.coach_cycle_uses_emotion が有効な場合のみ、感情の判定結果を
+Cycle要素の判定に渡すため直列に実行する。
+settings.coach_classifier でローカル分類器を選ぶと、1と2は確信度が
+低い場合だけLLMを呼ぶ。
 """
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, TypedDict
 
-import anthropic
-from langgraph.graph import END, StateGraph
+from langgraph.graph import END, START, StateGraph
 
 from app.config import settings
-from app.services.coach_service import SYSTEM_PROMPT
+from app.services.classifiers import classify_locally
+from app.services.claude_client import get_client
+from app.services.coach_service import build_messages, build_system, usage_metadata
+from app.services.safety import prescreen, safety_counters
 
 # Cycle要素
 CYCLE_ELEMENTS = ["Soil", "Water", "Root", "Trunk", "Branch", "Leaf", "Fruit", "Sky"]
 
+# 安全でないと判定された応答の置き換え文言
+SAFE_FALLBACK = "ごめんね、うまく言葉にできなかった。もう少し教えてもらえるかな？"
+
 
 @dataclass
 class CoachState:
@@ -29,22 +42,36 @@ class CoachState:
     user_message: str = ""
     diary_content: str | None = None
     history: list[dict[str, str]] = field(default_factory=list)
+    summary: str | None = None
     detected_emotion: str | None = None
     cycle_element: str | None = None
+    # 分類結果の出所（"llm" またはローカル分類器の名前）
+    emotion_source: str | None = None
+    cycle_source: str | None = None
     response: str = ""
+    usage: dict[str, int] = field(default_factory=dict)
     is_safe: bool = True
 
 
-def _get_client() -> anthropic.AnthropicVertex:
-    return anthropic.AnthropicVertex(
-        region=settings.gcp_region,
-        project_id=settings.gcp_project_id,
-    )
+class CoachGraphState(TypedDict, total=False):
+    """グラフのチャネル定義（ノードは差分だけを返す）."""
 
+    user_message: str
+    diary_content: str | None
+    history: list[dict[str, str]]
+    summary: str | None
+    detected_emotion: str | None
+    cycle_element: str | None
+    emotion_source: str | None
+    cycle_source: str | None
+    response: str
+    usage: dict[str, int]
+    is_safe: bool
 
-def _quick_classify(client: Any, prompt: str) -> str:
+
+async def _quick_classify(client: Any, prompt: str) -> str:
     """短い分類タスクをClaude に実行させる."""
-    resp = client.messages.create(
+    resp = await client.messages.create(
         model=settings.claude_model,
         max_tokens=50,
         messages=[{"role": "user", "content": prompt}],
@@ -56,91 +83,103 @@ def _quick_classify(client: Any, prompt: str) -> str:
 # --- Nodes ---
 
 
-def analyze_emotion(state: CoachState) -> dict:
+async def analyze_emotion(state: CoachState) -> dict:
     """ユーザーメッセージから感情を検出."""
-    client = _get_client()
+    local = classify_locally("emotion", state.user_message)
+    if local is not None:
+        return {
+            "detected_emotion": local.label,
+            "emotion_source": settings.coach_classifier,
+        }
+
+    client = get_client()
     prompt = (
         f"以下のメッセージから、ユーザーの主な感情を1単語の日本語で答えてください。"
         f"例: 喜び、不安、怒り、悲しみ、迷い、期待、疲れ、安心\n\n"
         f"メッセージ: {state.user_message}"
     )
-    emotion = _quick_classify(client, prompt)
-    return {"detected_emotion": emotion}
+    emotion = await _quick_classify(client, prompt)
+    return {"detected_emotion": emotion, "emotion_source": "llm"}
 
 
-def determine_cycle(state: CoachState) -> dict:
+async def determine_cycle(state: CoachState) -> dict:
     """Cycleモデルのどの要素に関連するか判定."""
-    client = _get_client()
+    local = classify_locally("cycle", state.user_message)
+    if local is not None:
+        return {"cycle_element": local.label, "cycle_source": settings.coach_classifier}
+
+    client = get_client()
     elements_str = ", ".join(CYCLE_ELEMENTS)
     prompt = (
         f"以下のメッセージが、Cycleモデルのどの要素に最も関連するか1つ選んでください。\n"
         f"選択肢: {elements_str}\n"
         f"要素名だけを答えてください。\n\n"
-        f"メッセージ: {state.user_message}\n"
-        f"検出された感情: {state.detected_emotion}"
+        f"メッセージ: {state.user_message}"
     )
-    element = _quick_classify(client, prompt)
+    if state.detected_emotion:
+        prompt += f"\n検出された感情: {state.detected_emotion}"
+    element = await _quick_classify(client, prompt)
     # 有効な要素名かチェック
     if element not in CYCLE_ELEMENTS:
         element = "Root"
-    return {"cycle_element": element}
+    return {"cycle_element": element, "cycle_source": "llm"}
 
 
-def generate_response(state: CoachState) -> dict:
-    """コーチの応答を生成."""
-    client = _get_client()
-
-    # メッセージ履歴を構築
-    messages: list[dict[str, str]] = []
-    if state.history:
-        messages.extend(state.history)
-
-    # ユーザーメッセージを構築
-    content = state.user_message
-    if state.diary_content:
-        content = (
-            f"【日記の内容】\n{state.diary_content}\n\n"
-            f"【ユーザーのメッセージ】\n{state.user_message}"
-        )
-
-    # 分析結果をシステムプロンプトに追加
-    enhanced_system = (
-        f"{SYSTEM_PROMPT}\n\n"
+def _response_request(state: CoachState) -> dict[str, Any]:
+    """応答生成リクエストのパラメータを構築."""
+    analysis = (
         f"## 現在の分析結果\n"
         f"- 検出された感情: {state.detected_emotion}\n"
         f"- Cycle要素: {state.cycle_element}\n"
         f"- この情報をもとに、適切な問いかけや共感を返してください。"
     )
+    messages = build_messages(state.user_message, state.history, state.diary_content)
+    # 分析結果はターンごとに変わるため、キャッシュするシステムプロンプトと
+    # 履歴の後ろ（今回のユーザーメッセージ）に付ける
+    current = messages[-1]
+    current["content"] = [
+        {"type": "text", "text": current["content"]},
+        {"type": "text", "text": analysis},
+    ]
 
-    messages.append({"role": "user", "content": content})
+    return {
+        "model": settings.claude_model,
+        "max_tokens": settings.claude_max_tokens,
+        "system": build_system(state.summary),
+        "messages": messages,
+        "temperature": settings.claude_temperature,
+    }
 
-    resp = client.messages.create(
-        model=settings.claude_model,
-        max_tokens=settings.claude_max_tokens,
-        system=enhanced_system,
-        messages=messages,
-        temperature=settings.claude_temperature,
-    )
-    return {"response": resp.content[0].text}
 
+async def generate_response(state: CoachState) -> dict:
+    """コーチの応答を生成."""
+    client = get_client()
+    resp = await client.messages.create(**_response_request(state))
+    return {"response": resp.content[0].text, "usage": usage_metadata(resp.usage)}
+
+
+async def safety_filter(state: CoachState) -> dict:
+    """応答の安全性をチェック.
+
+    ルールによるプレスクリーンで明らかに安全な応答はその場で通し、
+    疑わしいものだけLLMで判定する（判定結果は safety_counters に記録）。
+    """
+    if settings.coach_safety_prescreen and prescreen(state.response).verdict == "pass":
+        return {"is_safe": True}
 
-def safety_filter(state: CoachState) -> dict:
-    """応答の安全性をチェック."""
-    client = _get_client()
+    client = get_client()
     prompt = (
         f"以下のAIコーチの応答が安全かどうかを判定してください。\n"
         f"危険な例: 医療診断、自傷行為の肯定、個人情報の要求\n"
         f"「safe」または「unsafe」だけで答えてください。\n\n"
         f"応答: {state.response}"
     )
-    result = _quick_classify(client, prompt)
+    result = await _quick_classify(client, prompt)
     is_safe = "unsafe" not in result.lower()
+    safety_counters.record_judgement(is_safe)
 
     if not is_safe:
-        return {
-            "is_safe": False,
-            "response": "ごめんね、うまく言葉にできなかった。もう少し教えてもらえるかな？",
-        }
+        return {"is_safe": False, "response": SAFE_FALLBACK}
     return {"is_safe": True}
 
 
@@ -152,27 +191,52 @@ def _state_to_dict(state: CoachState) -> dict:
         "user_message": state.user_message,
         "diary_content": state.diary_content,
         "history": state.history,
+        "summary": state.summary,
         "detected_emotion": state.detected_emotion,
         "cycle_element": state.cycle_element,
+        "emotion_source": state.emotion_source,
+        "cycle_source": state.cycle_source,
         "response": state.response,
+        "usage": state.usage,
         "is_safe": state.is_safe,
     }
 
 
-def build_coach_graph() -> StateGraph:
-    """コーチングワークフローのグラフを構築."""
-    graph = StateGraph(dict)
+def _as_node(fn: Callable[[CoachState], Awaitable[dict]]) -> Callable:
+    """dictベースのグラフ状態を受け取る非同期ノードに変換."""
 
-    graph.add_node("analyze_emotion", lambda s: analyze_emotion(_dict_to_state(s)))
-    graph.add_node("determine_cycle", lambda s: determine_cycle(_dict_to_state(s)))
-    graph.add_node(
-        "generate_response", lambda s: generate_response(_dict_to_state(s))
-    )
-    graph.add_node("safety_filter", lambda s: safety_filter(_dict_to_state(s)))
+    async def node(s: dict) -> dict:
+        return await fn(_dict_to_state(s))
+
+    return node
+
+
+def build_coach_graph(cycle_uses_emotion: bool | None = None) -> StateGraph:
+    """コーチングワークフローのグラフを構築.
 
-    graph.set_entry_point("analyze_emotion")
-    graph.add_edge("analyze_emotion", "determine_cycle")
-    graph.add_edge("determine_cycle", "generate_response")
+    Args:
+        cycle_uses_emotion: Trueなら感情分析の完了を待ってからCycle要素を判定する。
+            未指定の場合は settings.coach_cycle_uses_emotion に従う。
+    """
+    if cycle_uses_emotion is None:
+        cycle_uses_emotion = settings.coach_cycle_uses_emotion
+
+    graph = StateGraph(CoachGraphState)
+
+    graph.add_node("analyze_emotion", _as_node(analyze_emotion))
+    graph.add_node("determine_cycle", _as_node(determine_cycle))
+    graph.add_node("generate_response", _as_node(generate_response))
+    graph.add_node("safety_filter", _as_node(safety_filter))
+
+    if cycle_uses_emotion:
+        graph.add_edge(START, "analyze_emotion")
+        graph.add_edge("analyze_emotion", "determine_cycle")
+        graph.add_edge("determine_cycle", "generate_response")
+    else:
+        # 2つの分類を同時に走らせ、両方の完了を待って応答を生成
+        graph.add_edge(START, "analyze_emotion")
+        graph.add_edge(START, "determine_cycle")
+        graph.add_edge(["analyze_emotion", "determine_cycle"], "generate_response")
     graph.add_edge("generate_response", "safety_filter")
     graph.add_edge("safety_filter", END)
 
@@ -184,9 +248,13 @@ def _dict_to_state(d: dict) -> CoachState:
         user_message=d.get("user_message", ""),
         diary_content=d.get("diary_content"),
         history=d.get("history", []),
+        summary=d.get("summary"),
         detected_emotion=d.get("detected_emotion"),
         cycle_element=d.get("cycle_element"),
+        emotion_source=d.get("emotion_source"),
+        cycle_source=d.get("cycle_source"),
         response=d.get("response", ""),
+        usage=d.get("usage", {}),
         is_safe=d.get("is_safe", True),
     )
 
@@ -207,11 +275,13 @@ async def run_coach_flow(
     user_message: str,
     history: list[dict] | None = None,
     diary_content: str | None = None,
+    summary: str | None = None,
 ) -> dict:
     """コーチングフローを実行.
 
     Returns:
-        dict with keys: response, detected_emotion, cycle_element, is_safe
+        dict with keys: response, detected_emotion, cycle_element,
+        emotion_source, cycle_source, is_safe, usage
     """
     graph = get_coach_graph()
 
@@ -219,17 +289,79 @@ async def run_coach_flow(
         "user_message": user_message,
         "diary_content": diary_content,
         "history": history or [],
+        "summary": summary,
         "detected_emotion": None,
         "cycle_element": None,
         "response": "",
         "is_safe": True,
     }
 
-    result = graph.invoke(initial_state)
+    result = await graph.ainvoke(initial_state)
 
     return {
         "response": result["response"],
         "detected_emotion": result.get("detected_emotion"),
         "cycle_element": result.get("cycle_element"),
+        "emotion_source": result.get("emotion_source"),
+        "cycle_source": result.get("cycle_source"),
         "is_safe": result.get("is_safe", True),
+        "usage": result.get("usage", {}),
+    }
+
+
+async def stream_coach_flow(
+    user_message: str,
+    history: list[dict] | None = None,
+    diary_content: str | None = None,
+    summary: str | None = None,
+) -> AsyncIterator[tuple[str, Any]]:
+    """コーチングフローを応答トークンのストリーミング付きで実行.
+
+    グラフと同じノードを使うが、generate_response だけはストリーミングAPIで
+    呼び出し、安全性チェックは生成完了後に行う。
+
+    Yields:
+        ("token", str): 応答テキストの断片
+        ("result", dict): run_coach_flow と同じキーの最終結果
+    """
+    state = CoachState(
+        user_message=user_message,
+        diary_content=diary_content,
+        history=history or [],
+        summary=summary,
+    )
+
+    if settings.coach_cycle_uses_emotion:
+        emotion = await analyze_emotion(state)
+        state.detected_emotion = emotion["detected_emotion"]
+        cycle = await determine_cycle(state)
+    else:
+        emotion, cycle = await asyncio.gather(
+            analyze_emotion(state), determine_cycle(state)
+        )
+        state.detected_emotion = emotion["detected_emotion"]
+    state.emotion_source = emotion["emotion_source"]
+    state.cycle_element = cycle["cycle_element"]
+    state.cycle_source = cycle["cycle_source"]
+
+    client = get_client()
+    chunks: list[str] = []
+    async with client.messages.stream(**_response_request(state)) as stream:
+        async for text in stream.text_stream:
+            chunks.append(text)
+            yield "token", text
+        message = await stream.get_final_message()
+    state.response = "".join(chunks)
+    state.usage = usage_metadata(message.usage)
+
+    verdict = await safety_filter(state)
+
+    yield "result", {
+        "response": verdict.get("response", state.response),
+        "detected_emotion": state.detected_emotion,
+        "cycle_element": state.cycle_element,
+        "emotion_source": state.emotion_source,
+        "cycle_source": state.cycle_source,
+        "is_safe": verdict["is_safe"],
+        "usage": state.usage,
     }
@@ -3,9 +3,12 @@
 Ported from api/src/handlers/coach.py (Lambda + Bedrock version).
 """
 
-import anthropic
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Any
 
 from app.config import settings
+from app.services.claude_client import get_client
 
 # ベースプロンプト（Cycleの大樹スタイル）
 SYSTEM_PROMPT = """あなたは「Cycle」というアプリの中で、大きな一本の樹として存在するAIコーチです。
@@ -50,49 +53,192 @@ SYSTEM_PROMPT = """あなたは「Cycle」というアプリの中で、大き
 - 長々と説明せず、余白を残す"""
 
 
-def _get_client() -> anthropic.AnthropicVertex:
-    """Vertex AI Claude client (ADC自動認証)."""
-    return anthropic.AnthropicVertex(
-        region=settings.gcp_region,
-        project_id=settings.gcp_project_id,
-    )
+SUMMARY_PROMPT = """あなたはAIコーチとユーザーの会話を記録する係です。
+これまでの要約と新しいやりとりをもとに、要約を更新してください。
+
+- ユーザーの感情・価値観・出来事・決めたことを中心に残す
+- コーチの問いかけは、ユーザーが答えたものだけ残す
+- 箇条書きで、全体を400文字以内にまとめる
+- 要約だけを出力する"""
+
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+@dataclass
+class CoachReply:
+    """コーチの応答とトークン使用量."""
+
+    text: str
+    usage: dict[str, int] = field(default_factory=dict)
+
+
+def _text_block(text: str, cache: bool = False) -> dict[str, Any]:
+    block: dict[str, Any] = {"type": "text", "text": text}
+    if cache and settings.claude_prompt_cache:
+        # ここまでのプレフィックスをプロンプトキャッシュの対象にする
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def build_system(summary: str | None = None) -> list[dict[str, Any]]:
+    """システムプロンプトにこれまでの会話の要約を付け加える.
+
+    固定の SYSTEM_PROMPT をキャッシュし、要約はその後ろに置く。
+    """
+    blocks = [_text_block(SYSTEM_PROMPT, cache=True)]
+    if summary:
+        blocks.append(_text_block(f"## これまでの会話の要約\n{summary}"))
+    return blocks
+
+
+def usage_metadata(usage: Any) -> dict[str, int]:
+    """レスポンスの usage からメッセージの metadata に記録する値を取り出す."""
+    if usage is None:
+        return {}
+    return {name: getattr(usage, name, None) or 0 for name in USAGE_FIELDS}
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算（日本語は1文字≒1トークン、ASCIIは4文字≒1トークン）."""
+    non_ascii = sum(1 for ch in text if ord(ch) > 0x7F)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def trim_history(history: list[dict], max_tokens: int) -> list[dict]:
+    """推定トークン数が上限に収まるよう、新しいメッセージから残す.
+
+    先頭がアシスタントの発言にならないよう、ユーザーの発言から始める。
+    """
+    kept: list[dict] = []
+    total = 0
+    for message in reversed(history):
+        total += estimate_tokens(message.get("content") or "")
+        if total > max_tokens:
+            break
+        kept.append(message)
+    kept.reverse()
+
+    while kept and kept[0].get("role") != "user":
+        kept.pop(0)
+    return kept
+
+
+def build_messages(
+    user_message: str,
+    history: list[dict] | None = None,
+    diary_content: str | None = None,
+) -> list[dict]:
+    """履歴と今回のユーザーメッセージからmessages配列を構築.
+
+    履歴の最後にキャッシュのブレークポイントを置き、前回までの会話を
+    次のターンでキャッシュから読めるようにする。
+    """
+    messages: list[dict] = []
+    if history:
+        messages.extend(history[:-1])
+        last = history[-1]
+        messages.append({
+            "role": last["role"],
+            "content": [_text_block(last["content"], cache=True)],
+        })
+
+    content = user_message
+    if diary_content:
+        content = (
+            f"【日記の内容】\n{diary_content}\n\n"
+            f"【ユーザーのメッセージ】\n{user_message}"
+        )
+
+    messages.append({"role": "user", "content": content})
+    return messages
 
 
 async def chat(
     user_message: str,
     history: list[dict] | None = None,
     diary_content: str | None = None,
-) -> str:
+    summary: str | None = None,
+) -> CoachReply:
     """コーチの応答を取得.
 
     Args:
         user_message: ユーザーのメッセージ
         history: 過去のメッセージ履歴 [{"role": "user"|"assistant", "content": "..."}]
         diary_content: 日記の内容（オプション）
+        summary: historyより前の会話の要約（オプション）
 
     Returns:
-        コーチの応答テキスト
+        コーチの応答テキストとトークン使用量
     """
-    client = _get_client()
+    client = get_client()
 
-    # メッセージ履歴を構築
-    messages: list[dict] = []
-    if history:
-        messages.extend(history)
+    response = await client.messages.create(
+        model=settings.claude_model,
+        max_tokens=settings.claude_max_tokens,
+        system=build_system(summary),
+        messages=build_messages(user_message, history, diary_content),
+        temperature=settings.claude_temperature,
+    )
 
-    # ユーザーメッセージを構築
-    content = user_message
-    if diary_content:
-        content = f"【日記の内容】\n{diary_content}\n\n【ユーザーのメッセージ】\n{user_message}"
+    return CoachReply(response.content[0].text, usage_metadata(response.usage))
 
-    messages.append({"role": "user", "content": content})
 
-    response = client.messages.create(
+async def stream_chat(
+    user_message: str,
+    history: list[dict] | None = None,
+    diary_content: str | None = None,
+    summary: str | None = None,
+) -> AsyncIterator[tuple[str, Any]]:
+    """コーチの応答をトークン単位で逐次返す.
+
+    呼び出し側がイテレーションを途中でやめた場合（クライアント切断など）は
+    ジェネレーターのクローズ時に上流のストリームも閉じられる。
+
+    Yields:
+        ("token", str): 応答テキストの断片
+        ("usage", dict): 完了後のトークン使用量
+    """
+    client = get_client()
+
+    async with client.messages.stream(
         model=settings.claude_model,
         max_tokens=settings.claude_max_tokens,
-        system=SYSTEM_PROMPT,
-        messages=messages,
+        system=build_system(summary),
+        messages=build_messages(user_message, history, diary_content),
         temperature=settings.claude_temperature,
+    ) as stream:
+        async for text in stream.text_stream:
+            yield "token", text
+        message = await stream.get_final_message()
+        yield "usage", usage_metadata(message.usage)
+
+
+async def summarize(previous_summary: str | None, messages: list[dict]) -> str:
+    """これまでの要約に新しいメッセージを畳み込んだ要約を返す."""
+    client = get_client()
+    transcript = "\n".join(
+        f"{'ユーザー' if m['role'] == 'user' else 'コーチ'}: {m['content']}"
+        for m in messages
+    )
+
+    response = await client.messages.create(
+        model=settings.claude_model,
+        max_tokens=settings.coach_summary_max_tokens,
+        system=SUMMARY_PROMPT,
+        messages=[{
+            "role": "user",
+            "content": (
+                f"【これまでの要約】\n{previous_summary or 'なし'}\n\n"
+                f"【新しいやりとり】\n{transcript}"
+            ),
+        }],
+        temperature=0.0,
     )
 
     return response.content[0].text
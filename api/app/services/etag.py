@@ -0,0 +1,39 @@
+"""Strong ETags and If-None-Match handling for conditional GETs.
+
+ETag はレスポンスの内容を決める値（更新日時・件数・バージョンなど）から作り、
+本文を組み立てる前に比較する。一致すれば 304 を返し、本文の読み取りを省く。
+"""
+
+import hashlib
+
+from fastapi import Response
+
+# 認証ユーザーごとの内容なので共有キャッシュには置かせず、毎回検証させる
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """値の組から強いETag（引用符つき）を作る."""
+    raw = "\x1f".join(str(part) for part in parts).encode()
+    return f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match が etag に一致するか（弱い比較, RFC 9110 13.1.2）."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
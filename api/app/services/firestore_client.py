@@ -25,3 +25,15 @@ def sessions_ref(db: AsyncClient):
 
 def tasks_ref(db: AsyncClient):
     return db.collection("tasks")
+
+
+def user_stats_ref(db: AsyncClient, user_id: str):
+    return users_ref(db).document(user_id).collection("stats").document("summary")
+
+
+def account_deletions_ref(db: AsyncClient):
+    return db.collection("account_deletions")
+
+
+def tombstones_ref(db: AsyncClient):
+    return db.collection("tombstones")
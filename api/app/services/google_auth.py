@@ -1,12 +1,19 @@
 """Google Sign-In - ID Token verification.
 
-Uses google-auth library to verify Google ID tokens against Google's public keys.
+Verifies Google ID tokens locally with PyJWT against Google's public keys.
+The keys are fetched asynchronously and cached according to Cache-Control.
 """
 
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
+import jwt
 
 from app.config import settings
+from app.services.jwks import JWKSCache
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Google公開鍵のキャッシュ（kid -> 公開鍵オブジェクト）
+google_keys = JWKSCache(GOOGLE_CERTS_URL, respect_cache_control=True)
 
 
 async def verify_google_token(token: str) -> dict:
@@ -19,20 +26,30 @@ async def verify_google_token(token: str) -> dict:
         検証済みクレーム（sub, email, name等）
 
     Raises:
+        jwt.ExpiredSignatureError: トークンの有効期限が切れている場合
         ValueError: トークンが無効な場合
     """
     try:
-        claims = id_token.verify_oauth2_token(
+        kid = jwt.get_unverified_header(token).get("kid")
+        if not kid:
+            raise ValueError("Token missing kid in header")
+
+        public_key = await google_keys.get_key(kid)
+        claims = jwt.decode(
             token,
-            google_requests.Request(),
+            public_key,
+            algorithms=["RS256"],
             audience=settings.google_client_id,
+            options={"require": ["exp", "iat", "iss", "sub"]},
         )
-    except ValueError as e:
+    except jwt.ExpiredSignatureError:
+        raise
+    except (jwt.InvalidTokenError, ValueError) as e:
         raise ValueError(f"Invalid Google ID token: {e}")
 
     # issuer検証
     issuer = claims.get("iss", "")
-    if issuer not in ("accounts.google.com", "https://accounts.google.com"):
+    if issuer not in GOOGLE_ISSUERS:
         raise ValueError(f"Invalid issuer: {issuer}")
 
     return claims
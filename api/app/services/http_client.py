@@ -0,0 +1,20 @@
+"""Shared outbound HTTP client (JWKS fetches etc.)."""
+
+import httpx
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """プロセス共有のHTTPクライアントを取得（遅延初期化）."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=10)
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,114 @@
+"""JWKS cache - parsed public keys per kid with single-flight refresh.
+
+鍵はJWKのままではなく、検証にそのまま使える公開鍵オブジェクトとして保持する。
+期限の少し前にバックグラウンドで更新し、期限切れ時の同時リクエストは
+1回の取得を待ち合わせる。未知のkidは鍵のローテーションとみなし、
+前回の取得（失敗を含む）から一定間隔を空けて強制的に再取得する。
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any
+
+import httpx
+from jwt.algorithms import RSAAlgorithm
+
+from app.services.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSCache:
+    def __init__(
+        self,
+        url: str,
+        ttl: float = 3600,
+        refresh_ahead: float = 300,
+        min_refresh_interval: float = 60,
+        respect_cache_control: bool = False,
+    ):
+        self.url = url
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.min_refresh_interval = min_refresh_interval
+        self.respect_cache_control = respect_cache_control
+        self._keys: dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._attempted_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._background: asyncio.Task | None = None
+
+    async def get_key(self, kid: str) -> Any:
+        """kidに対応する公開鍵を取得.
+
+        Raises:
+            ValueError: kidに対応する鍵がない場合
+        """
+        now = time.monotonic()
+        if not self._keys or now >= self._expires_at:
+            await self._refresh()
+        elif now >= self._expires_at - self.refresh_ahead:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._attempted_at >= (
+            self.min_refresh_interval
+        ):
+            await self._refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise ValueError(f"Unknown key id: {kid}")
+        return key
+
+    def clear(self) -> None:
+        self._keys = {}
+        self._expires_at = 0.0
+        self._attempted_at = 0.0
+
+    async def _refresh(self) -> None:
+        """シングルフライトで鍵を再取得."""
+        generation = self._generation
+        async with self._lock:
+            if self._generation != generation:
+                # 待っている間に他のリクエストが取得を試みた（失敗も含む）
+                return
+            self._attempted_at = time.monotonic()
+            self._generation += 1
+            try:
+                keys, ttl = await self._fetch()
+            except Exception:
+                if not self._keys:
+                    raise
+                # 取得に失敗しても既存の鍵で検証を続ける
+                logger.warning("JWKS refresh failed: %s", self.url, exc_info=True)
+                self._expires_at = time.monotonic() + self.min_refresh_interval
+                return
+            self._keys = keys
+            self._expires_at = time.monotonic() + ttl
+
+    def _refresh_in_background(self) -> None:
+        if self._background is None or self._background.done():
+            self._background = asyncio.create_task(self._refresh())
+
+    async def _fetch(self) -> tuple[dict[str, Any], float]:
+        response = await get_http_client().get(self.url)
+        response.raise_for_status()
+        keys = {
+            jwk["kid"]: RSAAlgorithm.from_jwk(jwk)
+            for jwk in response.json().get("keys", [])
+            if jwk.get("kid")
+        }
+        return keys, self._ttl_for(response)
+
+    def _ttl_for(self, response: httpx.Response) -> float:
+        """Cache-Control の max-age があればそれを有効期限にする."""
+        if self.respect_cache_control:
+            match = _MAX_AGE.search(response.headers.get("Cache-Control", ""))
+            if match:
+                return float(match.group(1))
+        return self.ttl
@@ -0,0 +1,118 @@
+"""Cursor-based pagination for list endpoints.
+
+一覧は (user_id, created_at DESC) の複合インデックスに沿って並べ、
+最後に返したドキュメントの created_at とIDを不透明なカーソルとして返す。
+次ページは start_after で続きから読むため、読み取り件数は履歴の長さに依存しない。
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any
+
+from google.cloud.firestore import AsyncQuery, DocumentSnapshot
+
+from app.exceptions import ValidationError
+
+
+def encode_cursor(snapshot: DocumentSnapshot) -> str:
+    """ページ末尾のドキュメントからカーソルを生成."""
+    payload = {
+        "created_at": snapshot.get("created_at").isoformat(),
+        "id": snapshot.id,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """カーソルを start_after に渡せる値に戻す."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        return {
+            "created_at": datetime.fromisoformat(payload["created_at"]),
+            "__name__": payload["id"],
+        }
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValidationError("Invalid cursor")
+
+
+async def fetch_page(
+    query: AsyncQuery,
+    limit: int,
+    cursor: str | None = None,
+    offset: int = 0,
+) -> tuple[list[DocumentSnapshot], str | None, bool]:
+    """created_at 降順のクエリから1ページ分を取得.
+
+    limit + 1 件読み、余分な1件の有無で次ページの有無を判定する。
+    offset は旧クライアント向けの互換動作（スキップ分も課金対象になる）。
+
+    Returns:
+        (ページ内のドキュメント, 次ページのカーソル, 次ページがあるか)
+    """
+    query = query.order_by("created_at", direction="DESCENDING").order_by(
+        "__name__", direction="DESCENDING"
+    )
+    if cursor:
+        query = query.start_after(decode_cursor(cursor))
+    elif offset:
+        query = query.offset(offset)
+
+    docs = [doc async for doc in query.limit(limit + 1).stream()]
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(docs[-1]) if has_more else None
+    return docs, next_cursor, has_more
+
+
+async def count_documents(query: AsyncQuery) -> int:
+    """サーバー側の集計クエリで件数を取得（ドキュメント本体は読まない）."""
+    result = await query.count(alias="total").get()
+    return int(result[0][0].value)
+
+
+async def fetch_page_with_total(
+    query: AsyncQuery,
+    limit: int,
+    cursor: str | None = None,
+    offset: int = 0,
+    include_total: bool = True,
+) -> tuple[list[DocumentSnapshot], str | None, bool, int | None]:
+    """fetch_page と件数の集計を並行して実行.
+
+    Returns:
+        (ページ内のドキュメント, 次ページのカーソル, 次ページがあるか, 全件数)
+        include_total が False の場合、全件数は None
+    """
+    if not include_total:
+        return (*await fetch_page(query, limit, cursor, offset), None)
+
+    page, total = await asyncio.gather(
+        fetch_page(query, limit, cursor, offset), count_documents(query)
+    )
+    return (*page, total)
+
+
+async def iter_pages(
+    query: AsyncQuery, page_size: int
+) -> AsyncIterator[list[DocumentSnapshot]]:
+    """並び順を指定済みのクエリを page_size 件ずつ読み進める.
+
+    start_after で続きから読むため、保持するのは常に1ページ分だけ。
+    並び順には一意になるよう __name__ を含めること。
+    """
+    query = query.limit(page_size)
+    last = None
+    while True:
+        page = query if last is None else query.start_after(last)
+        snapshots = [snapshot async for snapshot in page.stream()]
+        if snapshots:
+            yield snapshots
+        if len(snapshots) < page_size:
+            return
+        last = snapshots[-1]
@@ -0,0 +1,118 @@
+"""Rule-based pre-screen for coach replies.
+
+コーチの応答はほとんどが短くおだやかな1〜3文なので、安全性チェックの
+LLM呼び出しの前にルールで判定する。ルールだけで応答を差し替えることはしない。
+
+- escalate: 危険カテゴリに関わる表現を含む（LLMで判定する）
+- pass:     どのカテゴリにも該当しない（そのまま返す）
+
+コーチはユーザーの言葉をそのまま受けとめて返す（「消えたほうがいい」って
+思うくらいつらかったんだね、など）ため、危険な言い回しに一致しても
+引用や問いかけでありうる。最終的な判定は常にLLMに任せる。
+
+カテゴリは safety_filter のプロンプトと同じ「医療診断」「自傷行為の肯定」
+「個人情報の要求」。ルールを変えたら tests/safety_corpus.jsonl で回帰を確認する。
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Literal
+
+Verdict = Literal["pass", "escalate"]
+
+_DATA = (
+    r"(住所|電話番号|本名|フルネーム|メールアドレス|クレジットカード|カード番号"
+    r"|口座番号|暗証番号|パスワード|マイナンバー|生年月日)"
+)
+
+# 大文字化・空白除去した応答に対して照合する
+_ESCALATE: dict[str, list[re.Pattern[str]]] = {
+    "medical_diagnosis": [
+        re.compile(
+            r"(あなた|君|きみ)は.{0,12}(うつ病|鬱病|適応障害|発達障害|ADHD|双極性障害"
+            r"|統合失調症|パニック障害|PTSD|依存症|摂食障害)"
+        ),
+        re.compile(
+            r"(薬|睡眠薬|抗うつ薬|安定剤)(を|は).{0,8}(飲むといい|飲んでみて|増やして"
+            r"|やめていい|やめても大丈夫|やめてみて)"
+        ),
+        re.compile(r"診断|病気|病名|症状|障害|疾患|治療|処方|服薬|薬|うつ|鬱|病院|医師"),
+    ],
+    "self_harm": [
+        re.compile(r"(死んだ|消えた|いなくなった)(方|ほう)が(いい|楽)"),
+        re.compile(r"(傷つけ|切っ)ても(いい|大丈夫|かまわない)"),
+        re.compile(r"(死ぬ|自殺する)(の|こと)(も|は)(いい|悪くない|アリ|ひとつの選択)"),
+        re.compile(
+            r"死|自殺|自傷|傷つけ|リストカット|リスカ|消えたい|飛び降り|首を|オーバードーズ"
+        ),
+    ],
+    "personal_data": [
+        re.compile(_DATA + r"|連絡先|個人情報|アカウント"),
+    ],
+}
+
+# 大文字化する前の応答に対して照合する（"did" や "video" に一致させない）
+_ESCALATE_CASED: dict[str, re.Pattern[str]] = {
+    "personal_data": re.compile(r"(?<![A-Za-z])ID(?![A-Za-z])"),
+}
+
+@dataclass
+class ScreenResult:
+    verdict: Verdict
+    category: str | None = None
+
+
+class SafetyCounters:
+    """プレスクリーンの判定件数とLLMによる判定の結果（/health で公開）.
+
+    blocked / cleared はLLMが unsafe / safe と判定した件数。
+    """
+
+    def __init__(self) -> None:
+        self.counts: Counter[Verdict] = Counter()
+        self.judged: Counter[Literal["blocked", "cleared"]] = Counter()
+
+    def record(self, verdict: Verdict) -> None:
+        self.counts[verdict] += 1
+
+    def record_judgement(self, is_safe: bool) -> None:
+        self.judged["cleared" if is_safe else "blocked"] += 1
+
+    def clear(self) -> None:
+        self.counts.clear()
+        self.judged.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        total = sum(self.counts.values())
+        return {
+            "pass": self.counts["pass"],
+            "escalate": self.counts["escalate"],
+            "blocked": self.judged["blocked"],
+            "cleared": self.judged["cleared"],
+            "pass_rate": self.counts["pass"] / total if total else 0.0,
+        }
+
+
+safety_counters = SafetyCounters()
+
+
+def prescreen(text: str) -> ScreenResult:
+    """応答をルールで判定（判定件数を safety_counters に記録）."""
+    cased = unicodedata.normalize("NFKC", text)
+    # 全角半角・大文字小文字の揺れをそろえ、空白を除く
+    normalized = "".join(cased.upper().split())
+    result = _screen(cased, normalized)
+    safety_counters.record(result.verdict)
+    return result
+
+
+def _screen(cased: str, normalized: str) -> ScreenResult:
+    for category, patterns in _ESCALATE.items():
+        if any(pattern.search(normalized) for pattern in patterns):
+            return ScreenResult("escalate", category)
+    for category, pattern in _ESCALATE_CASED.items():
+        if pattern.search(cased):
+            return ScreenResult("escalate", category)
+    return ScreenResult("pass")
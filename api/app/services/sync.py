@@ -0,0 +1,132 @@
+"""Delta sync - sessions, tasks and messages changed since a watermark.
+
+セッション・タスクは (user_id, updated_at)、メッセージは messages の
+コレクショングループの (user_id, written_at) の複合インデックスで、削除は
+delete_session / delete_task が同じバッチで書く tombstones で取得する。
+メッセージはセッションとは別に取得するため、セッションの updated_at が
+ウォーターマークより後に進んでいても、範囲内のメッセージは取りこぼさない。
+読み取り件数は前回の同期以降の変更件数に比例し、履歴の長さに依存しない。
+
+ウォーターマークは「その時刻以前の変更はすべて返した」時刻。updated_at や
+メッセージの written_at はコミットの直前にアプリ側で決めた時刻なので、直近
+sync_settle_seconds の変更は次回の同期に回す（遅れてコミットされた書き込みを
+取りこぼさないため）。メッセージの created_at はリクエスト開始時刻で、応答生成の
+時間だけコミットより前になるため同期には使わない。
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Literal
+
+from google.cloud.firestore import AsyncClient, AsyncWriteBatch, DocumentSnapshot
+
+from app.config import settings
+from app.services.firestore_client import sessions_ref, tasks_ref, tombstones_ref
+
+TombstoneKind = Literal["session", "task"]
+
+
+def add_tombstone(
+    batch: AsyncWriteBatch,
+    db: AsyncClient,
+    user_id: str,
+    kind: TombstoneKind,
+    resource_id: str,
+    children_pending: bool = False,
+) -> None:
+    """バッチに削除の記録を追加（削除と同時にコミットされる）.
+
+    children_pending: サブコレクションをレスポンス後に削除する場合 True
+    （完了したら delete_session_messages が False にする）
+    """
+    now = datetime.now(UTC)
+    batch.set(
+        tombstones_ref(db).document(f"{kind}_{resource_id}"),
+        {
+            "user_id": user_id,
+            "kind": kind,
+            "resource_id": resource_id,
+            "children_pending": children_pending,
+            "deleted_at": now,
+            # FirestoreのTTLポリシーで自動削除（infra/firestore.tf）
+            "expire_at": now + timedelta(days=settings.tombstone_ttl_days),
+        },
+    )
+
+
+@dataclass
+class Changes:
+    watermark: datetime
+    has_more: bool
+    sessions: list[DocumentSnapshot] = field(default_factory=list)
+    tasks: list[DocumentSnapshot] = field(default_factory=list)
+    tombstones: list[DocumentSnapshot] = field(default_factory=list)
+    # 新しいメッセージ（作成順、session_id フィールドで親セッションを示す）
+    messages: list[DocumentSnapshot] = field(default_factory=list)
+
+
+async def fetch_changes(
+    db: AsyncClient, user_id: str, since: datetime, limit: int
+) -> Changes:
+    """since より後、新しいウォーターマーク以前の変更を取得.
+
+    種類ごとに最大 limit 件。超えた場合は返した範囲までをウォーターマークにし、
+    has_more を立てる（続きは次のウォーターマークで取得する）。
+    """
+    upper = datetime.now(UTC) - timedelta(seconds=settings.sync_settle_seconds)
+    upper = max(upper, since)
+    # (Changes の属性, コレクション, 変更時刻のフィールド)
+    kinds = (
+        ("sessions", sessions_ref(db), "updated_at"),
+        ("tasks", tasks_ref(db), "updated_at"),
+        ("tombstones", tombstones_ref(db), "deleted_at"),
+        ("messages", db.collection_group("messages"), "written_at"),
+    )
+    pages = await asyncio.gather(*(
+        _changed(ref.where("user_id", "==", user_id), time_field, since, upper, limit)
+        for _name, ref, time_field in kinds
+    ))
+
+    watermark = min(page_watermark for _docs, page_watermark in pages)
+    changes = Changes(watermark=watermark, has_more=watermark < upper)
+    for (name, _ref, time_field), (docs, _) in zip(kinds, pages, strict=True):
+        # 他の種類が上限に達した場合は、そのウォーターマークより後の分を次回に回す
+        setattr(changes, name, [d for d in docs if d.get(time_field) <= watermark])
+    # 削除済みセッションに残っているメッセージ（削除の途中）は返さない
+    deleted_sessions = {
+        doc.get("resource_id")
+        for doc in changes.tombstones
+        if doc.get("kind") == "session"
+    }
+    changes.messages = [
+        doc for doc in changes.messages if doc.get("session_id") not in deleted_sessions
+    ]
+    # 同じコミットのメッセージは written_at が同じなので作成順に並べ直す
+    changes.messages.sort(key=lambda d: (d.get("written_at"), d.get("created_at")))
+    return changes
+
+
+async def _changed(
+    query, time_field: str, since: datetime, upper: datetime, limit: int
+) -> tuple[list[DocumentSnapshot], datetime]:
+    """(since, upper] の変更を時刻順に最大 limit 件と、返した範囲の上端."""
+    ranged = (
+        query.where(time_field, ">", since)
+        .where(time_field, "<=", upper)
+        .order_by(time_field)
+    )
+    docs = [doc async for doc in ranged.limit(limit + 1).stream()]
+    if len(docs) <= limit:
+        return docs, upper
+
+    # 上限を超えた場合、続きと同じ時刻のドキュメントは次回にまとめて返す
+    boundary = docs[limit].get(time_field)
+    docs = [doc for doc in docs[:limit] if doc.get(time_field) < boundary]
+    if docs:
+        return docs, docs[-1].get(time_field)
+
+    # 1つの時刻に limit 件を超える変更がある（一括作成など）場合はその時刻の分を
+    # すべて返す（件数は1バッチの書き込み数が上限）
+    docs = [doc async for doc in query.where(time_field, "==", boundary).stream()]
+    return docs, boundary
@@ -0,0 +1,70 @@
+"""Micro-benchmark: per-request Apple token verification cost.
+
+before: リクエストごとにJWKをjson.dumps→RSAAlgorithm.from_jwkで組み立てて検証
+after:  JWKSCache にパース済みの公開鍵を保持して検証
+
+    uv run python -m benchmarks.bench_apple_verify --runs 2000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+import jwt
+from jwt.algorithms import RSAAlgorithm
+
+from app.config import settings
+from app.services import apple_auth
+from app.services.jwks import JWKSCache
+from tests.signing import JWKSServer, SigningKey
+
+
+def _verify_before(token: str, public_keys: dict) -> dict:
+    kid = jwt.get_unverified_header(token)["kid"]
+    public_key = RSAAlgorithm.from_jwk(json.dumps(public_keys[kid]))
+    return jwt.decode(
+        token,
+        public_key,
+        algorithms=["RS256"],
+        audience=settings.apple_bundle_id,
+        issuer=apple_auth.APPLE_ISSUER,
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    key = SigningKey("bench-kid")
+    token = key.sign(
+        iss=apple_auth.APPLE_ISSUER, aud=settings.apple_bundle_id, sub="bench"
+    )
+    raw_keys = {key.kid: key.jwk}
+
+    started = time.perf_counter()
+    for _ in range(args.runs):
+        _verify_before(token, raw_keys)
+    before = (time.perf_counter() - started) / args.runs
+
+    server = JWKSServer(key)
+    cache = JWKSCache(apple_auth.APPLE_KEYS_URL)
+    with (
+        patch("app.services.jwks.get_http_client", side_effect=server.client),
+        patch.object(apple_auth, "apple_keys", cache),
+    ):
+        await apple_auth.verify_apple_token(token)  # キャッシュを温める
+        started = time.perf_counter()
+        for _ in range(args.runs):
+            await apple_auth.verify_apple_token(token)
+        after = (time.perf_counter() - started) / args.runs
+
+    print(f"before  {before * 1e6:8.1f}us/verify")
+    print(f"after   {after * 1e6:8.1f}us/verify")
+    print(f"speedup x{before / after:.2f}  (JWKS fetches: {server.fetches})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
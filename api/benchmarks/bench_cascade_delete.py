@@ -0,0 +1,61 @@
+"""Session delete latency vs message count: one-by-one vs batched cascade.
+
+インメモリのFirestoreスタンドインに1RPCあたりの擬似レイテンシを与え、
+メッセージを1件ずつ delete() する従来の方法と delete_collection
+（ページング + WriteBatch + 並列コミット）を比較する。
+
+    uv run python -m benchmarks.bench_cascade_delete --sizes 100 1000 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.services.cascade_delete import delete_collection
+from tests.fake_firestore import FakeFirestore
+
+
+def _seed(db: FakeFirestore, count: int) -> None:
+    for i in range(count):
+        db.seed(f"sessions/s1/messages/m{i:06d}", {"role": "user", "content": str(i)})
+
+
+async def _one_by_one(db: FakeFirestore) -> None:
+    async for snapshot in db.collection("sessions/s1/messages").stream():
+        await snapshot.reference.delete()
+
+
+async def _batched(db: FakeFirestore) -> None:
+    await delete_collection(db, db.collection("sessions/s1/messages"))
+
+
+async def _time(size: int, rpc_delay: float, delete) -> tuple[float, int]:
+    db = FakeFirestore(rpc_delay=rpc_delay)
+    _seed(db, size)
+    started = time.perf_counter()
+    await delete(db)
+    assert not db.docs
+    return time.perf_counter() - started, db.rpc_count
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--rpc-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    print(
+        f"{'messages':>8} {'one-by-one':>12} {'rpcs':>6} "
+        f"{'batched':>12} {'rpcs':>6} {'speedup':>8}"
+    )
+    for size in args.sizes:
+        serial, serial_rpcs = await _time(size, args.rpc_delay, _one_by_one)
+        batched, batched_rpcs = await _time(size, args.rpc_delay, _batched)
+        print(
+            f"{size:>8} {serial * 1000:>10.0f}ms {serial_rpcs:>6} "
+            f"{batched * 1000:>10.0f}ms {batched_rpcs:>6} {serial / batched:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
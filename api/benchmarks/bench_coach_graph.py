@@ -0,0 +1,72 @@
+"""Latency benchmark: sequential vs parallel coach graph topology.
+
+Vertex AI を呼ばず、1往復ごとに一定の遅延を返すスタブモデルで比較する。
+llm-safety 行は並列構成で安全性チェックのプレスクリーンを無効にした場合
+（毎回LLMで判定する）。
+
+    uv run python -m benchmarks.bench_coach_graph --latency 0.4 --runs 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.config import settings
+from app.services.coach_graph import build_coach_graph
+
+
+class _StubMessages:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        prompt = kwargs["messages"][-1]["content"]
+        text = "Root" if "Cycleモデル" in prompt else "safe"
+        return SimpleNamespace(content=[SimpleNamespace(text=text)], usage=None)
+
+
+async def _measure(
+    cycle_uses_emotion: bool, latency: float, runs: int, prescreen: bool = True
+) -> list[float]:
+    graph = build_coach_graph(cycle_uses_emotion=cycle_uses_emotion)
+    stub = SimpleNamespace(messages=_StubMessages(latency))
+    samples = []
+    with (
+        patch("app.services.coach_graph.get_client", return_value=stub),
+        patch.object(settings, "coach_safety_prescreen", prescreen),
+    ):
+        for _ in range(runs):
+            started = time.perf_counter()
+            await graph.ainvoke({"user_message": "今日は疲れた", "history": []})
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.4, help="1往復の秒数")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    results = {
+        "llm-safety": await _measure(False, args.latency, args.runs, prescreen=False),
+        "sequential": await _measure(True, args.latency, args.runs),
+        "parallel": await _measure(False, args.latency, args.runs),
+    }
+    for name, samples in results.items():
+        print(
+            f"{name:<12} p50={statistics.median(samples) * 1000:7.1f}ms "
+            f"mean={statistics.mean(samples) * 1000:7.1f}ms"
+        )
+    speedup = statistics.median(results["sequential"]) / statistics.median(
+        results["parallel"]
+    )
+    print(f"speedup      x{speedup:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
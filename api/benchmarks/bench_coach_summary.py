@@ -0,0 +1,145 @@
+"""Prompt size and model latency vs session length, with and without summary.
+
+Vertex AI を呼ばず、入力トークン数に比例した遅延を返すスタブモデルで
+同じセッションに /coach を繰り返し送り、各ターンの応答生成に渡した
+プロンプトのトークン数（推定）とモデル呼び出しの時間を記録する。
+summary 列の要約呼び出しは応答の送信後に実行されるため、応答時間には
+含まれない（1ターンあたりの平均トークン数を別に示す）。
+
+    uv run python -m benchmarks.bench_coach_summary --turns 100 --history-limit 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+
+from app.config import settings
+from app.dependencies import get_current_user, get_firestore
+from app.main import app
+from app.services.coach_service import SUMMARY_PROMPT, estimate_tokens
+from tests.fake_firestore import FakeFirestore
+
+USER_ID = "bench-user"
+REPLY = "そう感じたんだね。" * 6
+SUMMARY = "- 仕事で疲れが続いている\n" * 10
+
+
+def _text(content: str | list[dict]) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(block["text"] for block in content)
+
+
+class _PerTokenMessages:
+    """入力トークン数に比例した時間がかかるスタブ."""
+
+    def __init__(self, base: float, per_token: float):
+        self.base = base
+        self.per_token = per_token
+        self.calls: list[tuple[str, int, float]] = []
+
+    async def create(self, **kwargs):
+        system = _text(kwargs.get("system") or "")
+        tokens = estimate_tokens(system) + sum(
+            estimate_tokens(_text(m["content"])) for m in kwargs["messages"]
+        )
+        latency = self.base + self.per_token * tokens
+        started = time.perf_counter()
+        await asyncio.sleep(latency)
+        kind = "summary" if system == SUMMARY_PROMPT else "coach"
+        self.calls.append((kind, tokens, time.perf_counter() - started))
+        text = SUMMARY if kind == "summary" else REPLY
+        return SimpleNamespace(content=[SimpleNamespace(text=text)], usage=None)
+
+
+async def _run_session(
+    turns: int, summary: bool, base: float, per_token: float
+) -> _PerTokenMessages:
+    db = FakeFirestore()
+    messages = _PerTokenMessages(base, per_token)
+    app.dependency_overrides[get_firestore] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: USER_ID
+    try:
+        with (
+            patch.object(settings, "coach_summary_enabled", summary),
+            patch(
+                "app.services.coach_service.get_client",
+                return_value=SimpleNamespace(messages=messages),
+            ),
+        ):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as ac:
+                session_id = None
+                for i in range(turns):
+                    body = {"message": f"今日もいろいろあって疲れた ({i})"}
+                    if session_id:
+                        body["session_id"] = session_id
+                    response = await ac.post("/coach", json=body)
+                    session_id = response.json()["data"]["session_id"]
+    finally:
+        app.dependency_overrides.clear()
+    return messages
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument(
+        "--checkpoints", type=int, nargs="+", default=[5, 10, 25, 50, 100]
+    )
+    parser.add_argument(
+        "--history-limit",
+        type=int,
+        default=settings.coach_history_limit,
+        help="履歴の最大件数（大きくすると件数上限なしの挙動に近づく）",
+    )
+    parser.add_argument("--base", type=float, default=0.05, help="1呼び出しの固定秒数")
+    parser.add_argument("--per-token", type=float, default=0.0002)
+    args = parser.parse_args()
+
+    results = {}
+    with (
+        patch.object(settings, "coach_history_limit", args.history_limit),
+        patch.object(settings, "coach_history_max_tokens", 10**9),
+    ):
+        for name, summary in (("window", False), ("summary", True)):
+            messages = await _run_session(
+                args.turns, summary, args.base, args.per_token
+            )
+            results[name] = messages.calls
+
+    print(
+        f"{'turn':>5} {'window tok':>11} {'latency':>9} "
+        f"{'summary tok':>12} {'latency':>9}"
+    )
+    coach = {
+        name: [(t, s) for kind, t, s in calls if kind == "coach"]
+        for name, calls in results.items()
+    }
+    for turn in args.checkpoints:
+        if turn > args.turns:
+            continue
+        w_tokens, w_sec = coach["window"][turn - 1]
+        s_tokens, s_sec = coach["summary"][turn - 1]
+        print(
+            f"{turn:>5} {w_tokens:>11} {w_sec * 1000:>7.0f}ms "
+            f"{s_tokens:>12} {s_sec * 1000:>7.0f}ms"
+        )
+
+    summary_tokens = [t for kind, t, _ in results["summary"] if kind == "summary"]
+    print(
+        f"summary calls: {len(summary_tokens)} "
+        f"(avg {statistics.mean(summary_tokens or [0]):.0f} tokens, "
+        f"{sum(summary_tokens) / args.turns:.0f} tokens/turn amortized)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
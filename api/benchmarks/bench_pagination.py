@@ -0,0 +1,81 @@
+"""Page latency vs history size: offset vs cursor pagination.
+
+インメモリのFirestoreスタンドインに履歴を投入し、読み取り1件ごとに
+擬似レイテンシを課金して GET /sessions の1ページあたりの時間を測る。
+スタンドイン自体は全件を走査してフィルタするため、その分のCPU時間は
+履歴に比例して増える。実環境のコストは reads 列を見る。
+
+    uv run python -m benchmarks.bench_pagination --sizes 100 1000 5000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import UTC, datetime, timedelta
+
+from app.models.session import SessionListData
+from app.routers.sessions import list_sessions
+from tests.fake_firestore import FakeFirestore
+
+USER_ID = "bench-user"
+
+
+def _seed(db: FakeFirestore, count: int) -> None:
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    for i in range(count):
+        created = base + timedelta(seconds=i)
+        db.seed(
+            f"sessions/s{i:06d}",
+            {
+                "user_id": USER_ID,
+                "title": None,
+                "message_count": 0,
+                "last_message_at": created,
+                "created_at": created,
+                "updated_at": created,
+            },
+        )
+
+
+async def _page(db: FakeFirestore, **params) -> SessionListData:
+    params = {"limit": 20, "cursor": None, "offset": 0} | params
+    return (await list_sessions(user_id=USER_ID, db=db, **params))["data"]
+
+
+async def _time(db: FakeFirestore, runs: int, **params) -> tuple[float, int]:
+    samples = []
+    for _ in range(runs):
+        db.reset_counters()
+        started = time.perf_counter()
+        await _page(db, **params)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), db.reads
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--read-delay", type=float, default=0.0002)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'history':>8} {'offset p50':>12} {'reads':>6} "
+        f"{'cursor p50':>12} {'reads':>6}"
+    )
+    for size in args.sizes:
+        db = FakeFirestore(read_delay=args.read_delay)
+        _seed(db, size)
+        cursor = (await _page(db)).next_cursor
+
+        offset_p50, offset_reads = await _time(db, args.runs, offset=20)
+        cursor_p50, cursor_reads = await _time(db, args.runs, cursor=cursor)
+        print(
+            f"{size:>8} {offset_p50 * 1000:>10.1f}ms {offset_reads:>6} "
+            f"{cursor_p50 * 1000:>10.1f}ms {cursor_reads:>6}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
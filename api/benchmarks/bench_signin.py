@@ -0,0 +1,73 @@
+"""Sign-in latency for new and returning users.
+
+before: get() で存在確認してから set()（旧 _find_or_create_user）
+after:  既知ユーザーはキャッシュで読み取りを省略。それ以外は get() で確認し、
+        なければ create()（同時の初回サインインでも1件だけ作成）
+
+Firestoreスタンドインに1RPCあたりの擬似レイテンシを設定して比較する。
+
+    uv run python -m benchmarks.bench_signin --rpc-delay 0.02
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import UTC, datetime
+
+from app.routers.auth import _find_or_create_user, known_users
+from tests.fake_firestore import FakeFirestore
+
+
+async def _before(db: FakeFirestore, user_id: str) -> None:
+    user_doc = db.collection("users").document(user_id)
+    snapshot = await user_doc.get()
+    if not snapshot.exists:
+        now = datetime.now(UTC)
+        await user_doc.set({"apple_user_id": user_id, "created_at": now})
+
+
+async def _after(db: FakeFirestore, user_id: str) -> None:
+    await _find_or_create_user(
+        db=db,
+        user_id=user_id,
+        email=None,
+        provider_field="apple_user_id",
+        provider_value=user_id,
+    )
+
+
+async def _measure(fn, db: FakeFirestore, user_ids: list[str]) -> tuple[float, float]:
+    db.reset_counters()
+    samples = []
+    for user_id in user_ids:
+        started = time.perf_counter()
+        await fn(db, user_id)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), db.rpc_count / len(user_ids)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rpc-delay", type=float, default=0.02)
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    user_ids = [f"user-{i}" for i in range(args.users)]
+    rows = []
+    for name, fn in (("before", _before), ("after", _after)):
+        known_users.clear()
+        db = FakeFirestore(rpc_delay=args.rpc_delay)
+        rows.append((f"{name} new", *await _measure(fn, db, user_ids)))
+        rows.append((f"{name} returning", *await _measure(fn, db, user_ids)))
+
+    # キャッシュが効かない（別インスタンス・TTL切れ）場合の既存ユーザー
+    known_users.clear()
+    rows.append(("after returning (cold)", *await _measure(_after, db, user_ids)))
+
+    for name, p50, rpcs in rows:
+        print(f"{name:<24} p50={p50 * 1000:6.1f}ms  rpcs/sign-in={rpcs:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""Offline sync cost: per-item POST/PUT vs the :batch endpoints.
+
+インメモリのFirestoreスタンドインに1RPCあたりの擬似レイテンシを与え、
+オフラインで作成・更新したN件のタスクを同期するのにかかる時間と
+HTTPリクエスト数・RPC数を比較する。per-item は1件ずつ順に送る現行の
+iOSクライアントの挙動。
+
+    uv run python -m benchmarks.bench_task_batch --sizes 10 100 500
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.dependencies import get_current_user, get_firestore
+from app.main import app
+from tests.fake_firestore import FakeFirestore
+
+USER_ID = "bench-user"
+
+
+async def _per_item(ac: httpx.AsyncClient, size: int) -> int:
+    task_ids = []
+    for i in range(size):
+        response = await ac.post("/tasks", json={"title": f"task {i}"})
+        task_ids.append(response.json()["data"]["task_id"])
+    for task_id in task_ids:
+        await ac.put(f"/tasks/{task_id}", json={"status": "completed"})
+    return 2 * size
+
+
+async def _batched(ac: httpx.AsyncClient, size: int) -> int:
+    tasks = [{"title": f"task {i}"} for i in range(size)]
+    response = await ac.post("/tasks:batch", json={"tasks": tasks})
+    updates = [
+        {"task_id": r["task_id"], "status": "completed"}
+        for r in response.json()["data"]["results"]
+    ]
+    await ac.patch("/tasks:batch", json={"tasks": updates})
+    return 2
+
+
+async def _time(size: int, rpc_delay: float, sync) -> tuple[float, int, int]:
+    db = FakeFirestore(rpc_delay=rpc_delay)
+    app.dependency_overrides[get_firestore] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: USER_ID
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as ac:
+            started = time.perf_counter()
+            requests = await sync(ac, size)
+            elapsed = time.perf_counter() - started
+    finally:
+        app.dependency_overrides.clear()
+    return elapsed, requests, db.rpc_count
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--rpc-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    print(
+        f"{'tasks':>6} {'per-item':>10} {'reqs':>5} {'rpcs':>5} "
+        f"{'batch':>10} {'reqs':>5} {'rpcs':>5}"
+    )
+    for size in args.sizes:
+        single, single_reqs, single_rpcs = await _time(size, args.rpc_delay, _per_item)
+        batch, batch_reqs, batch_rpcs = await _time(size, args.rpc_delay, _batched)
+        print(
+            f"{size:>6} {single * 1000:>8.0f}ms {single_reqs:>5} {single_rpcs:>5} "
+            f"{batch * 1000:>8.0f}ms {batch_reqs:>5} {batch_rpcs:>5}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
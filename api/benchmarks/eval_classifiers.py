@@ -0,0 +1,161 @@
+"""Offline agreement of local classifiers with logged LLM labels.
+
+LangGraphフローはユーザーメッセージの metadata に分類結果とその出所
+（emotion_source / cycle_source）を保存している。出所が "llm" のものを
+正解ラベルとして書き出し、ローカル分類器との一致率を確信度の閾値ごとに
+比較する。coverage は閾値以上でLLM呼び出しを省略できる割合。
+
+    # Firestoreからラベルを書き出す
+    uv run python -m benchmarks.eval_classifiers export labels.jsonl
+    # ngramモデルを学習して保存（settings.coach_classifier_model_dir に配置）
+    uv run python -m benchmarks.eval_classifiers train labels.jsonl --out models/
+    # 一致率を評価（ngramはモデル未指定なら80/20に分けて学習・評価）
+    uv run python -m benchmarks.eval_classifiers eval labels.jsonl --classifier ngram
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import zlib
+from pathlib import Path
+
+from app.services.classifiers import (
+    LEXICONS,
+    Classifier,
+    LexiconClassifier,
+    NgramClassifier,
+)
+
+LABEL_KEYS = {"emotion": "emotion", "cycle": "cycle_element"}
+THRESHOLDS = (0.0, 0.5, 0.6, 0.7, 0.8, 0.9)
+
+
+async def export(out: Path, limit: int | None) -> None:
+    from app.services.firestore_client import get_db
+
+    query = get_db().collection_group("messages").where(
+        "metadata.emotion_source", "==", "llm"
+    )
+    if limit:
+        query = query.limit(limit)
+
+    count = 0
+    with out.open("w") as f:
+        async for doc in query.stream():
+            meta = doc.get("metadata") or {}
+            row = {
+                "text": doc.get("content"),
+                "emotion": meta.get("detected_emotion"),
+                "cycle_element": (
+                    meta.get("cycle_element")
+                    if meta.get("cycle_source") == "llm"
+                    else None
+                ),
+            }
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    print(f"exported {count} labeled messages to {out}")
+
+
+def _load_rows(path: Path) -> list[dict]:
+    with path.open() as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _examples(rows: list[dict], task: str) -> list[tuple[str, str]]:
+    key = LABEL_KEYS[task]
+    return [(row["text"], row[key]) for row in rows if row.get(key)]
+
+
+def _is_holdout(text: str, ratio: float) -> bool:
+    # 実行ごとに同じ分割になるようテキストのハッシュで振り分ける
+    return zlib.crc32(text.encode()) % 100 < ratio * 100
+
+
+def train(path: Path, out: Path) -> None:
+    rows = _load_rows(path)
+    out.mkdir(parents=True, exist_ok=True)
+    for task in LABEL_KEYS:
+        model = NgramClassifier().fit(_examples(rows, task))
+        model.save(out / f"{task}.json")
+        print(f"{task}: trained on {sum(model.docs.values())} examples")
+
+
+def _classifier(
+    kind: str, task: str, train_set: list[tuple[str, str]], model_dir: Path | None
+) -> Classifier:
+    if kind == "lexicon":
+        return LexiconClassifier(LEXICONS[task])
+    if model_dir is not None:
+        return NgramClassifier.load(model_dir / f"{task}.json")
+    return NgramClassifier().fit(train_set)
+
+
+def evaluate(path: Path, kind: str, model_dir: Path | None, holdout: float) -> None:
+    rows = _load_rows(path)
+    for task in LABEL_KEYS:
+        examples = _examples(rows, task)
+        if kind == "ngram" and model_dir is None:
+            train_set = [e for e in examples if not _is_holdout(e[0], holdout)]
+            examples = [e for e in examples if _is_holdout(e[0], holdout)]
+        else:
+            train_set = []
+        if not examples:
+            print(f"{task}: no labeled examples")
+            continue
+
+        classifier = _classifier(kind, task, train_set, model_dir)
+        started = time.perf_counter()
+        predictions = [(classifier.predict(text), label) for text, label in examples]
+        per_call = (time.perf_counter() - started) / len(examples)
+
+        print(f"\n{task} ({kind}, n={len(examples)}, {per_call * 1e6:.0f}us/call)")
+        print(f"{'threshold':>9} {'coverage':>9} {'agreement':>10}")
+        for threshold in THRESHOLDS:
+            covered = [
+                (p.label, label)
+                for p, label in predictions
+                if p is not None and p.confidence >= threshold
+            ]
+            agree = sum(predicted == label for predicted, label in covered)
+            agreement = agree / len(covered) if covered else 0.0
+            print(
+                f"{threshold:>9.1f} {len(covered) / len(examples):>8.1%} "
+                f"{agreement:>9.1%}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export")
+    export_cmd.add_argument("out", type=Path)
+    export_cmd.add_argument("--limit", type=int)
+
+    train_cmd = commands.add_parser("train")
+    train_cmd.add_argument("labels", type=Path)
+    train_cmd.add_argument("--out", type=Path, required=True)
+
+    eval_cmd = commands.add_parser("eval")
+    eval_cmd.add_argument("labels", type=Path)
+    eval_cmd.add_argument(
+        "--classifier", choices=["lexicon", "ngram"], default="lexicon"
+    )
+    eval_cmd.add_argument("--model-dir", type=Path)
+    eval_cmd.add_argument("--holdout", type=float, default=0.2)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        asyncio.run(export(args.out, args.limit))
+    elif args.command == "train":
+        train(args.labels, args.out)
+    else:
+        evaluate(args.labels, args.classifier, args.model_dir, args.holdout)
+
+
+if __name__ == "__main__":
+    main()
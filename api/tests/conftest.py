@@ -21,6 +21,7 @@ def _make_mock_firestore():
     mock_doc = MagicMock()
     mock_doc.get = AsyncMock(return_value=mock_snapshot)
     mock_doc.set = AsyncMock()
+    mock_doc.create = AsyncMock()
     mock_doc.update = AsyncMock()
     mock_doc.delete = AsyncMock()
 
@@ -47,6 +48,11 @@ def _make_mock_firestore():
     mock_collection.document.return_value = mock_doc
 
     db.collection.return_value = mock_collection
+
+    mock_batch = MagicMock()
+    mock_batch.commit = AsyncMock(return_value=[])
+    db.batch.return_value = mock_batch
+    db._mock_batch = mock_batch
     db._mock_doc = mock_doc
     db._mock_snapshot = mock_snapshot
     db._mock_subcollection = mock_subcollection
@@ -63,10 +69,9 @@ def mock_firestore():
 @pytest.fixture
 def mock_auth():
     """Mock Apple auth to return a fixed user_id."""
-    with patch(
-        "app.middleware.auth_middleware.verify_apple_token",
-        new_callable=AsyncMock,
-    ) as mock:
+    from app.services.auth_providers import APPLE
+
+    with patch.object(APPLE, "verify", new_callable=AsyncMock) as mock:
         mock.return_value = {"sub": "test-user-123", "email": "test@example.com"}
         yield mock
 
@@ -92,3 +97,23 @@ def auth_client(mock_firestore, mock_auth):
     app.dependency_overrides[get_current_user] = lambda: "test-user-123"
     yield TestClient(app)
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def fake_firestore():
+    """In-memory Firestore stand-in (see tests/fake_firestore.py)."""
+    from tests.fake_firestore import FakeFirestore
+
+    return FakeFirestore()
+
+
+@pytest.fixture
+def fake_client(fake_firestore):
+    """FastAPI test client backed by the in-memory Firestore stand-in."""
+    from app.dependencies import get_current_user, get_firestore
+    from app.main import app
+
+    app.dependency_overrides[get_firestore] = lambda: fake_firestore
+    app.dependency_overrides[get_current_user] = lambda: "test-user-123"
+    yield TestClient(app)
+    app.dependency_overrides.clear()
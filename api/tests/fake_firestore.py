@@ -0,0 +1,426 @@
+"""In-memory stand-in for the subset of Firestore AsyncClient used by the API.
+
+MagicMockベースの mock_firestore では検証しにくい、クエリ結果・読み取り件数・
+RPC回数を確認するためのフェイク。ベンチマークからも利用する。
+
+    db = FakeFirestore(read_delay=0.0005)
+    app.dependency_overrides[get_firestore] = lambda: db
+    ...
+    assert db.rpc_count == 3
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import uuid
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from typing import Any
+
+from google.api_core.exceptions import (
+    AlreadyExists,
+    FailedPrecondition,
+    InvalidArgument,
+    NotFound,
+)
+from google.cloud.firestore import DELETE_FIELD, Increment
+
+_OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+}
+
+
+class FakeFirestore:
+    """Firestore AsyncClient のフェイク.
+
+    Args:
+        read_delay: 読み取った1ドキュメントあたりの擬似レイテンシ（秒）
+        rpc_delay: 1RPCあたりの擬似レイテンシ（秒）
+    """
+
+    def __init__(self, read_delay: float = 0.0, rpc_delay: float = 0.0):
+        self.read_delay = read_delay
+        self.rpc_delay = rpc_delay
+        self.docs: dict[str, dict[str, Any]] = {}
+        self.update_times: dict[str, datetime] = {}
+        self.create_times: dict[str, datetime] = {}
+        self.rpcs: Counter[str] = Counter()
+        self.reads = 0
+        self._clock = datetime.now(UTC)
+
+    # --- public API (AsyncClient互換) ---
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def collection_group(self, collection_id: str) -> FakeCollectionGroup:
+        return FakeCollectionGroup(self, collection_id)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    async def get_all(self, references):
+        """複数ドキュメントを1回のRPCで取得（存在しないものは exists=False）."""
+        references = list(references)
+        await self._rpc("batch_get", reads=len(references))
+        for reference in references:
+            yield FakeSnapshot(reference, self.docs.get(reference.path))
+
+    @staticmethod
+    def write_option(**kwargs: Any) -> SimpleNamespace:
+        """last_update_time / exists の前提条件（AsyncClient.write_option 互換）."""
+        return SimpleNamespace(**kwargs)
+
+    # --- helpers for tests ---
+
+    @property
+    def rpc_count(self) -> int:
+        return sum(self.rpcs.values())
+
+    def reset_counters(self) -> None:
+        self.rpcs.clear()
+        self.reads = 0
+
+    def seed(self, path: str, data: dict[str, Any]) -> None:
+        """RPCを数えずにドキュメントを直接投入."""
+        self.docs[path] = copy.deepcopy(data)
+        self.update_times[path] = self._tick()
+        self.create_times.setdefault(path, self.update_times[path])
+
+    def _tick(self) -> datetime:
+        # 書き込みごとに単調増加する update_time
+        self._clock = max(datetime.now(UTC), self._clock + timedelta(microseconds=1))
+        return self._clock
+
+    async def _rpc(self, kind: str, reads: int = 0) -> None:
+        self.rpcs[kind] += 1
+        self.reads += reads
+        delay = self.rpc_delay + self.read_delay * reads
+        # 遅延0でもイベントループに制御を返し、並行実行の競合を再現する
+        await asyncio.sleep(delay)
+
+
+class FakeSnapshot:
+    def __init__(self, reference: FakeDocument, data: dict[str, Any] | None):
+        self.reference = reference
+        self._data = copy.deepcopy(data) if data is not None else None
+        self.update_time = reference._db.update_times.get(reference.path)
+        self.create_time = reference._db.create_times.get(reference.path)
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> dict[str, Any] | None:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field: str) -> Any:
+        if self._data is None:
+            return None
+        return self._data.get(field)
+
+
+class FakeDocument:
+    def __init__(self, db: FakeFirestore, path: str):
+        self._db = db
+        self.path = path
+
+    @property
+    def id(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self._db, f"{self.path}/{name}")
+
+    async def get(self) -> FakeSnapshot:
+        data = self._db.docs.get(self.path)
+        await self._db._rpc("get", reads=1)
+        return FakeSnapshot(self, data)
+
+    async def set(self, data: dict[str, Any], merge: bool = False) -> None:
+        await self._db._rpc("set")
+        _apply_writes(self._db, [("set", self.path, data, merge)])
+
+    async def create(self, data: dict[str, Any]) -> None:
+        await self._db._rpc("create")
+        _apply_writes(self._db, [("create", self.path, data, False)])
+
+    async def update(self, data: dict[str, Any], option: Any = None) -> None:
+        await self._db._rpc("update")
+        _check_preconditions(self._db, [(self.path, option)])
+        _apply_writes(self._db, [("update", self.path, data, False)])
+
+    async def delete(self) -> None:
+        await self._db._rpc("delete")
+        _apply_writes(self._db, [("delete", self.path, None, False)])
+
+
+class FakeWriteBatch:
+    """複数の書き込みを1回のcommit RPCでアトミックに反映する."""
+
+    def __init__(self, db: FakeFirestore):
+        self._db = db
+        self._writes: list[tuple[str, str, dict[str, Any] | None, bool]] = []
+        self._preconditions: list[tuple[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def set(self, ref: FakeDocument, data: dict[str, Any], merge: bool = False):
+        self._writes.append(("set", ref.path, data, merge))
+
+    def create(self, ref: FakeDocument, data: dict[str, Any]):
+        self._writes.append(("create", ref.path, data, False))
+
+    def update(self, ref: FakeDocument, data: dict[str, Any], option: Any = None):
+        self._writes.append(("update", ref.path, data, False))
+        self._preconditions.append((ref.path, option))
+
+    def delete(self, ref: FakeDocument):
+        self._writes.append(("delete", ref.path, None, False))
+
+    async def commit(self) -> list:
+        if len(self._writes) > 500:
+            raise InvalidArgument("maximum 500 writes allowed per request")
+        await self._db._rpc("commit")
+        _check_preconditions(self._db, self._preconditions)
+        _apply_writes(self._db, self._writes)
+        return [
+            SimpleNamespace(update_time=self._db.update_times.get(path))
+            for _, path, _, _ in self._writes
+        ]
+
+
+class FakeQuery:
+    def __init__(self, db: FakeFirestore, path: str):
+        self._db = db
+        self._path = path
+        self._filters: list[tuple[str, str, Any]] = []
+        self._orders: list[tuple[str, str]] = []
+        self._limit: int | None = None
+        self._offset = 0
+        self._start_after: dict[str, Any] | None = None
+
+    def _copy(self) -> FakeQuery:
+        clone = copy.copy(self)
+        clone._filters = list(self._filters)
+        clone._orders = list(self._orders)
+        return clone
+
+    def where(self, field: str, op: str, value: Any) -> FakeQuery:
+        clone = self._copy()
+        clone._filters.append((field, op, value))
+        return clone
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> FakeQuery:
+        clone = self._copy()
+        clone._orders.append((field, direction))
+        return clone
+
+    def select(self, field_paths: list[str]) -> FakeQuery:
+        # 射影は結果に影響させない（読み取り件数の課金も同じ）
+        return self._copy()
+
+    def limit(self, count: int) -> FakeQuery:
+        clone = self._copy()
+        clone._limit = count
+        return clone
+
+    def offset(self, count: int) -> FakeQuery:
+        clone = self._copy()
+        clone._offset = count
+        return clone
+
+    def start_after(self, values: dict[str, Any] | FakeSnapshot) -> FakeQuery:
+        clone = self._copy()
+        if isinstance(values, FakeSnapshot):
+            values = {**(values.to_dict() or {}), "__name__": values.id}
+        clone._start_after = values
+        return clone
+
+    async def stream(self):
+        results, skipped = self._execute()
+        # offset で読み飛ばした分も読み取りとして課金される
+        await self._db._rpc("query", reads=max(len(results) + skipped, 1))
+        for doc_path, data in results:
+            yield FakeSnapshot(FakeDocument(self._db, doc_path), data)
+
+    def count(self, alias: str | None = None) -> FakeAggregationQuery:
+        return FakeAggregationQuery(self, alias or "count")
+
+    def _matching(self) -> list[tuple[str, dict[str, Any]]]:
+        prefix = self._path + "/"
+        depth = self._path.count("/") + 1
+        matched = []
+        for doc_path, data in self._db.docs.items():
+            if not doc_path.startswith(prefix) or doc_path.count("/") != depth:
+                continue
+            if all(_OPS[op](data.get(f), v) for f, op, v in self._filters):
+                matched.append((doc_path, data))
+        return matched
+
+    def _sort_key(self, doc_path: str, data: dict[str, Any]) -> list[Any]:
+        doc_id = doc_path.rsplit("/", 1)[-1]
+        return [doc_id if f == "__name__" else data.get(f) for f, _ in self._orders]
+
+    def _execute(self) -> tuple[list[tuple[str, dict[str, Any]]], int]:
+        results = self._matching()
+        # 安定ソートを後ろのキーから順に適用して複合ソートを実現
+        results.sort(key=lambda item: item[0].rsplit("/", 1)[-1])
+        for index in reversed(range(len(self._orders))):
+            _field, direction = self._orders[index]
+            results.sort(
+                key=lambda item, i=index: _sortable(self._sort_key(*item)[i]),
+                reverse=direction == "DESCENDING",
+            )
+
+        if self._start_after is not None:
+            cursor = [self._start_after.get(f) for f, _ in self._orders]
+            results = [
+                item
+                for item in results
+                if self._is_after(self._sort_key(*item), cursor)
+            ]
+
+        skipped = min(self._offset, len(results))
+        results = results[self._offset :]
+        if self._limit is not None:
+            results = results[: self._limit]
+        return results, skipped
+
+    def _is_after(self, key: list[Any], cursor: list[Any]) -> bool:
+        for (_field, direction), value, bound in zip(
+            self._orders, key, cursor, strict=True
+        ):
+            if bound is None:
+                return True
+            if value == bound:
+                continue
+            if direction == "DESCENDING":
+                return _sortable(value) < _sortable(bound)
+            return _sortable(value) > _sortable(bound)
+        return False
+
+
+class FakeAggregationQuery:
+    def __init__(self, query: FakeQuery, alias: str):
+        self._query = query
+        self._alias = alias
+
+    async def get(self) -> list[list[SimpleNamespace]]:
+        results, _skipped = self._query._execute()
+        # 集計クエリはインデックス1000件ごとに1読み取りとして課金される
+        await self._query._db._rpc("aggregate", reads=len(results) // 1000 + 1)
+        return [[SimpleNamespace(alias=self._alias, value=len(results))]]
+
+
+class FakeCollection(FakeQuery):
+    @property
+    def id(self) -> str:
+        return self._path.rsplit("/", 1)[-1]
+
+    def document(self, doc_id: str | None = None) -> FakeDocument:
+        return FakeDocument(self._db, f"{self._path}/{doc_id or uuid.uuid4().hex}")
+
+
+class FakeCollectionGroup(FakeQuery):
+    """階層に関係なく、IDが collection_id のコレクションすべてを対象にする."""
+
+    def _matching(self) -> list[tuple[str, dict[str, Any]]]:
+        matched = []
+        for doc_path, data in self._db.docs.items():
+            parts = doc_path.split("/")
+            if len(parts) % 2 or parts[-2] != self._path:
+                continue
+            if all(_OPS[op](data.get(f), v) for f, op, v in self._filters):
+                matched.append((doc_path, data))
+        return matched
+
+
+def _sortable(value: Any) -> Any:
+    # None は先頭に並べる（Firestore の null の順序と同じ）
+    if value is None:
+        return (0, "")
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return (1, value)
+
+
+def _check_preconditions(db: FakeFirestore, preconditions: list[tuple[str, Any]]):
+    for path, option in preconditions:
+        expected = getattr(option, "last_update_time", None)
+        if expected is not None and db.update_times.get(path) != expected:
+            raise FailedPrecondition(f"Document was modified: {path}")
+
+
+def _apply_writes(
+    db: FakeFirestore,
+    writes: list[tuple[str, str, dict[str, Any] | None, bool]],
+) -> None:
+    """書き込みをまとめて検証してから反映（途中で失敗したら何も反映しない）."""
+    docs = {path: copy.deepcopy(db.docs.get(path)) for _, path, _, _ in writes}
+    for kind, path, data, merge in writes:
+        current = docs[path]
+        if kind == "delete":
+            docs[path] = None
+        elif kind == "create":
+            if current is not None:
+                raise AlreadyExists(f"Document already exists: {path}")
+            docs[path] = _merge({}, data or {})
+        elif kind == "update":
+            if current is None:
+                raise NotFound(f"No document to update: {path}")
+            for field_path, value in (data or {}).items():
+                _set_path(current, field_path.split("."), value)
+        else:
+            docs[path] = _merge(current if merge and current else {}, data or {})
+
+    for path, data in docs.items():
+        if data is None:
+            db.docs.pop(path, None)
+            db.update_times.pop(path, None)
+            db.create_times.pop(path, None)
+        else:
+            db.docs[path] = data
+            db.update_times[path] = db._tick()
+            # 削除後に作り直したドキュメントは create_time も新しくなる
+            db.create_times.setdefault(path, db.update_times[path])
+
+
+def _merge(target: dict[str, Any], data: dict[str, Any]) -> dict[str, Any]:
+    """set(merge=True) と同じくネストしたマップを再帰的にマージ."""
+    for key, value in data.items():
+        if isinstance(value, dict):
+            existing = target.get(key)
+            target[key] = _merge(existing if isinstance(existing, dict) else {}, value)
+        else:
+            _set_path(target, [key], value)
+    return target
+
+
+def _set_path(target: dict[str, Any], parts: list[str], value: Any) -> None:
+    for part in parts[:-1]:
+        child = target.get(part)
+        if not isinstance(child, dict):
+            child = target[part] = {}
+        target = child
+    key = parts[-1]
+    if value is DELETE_FIELD:
+        target.pop(key, None)
+    elif isinstance(value, Increment):
+        current = target.get(key)
+        target[key] = (current if isinstance(current, int | float) else 0) + value.value
+    else:
+        target[key] = copy.deepcopy(value)
@@ -0,0 +1,51 @@
+"""RSA signing keys and a mock JWKS endpoint for auth tests."""
+
+import json
+import time
+from typing import Any
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+
+class SigningKey:
+    def __init__(self, kid: str):
+        self.kid = kid
+        self.private_key = rsa.generate_private_key(
+            public_exponent=65537, key_size=2048
+        )
+
+    @property
+    def jwk(self) -> dict[str, Any]:
+        jwk = json.loads(RSAAlgorithm.to_jwk(self.private_key.public_key()))
+        return jwk | {"kid": self.kid, "alg": "RS256", "use": "sig"}
+
+    def sign(self, **claims: Any) -> str:
+        now = int(time.time())
+        payload = {"iat": now, "exp": now + 600} | claims
+        return jwt.encode(
+            payload, self.private_key, algorithm="RS256", headers={"kid": self.kid}
+        )
+
+
+class JWKSServer:
+    """httpx.MockTransport で JWKS を返し、取得回数を数える."""
+
+    def __init__(self, *keys: SigningKey, headers: dict[str, str] | None = None):
+        self.keys = list(keys)
+        self.headers = headers or {}
+        self.status_code = 200
+        self.fetches = 0
+
+    def handler(self, _request: httpx.Request) -> httpx.Response:
+        self.fetches += 1
+        return httpx.Response(
+            self.status_code,
+            json={"keys": [key.jwk for key in self.keys]},
+            headers=self.headers,
+        )
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
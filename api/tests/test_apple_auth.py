@@ -0,0 +1,102 @@
+"""Apple identity token verification tests."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import jwt
+import pytest
+
+from app.config import settings
+from app.services import apple_auth
+from app.services.jwks import JWKSCache
+from tests.signing import JWKSServer, SigningKey
+
+ISSUER = "https://appleid.apple.com"
+
+
+@pytest.fixture(scope="module")
+def apple_key():
+    return SigningKey("apple-kid-1")
+
+
+@pytest.fixture
+def jwks(apple_key):
+    server = JWKSServer(apple_key)
+    cache = JWKSCache(apple_auth.APPLE_KEYS_URL, ttl=3600)
+    with (
+        patch("app.services.jwks.get_http_client", side_effect=server.client),
+        patch.object(apple_auth, "apple_keys", cache),
+    ):
+        yield server, cache
+
+
+def _token(key, **claims):
+    return key.sign(
+        **{"iss": ISSUER, "aud": settings.apple_bundle_id, "sub": "apple-1"} | claims
+    )
+
+
+async def test_verify_parses_keys_once(jwks, apple_key):
+    server, _ = jwks
+    for _ in range(5):
+        claims = await apple_auth.verify_apple_token(_token(apple_key))
+        assert claims["sub"] == "apple-1"
+    assert server.fetches == 1
+
+
+async def test_concurrent_cold_requests_fetch_once(jwks, apple_key):
+    server, _ = jwks
+    token = _token(apple_key)
+    await asyncio.gather(*(apple_auth.verify_apple_token(token) for _ in range(10)))
+    assert server.fetches == 1
+
+
+async def test_unknown_kid_forces_rate_limited_refresh(jwks, apple_key):
+    server, cache = jwks
+    await apple_auth.verify_apple_token(_token(apple_key))
+
+    rotated = SigningKey("apple-kid-2")
+    server.keys.append(rotated)
+    cache._attempted_at -= cache.min_refresh_interval
+    claims = await apple_auth.verify_apple_token(_token(rotated))
+    assert claims["sub"] == "apple-1"
+    assert server.fetches == 2
+
+    # 直後の未知kidでは再取得しない
+    with pytest.raises(ValueError, match="Unknown key id"):
+        await apple_auth.verify_apple_token(_token(SigningKey("apple-kid-3")))
+    assert server.fetches == 2
+
+
+async def test_failed_refresh_is_rate_limited(jwks, apple_key):
+    server, cache = jwks
+    await apple_auth.verify_apple_token(_token(apple_key))
+
+    server.status_code = 503
+    cache._attempted_at -= cache.min_refresh_interval
+    unknown = _token(SigningKey("apple-kid-2"))
+    for _ in range(20):
+        with pytest.raises(ValueError, match="Unknown key id"):
+            await apple_auth.verify_apple_token(unknown)
+    assert server.fetches == 2
+
+    # 取得に失敗しても既存の鍵で検証を続ける
+    claims = await apple_auth.verify_apple_token(_token(apple_key))
+    assert claims["sub"] == "apple-1"
+    assert server.fetches == 2
+
+
+async def test_refreshes_in_background_before_expiry(jwks, apple_key):
+    server, cache = jwks
+    await apple_auth.verify_apple_token(_token(apple_key))
+    cache._expires_at = time.monotonic() + cache.refresh_ahead / 2
+
+    await apple_auth.verify_apple_token(_token(apple_key))
+    await cache._background
+    assert server.fetches == 2
+
+
+async def test_wrong_audience_rejected(jwks, apple_key):
+    with pytest.raises(jwt.InvalidAudienceError):
+        await apple_auth.verify_apple_token(_token(apple_key, aud="other.app"))
@@ -1,7 +1,14 @@
 """Auth endpoint tests."""
 
+import asyncio
+from datetime import UTC, datetime
 from unittest.mock import AsyncMock, patch
 
+import jwt
+import pytest
+
+from app.routers.auth import _find_or_create_user, known_users
+
 
 def test_verify_missing_token(client):
     response = client.post("/auth/verify", json={"identity_token": ""})
@@ -28,3 +35,105 @@ def test_verify_valid_token(client, mock_firestore):
     data = response.json()["data"]
     assert data["user_id"] == "apple-user-001"
     assert data["is_new_user"] is True
+
+
+def test_google_expired_token(client):
+    with patch(
+        "app.routers.auth.verify_google_token",
+        new_callable=AsyncMock,
+        side_effect=jwt.ExpiredSignatureError("Signature has expired"),
+    ):
+        response = client.post("/auth/google", json={"id_token": "expired.jwt"})
+
+    assert response.status_code == 401
+    assert response.json()["error"]["code"] == "TokenExpired"
+
+
+@pytest.fixture(autouse=True)
+def _clear_known_users():
+    known_users.clear()
+    yield
+    known_users.clear()
+
+
+async def _sign_in(db, user_id="apple-user-001"):
+    return await _find_or_create_user(
+        db=db,
+        user_id=user_id,
+        email=None,
+        provider_field="apple_user_id",
+        provider_value=user_id,
+    )
+
+
+async def test_concurrent_first_sign_ins_create_one_user(fake_firestore):
+    results = await asyncio.gather(*(_sign_in(fake_firestore) for _ in range(5)))
+
+    assert [is_new for _, is_new, _ in results].count(True) == 1
+    assert len({created_at for _, _, created_at in results}) == 1
+    assert fake_firestore.rpcs["create"] == 5
+
+
+async def test_returning_user_keeps_created_at(fake_firestore):
+    _, _, created_at = await _sign_in(fake_firestore)
+
+    _, is_new, returned_created_at = await _sign_in(fake_firestore)
+
+    assert is_new is False
+    assert returned_created_at == created_at
+
+
+async def test_returning_user_skips_firestore(fake_firestore):
+    await _sign_in(fake_firestore)
+
+    fake_firestore.reset_counters()
+    await _sign_in(fake_firestore)
+
+    assert fake_firestore.rpc_count == 0
+
+
+async def test_cold_cache_returning_user_costs_one_read(fake_firestore):
+    created_at = datetime(2025, 4, 1, tzinfo=UTC)
+    fake_firestore.seed("users/apple-user-001", {"created_at": created_at})
+
+    _, is_new, returned_created_at = await _sign_in(fake_firestore)
+
+    assert is_new is False
+    assert returned_created_at == created_at
+    assert fake_firestore.rpcs == {"get": 1}
+
+
+def _sign_in_with_apple(client):
+    with patch(
+        "app.routers.auth.verify_apple_token",
+        new_callable=AsyncMock,
+        return_value={"sub": "test-user-123", "email": None},
+    ):
+        return client.post("/auth/verify", json={"identity_token": "t"})
+
+
+def test_sign_in_after_account_deletion_recreates_user(fake_client):
+    assert _sign_in_with_apple(fake_client).json()["data"]["is_new_user"] is True
+    assert fake_client.delete("/users/me").status_code == 202
+
+    response = _sign_in_with_apple(fake_client)
+
+    assert response.json()["data"]["is_new_user"] is True
+    assert fake_client.get("/users/me").status_code == 200
+
+
+def test_sign_in_after_deletion_on_another_instance(fake_client, fake_firestore):
+    """削除を実行していないインスタンスのキャッシュが残っていても使えるようにする."""
+    _sign_in_with_apple(fake_client)
+    created_at = known_users.get("test-user-123")
+    fake_client.delete("/users/me")
+    known_users.put("test-user-123", created_at)
+
+    response = _sign_in_with_apple(fake_client)
+
+    assert response.json()["data"]["is_new_user"] is False
+    me = fake_client.get("/users/me")
+    assert me.status_code == 200
+    assert me.json()["data"]["apple_user_id"] == "test-user-123"
+    assert fake_client.get("/users/me/export").status_code == 200
+    assert "users/test-user-123" in fake_firestore.docs
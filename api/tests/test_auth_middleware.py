@@ -0,0 +1,143 @@
+"""Bearer token middleware tests."""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import jwt
+import pytest
+
+from app.exceptions import InvalidTokenError, TokenExpiredError
+from app.middleware.auth_middleware import _token_key, get_current_user_id, token_cache
+from app.services import auth_providers
+from app.services.auth_providers import APPLE, GOOGLE, AuthProvider, register_provider
+from app.services.cache import TTLCache
+from tests.signing import SigningKey
+
+
+@pytest.fixture(autouse=True)
+def _clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture(scope="module")
+def key():
+    return SigningKey("kid-1")
+
+
+def _request(token: str):
+    return SimpleNamespace(headers={"Authorization": f"Bearer {token}"})
+
+
+@pytest.fixture
+def verifiers():
+    with (
+        patch.object(APPLE, "verify", new_callable=AsyncMock) as apple,
+        patch.object(GOOGLE, "verify", new_callable=AsyncMock) as google,
+    ):
+        apple.return_value = {"sub": "apple-1"}
+        google.return_value = {"sub": "g-1"}
+        yield apple, google
+
+
+async def test_google_token_skips_apple_verification(verifiers, key):
+    apple, google = verifiers
+    token = key.sign(iss="https://accounts.google.com", sub="g-1")
+
+    assert await get_current_user_id(_request(token)) == "google_g-1"
+    apple.assert_not_called()
+    google.assert_awaited_once_with(token)
+
+
+async def test_apple_token_routes_to_apple(verifiers, key):
+    apple, google = verifiers
+    token = key.sign(iss="https://appleid.apple.com", sub="apple-1")
+
+    assert await get_current_user_id(_request(token)) == "apple-1"
+    google.assert_not_called()
+
+
+async def test_unknown_issuer_rejected_without_verification(verifiers, key):
+    apple, google = verifiers
+    with pytest.raises(InvalidTokenError):
+        await get_current_user_id(_request(key.sign(iss="https://evil.example")))
+    apple.assert_not_called()
+    google.assert_not_called()
+
+
+async def test_malformed_token_rejected(verifiers):
+    with pytest.raises(InvalidTokenError):
+        await get_current_user_id(_request("not-a-jwt"))
+
+
+async def test_expired_token_maps_to_token_expired(verifiers, key):
+    apple, _ = verifiers
+    apple.side_effect = jwt.ExpiredSignatureError("expired")
+    with pytest.raises(TokenExpiredError):
+        await get_current_user_id(
+            _request(key.sign(iss="https://appleid.apple.com"))
+        )
+
+
+async def test_registered_provider_is_dispatched(key):
+    provider = AuthProvider(
+        name="example",
+        issuers=("https://id.example.com",),
+        verify=AsyncMock(return_value={"sub": "ex-1"}),
+        user_id_prefix="example_",
+    )
+    token = key.sign(iss="https://id.example.com")
+
+    with patch.dict(auth_providers._providers):
+        register_provider(provider)
+        assert await get_current_user_id(_request(token)) == "example_ex-1"
+
+
+async def test_repeated_token_skips_verification(verifiers, key):
+    apple, _ = verifiers
+    token = key.sign(iss="https://appleid.apple.com", sub="apple-1")
+    apple.return_value = {"sub": "apple-1", "exp": time.time() + 600}
+
+    for _ in range(5):
+        assert await get_current_user_id(_request(token)) == "apple-1"
+
+    apple.assert_awaited_once()
+    assert token_cache.stats()["hits"] == 4
+    assert token_cache.stats()["hit_rate"] == pytest.approx(0.8)
+
+
+async def test_expired_cache_entry_is_reverified(verifiers, key):
+    apple, _ = verifiers
+    token = key.sign(iss="https://appleid.apple.com", sub="apple-1")
+    token_cache._entries[_token_key(token)] = ("apple-1", time.monotonic() - 1)
+    apple.side_effect = jwt.ExpiredSignatureError("expired")
+
+    with pytest.raises(TokenExpiredError):
+        await get_current_user_id(_request(token))
+    apple.assert_awaited_once()
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=600)
+    cache.put("a", "user-a")
+    cache.put("b", "user-b")
+    cache.get("a")
+    cache.put("c", "user-c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "user-a"
+    assert cache.get("c") == "user-c"
+
+
+def test_token_cache_disabled_with_zero_size():
+    cache = TTLCache(maxsize=0, ttl=600)
+    cache.put("a", "user-a")
+    assert cache.get("a") is None
+
+
+def test_token_cache_skips_expired_token():
+    cache = TTLCache(maxsize=2)
+    cache.put("a", "user-a", ttl=-1)
+    assert cache.get("a") is None
@@ -0,0 +1,55 @@
+"""Cascading delete tests."""
+
+import asyncio
+
+from app.services.cascade_delete import delete_collection
+
+
+def _seed_messages(db, session_id: str, count: int) -> None:
+    for i in range(count):
+        db.seed(f"sessions/{session_id}/messages/m{i:05d}", {"content": str(i)})
+
+
+async def test_delete_collection_pages_and_batches(fake_firestore):
+    _seed_messages(fake_firestore, "s1", 1200)
+    _seed_messages(fake_firestore, "s2", 3)
+
+    collection = fake_firestore.collection("sessions/s1/messages")
+    deleted = await delete_collection(fake_firestore, collection, batch_size=500)
+
+    assert deleted == 1200
+    assert not any(p.startswith("sessions/s1/messages/") for p in fake_firestore.docs)
+    # 他のセッションには触れない
+    assert sum(p.startswith("sessions/s2/") for p in fake_firestore.docs) == 3
+    # 500件ずつ3ページ（最後のページが短いので追加の読み取りはない）
+    assert fake_firestore.rpcs == {"query": 3, "commit": 3}
+
+
+async def test_delete_collection_bounds_concurrent_commits(fake_firestore):
+    _seed_messages(fake_firestore, "s1", 100)
+    in_flight = peak = 0
+    original = fake_firestore._rpc
+
+    async def tracking_rpc(kind: str, reads: int = 0) -> None:
+        nonlocal in_flight, peak
+        if kind != "commit":
+            return await original(kind, reads)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        await original(kind, reads)
+        in_flight -= 1
+
+    fake_firestore._rpc = tracking_rpc
+    collection = fake_firestore.collection("sessions/s1/messages")
+    await delete_collection(fake_firestore, collection, batch_size=10, concurrency=3)
+
+    assert peak == 3
+    assert not any(p.startswith("sessions/s1/messages/") for p in fake_firestore.docs)
+
+
+async def test_delete_collection_empty(fake_firestore):
+    collection = fake_firestore.collection("sessions/none/messages")
+
+    assert await delete_collection(fake_firestore, collection) == 0
+    assert fake_firestore.rpcs == {"query": 1}
@@ -0,0 +1,127 @@
+"""Local classifier tests."""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.services import classifiers
+from app.services.classifiers import (
+    LexiconClassifier,
+    NgramClassifier,
+    classify_locally,
+)
+from app.services.coach_graph import CoachState, analyze_emotion, determine_cycle
+
+EXAMPLES = [
+    ("今日は仕事で疲れた", "疲れ"),
+    ("もうしんどい、眠い", "疲れ"),
+    ("ずっと残業でくたくた", "疲れ"),
+    ("試験に合格して嬉しい", "喜び"),
+    ("友達と遊べて楽しかった", "喜び"),
+    ("最高の一日だった", "喜び"),
+    ("明日の発表が不安", "不安"),
+    ("将来のことが心配で眠れない", "不安"),
+]
+
+
+def test_lexicon_picks_label_with_most_hits():
+    classifier = LexiconClassifier(classifiers.EMOTION_LEXICON)
+
+    prediction = classifier.predict("今日はほんとに疲れた。しんどい")
+
+    assert prediction.label == "疲れ"
+    assert prediction.confidence == 2 / 3
+    assert classifier.predict("こんにちは") is None
+
+
+def test_lexicon_single_hit_is_not_confident():
+    classifier = LexiconClassifier(classifiers.EMOTION_LEXICON)
+
+    prediction = classifier.predict("今日は疲れた")
+
+    assert prediction.label == "疲れ"
+    assert prediction.confidence == 0.5
+
+
+def test_lexicon_confidence_drops_on_mixed_signals():
+    classifier = LexiconClassifier(classifiers.EMOTION_LEXICON)
+
+    prediction = classifier.predict("楽しみだけど不安")
+
+    assert prediction.confidence == 0.0
+
+
+def test_lexicon_skips_negated_keywords():
+    classifier = LexiconClassifier(classifiers.EMOTION_LEXICON)
+
+    assert classifier.predict("正直、大丈夫じゃない") is None
+    assert classifier.predict("心配しないで、安心して") is None
+
+
+def test_ngram_learns_from_labels_and_round_trips(tmp_path):
+    model = NgramClassifier().fit(EXAMPLES)
+
+    assert model.predict("仕事が続いて疲れたなあ").label == "疲れ"
+    assert model.predict("合格できて嬉しい").label == "喜び"
+
+    path = tmp_path / "emotion.json"
+    model.save(path)
+    loaded = NgramClassifier.load(path)
+    assert loaded.predict("発表が不安") == model.predict("発表が不安")
+
+
+def test_classify_locally_respects_setting_and_threshold():
+    with patch.object(classifiers.settings, "coach_classifier", "llm"):
+        assert classify_locally("emotion", "疲れた") is None
+
+    with patch.object(classifiers.settings, "coach_classifier", "lexicon"):
+        assert classify_locally("emotion", "疲れた、しんどい").label == "疲れ"
+        # 1語だけのヒット（確信度0.5）は閾値0.6未満なのでLLMにフォールバック
+        assert classify_locally("emotion", "疲れた") is None
+        assert classify_locally("emotion", "楽しみだけど不安") is None
+        assert classify_locally("emotion", "大丈夫じゃない") is None
+
+
+class _CountingMessages:
+    def __init__(self, text: str):
+        self.text = text
+        self.calls = 0
+
+    async def create(self, **_kwargs):
+        self.calls += 1
+        return SimpleNamespace(content=[SimpleNamespace(text=self.text)], usage=None)
+
+
+async def test_graph_nodes_skip_llm_when_local_classifier_is_confident():
+    messages = _CountingMessages("Root")
+    state = CoachState(user_message="毎日続けてきた習慣で疲れた、しんどい")
+
+    with (
+        patch.object(classifiers.settings, "coach_classifier", "lexicon"),
+        patch(
+            "app.services.coach_graph.get_client",
+            return_value=SimpleNamespace(messages=messages),
+        ),
+    ):
+        emotion = await analyze_emotion(state)
+        cycle = await determine_cycle(state)
+
+    assert emotion == {"detected_emotion": "疲れ", "emotion_source": "lexicon"}
+    assert cycle == {"cycle_element": "Water", "cycle_source": "lexicon"}
+    assert messages.calls == 0
+
+
+async def test_graph_nodes_fall_back_to_llm_without_local_signal():
+    messages = _CountingMessages("安心")
+    state = CoachState(user_message="こんにちは")
+
+    with (
+        patch.object(classifiers.settings, "coach_classifier", "lexicon"),
+        patch(
+            "app.services.coach_graph.get_client",
+            return_value=SimpleNamespace(messages=messages),
+        ),
+    ):
+        emotion = await analyze_emotion(state)
+
+    assert emotion == {"detected_emotion": "安心", "emotion_source": "llm"}
+    assert messages.calls == 1
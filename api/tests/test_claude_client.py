@@ -0,0 +1,33 @@
+"""Shared Vertex AI Claude client tests."""
+
+from unittest.mock import patch
+
+from app.services import claude_client
+
+
+async def test_get_client_is_shared():
+    try:
+        assert claude_client.get_client() is claude_client.get_client()
+    finally:
+        await claude_client.close()
+
+
+async def test_close_discards_client():
+    first = claude_client.get_client()
+    await claude_client.close()
+    try:
+        assert claude_client.get_client() is not first
+    finally:
+        await claude_client.close()
+
+
+async def test_warmup_tolerates_missing_credentials():
+    """ADCが解決できなくても起動は止めない."""
+    with patch(
+        "app.services.claude_client.load_auth",
+        side_effect=RuntimeError("no ADC"),
+    ):
+        await claude_client.warmup()
+        assert claude_client._refresh_task is not None
+        await claude_client.close()
+    assert claude_client._refresh_task is None
@@ -1,7 +1,24 @@
 """Coach endpoint tests."""
 
+import asyncio
+import json
+import time
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
+from fastapi import BackgroundTasks
+
+from app.services.coach_service import CoachReply
+
+USAGE = SimpleNamespace(
+    input_tokens=1200,
+    output_tokens=40,
+    cache_creation_input_tokens=0,
+    cache_read_input_tokens=1100,
+)
+
 
 def test_coach_requires_auth(client):
     response = client.post("/coach", json={"message": "hello"})
@@ -14,19 +31,7 @@ def test_coach_chat(auth_client, mock_firestore):
         "app.routers.coach.coach_service.chat",
         new_callable=AsyncMock,
     ) as mock_chat:
-        mock_chat.return_value = "そう感じたんだね。"
-
-        # Configure mock: after set, session should report message_count
-        mock_doc = mock_firestore._mock_doc
-        snapshot_after_set = MagicMock()
-        snapshot_after_set.exists = True
-        snapshot_after_set.to_dict.return_value = {"message_count": 0}
-        snapshot_after_set.get.return_value = "test-user-123"
-
-        # First get: not exists. Second get: exists (after set).
-        mock_doc.get = AsyncMock(
-            side_effect=[mock_firestore._mock_snapshot, snapshot_after_set]
-        )
+        mock_chat.return_value = CoachReply("そう感じたんだね。")
 
         response = auth_client.post(
             "/coach",
@@ -37,3 +42,451 @@ def test_coach_chat(auth_client, mock_firestore):
     data = response.json()["data"]
     assert data["message"] == "そう感じたんだね。"
     assert "session_id" in data
+    # 新規セッションは読み取りなし・1回のコミットで保存される
+    mock_firestore._mock_doc.get.assert_not_awaited()
+    mock_firestore._mock_batch.commit.assert_awaited_once()
+
+
+async def _post_coach(db, json: dict) -> httpx.Response:
+    from app.dependencies import get_current_user, get_firestore
+    from app.main import app
+
+    app.dependency_overrides[get_firestore] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: "test-user-123"
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            return await ac.post("/coach", json=json)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _seed_coach_session(db, session_id: str, user_id: str = "test-user-123"):
+    now = datetime.now(UTC)
+    db.seed(f"sessions/{session_id}", {
+        "user_id": user_id,
+        "title": None,
+        "cycle_element": None,
+        "has_diary_context": False,
+        "message_count": 2,
+        "last_message_at": now,
+        "created_at": now,
+        "updated_at": now,
+    })
+    for i, role in enumerate(["user", "assistant"]):
+        db.seed(f"sessions/{session_id}/messages/m{i}", {
+            "role": role,
+            "content": f"{role} {i}",
+            "metadata": None,
+            "created_at": now + timedelta(seconds=i),
+        })
+
+
+async def test_coach_existing_session_rpcs(fake_firestore):
+    """既存セッション: セッション取得と履歴読み込み + コミット1回."""
+    _seed_coach_session(fake_firestore, "s1")
+
+    with patch(
+        "app.routers.coach.coach_service.chat",
+        new_callable=AsyncMock,
+        return_value=CoachReply("うんうん"),
+    ) as mock_chat:
+        response = await _post_coach(
+            fake_firestore, {"message": "続き", "session_id": "s1"}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["data"]["session_id"] == "s1"
+    assert mock_chat.call_args.kwargs["history"] == [
+        {"role": "user", "content": "user 0"},
+        {"role": "assistant", "content": "assistant 1"},
+    ]
+    assert fake_firestore.rpcs == {"get": 1, "query": 1, "commit": 1}
+
+    session = fake_firestore.docs["sessions/s1"]
+    assert session["message_count"] == 4
+    messages = [p for p in fake_firestore.docs if p.startswith("sessions/s1/messages/")]
+    assert len(messages) == 4
+
+
+async def test_coach_overlapping_turns_keep_exact_message_count(fake_firestore):
+    """同じセッションへの /coach が重なっても message_count を失わない."""
+    from app.dependencies import get_current_user, get_firestore
+    from app.main import app
+
+    _seed_coach_session(fake_firestore, "s1")
+    n = 10
+
+    app.dependency_overrides[get_firestore] = lambda: fake_firestore
+    app.dependency_overrides[get_current_user] = lambda: "test-user-123"
+    try:
+        with patch(
+            "app.services.coach_service.get_client",
+            return_value=_slow_client(0.05, "うんうん"),
+        ):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as ac:
+                responses = await asyncio.gather(*(
+                    ac.post("/coach", json={"message": f"msg {i}", "session_id": "s1"})
+                    for i in range(n)
+                ))
+    finally:
+        app.dependency_overrides.clear()
+
+    assert all(r.status_code == 200 for r in responses)
+    messages = [p for p in fake_firestore.docs if p.startswith("sessions/s1/messages/")]
+    assert len(messages) == 2 + 2 * n
+    assert fake_firestore.docs["sessions/s1"]["message_count"] == 2 + 2 * n
+
+
+async def test_coach_history_uses_latest_messages(fake_firestore):
+    """長いセッションでは古い先頭ではなく直近のメッセージを渡す."""
+    _seed_coach_session(fake_firestore, "s1")
+    start = datetime.now(UTC)
+    for i in range(60):
+        fake_firestore.seed(f"sessions/s1/messages/n{i:02d}", {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i}",
+            "metadata": None,
+            "created_at": start + timedelta(minutes=i + 1),
+        })
+
+    with (
+        patch("app.routers.coach.settings.coach_history_limit", 10),
+        patch(
+            "app.routers.coach.coach_service.chat",
+            new_callable=AsyncMock,
+            return_value=CoachReply("うんうん"),
+        ) as mock_chat,
+    ):
+        await _post_coach(fake_firestore, {"message": "続き", "session_id": "s1"})
+
+    history = mock_chat.call_args.kwargs["history"]
+    assert [m["content"] for m in history] == [f"message {i}" for i in range(50, 60)]
+    # 読み取りは直近N件だけ（+ セッション1件）
+    assert fake_firestore.reads == 11
+
+
+def _seed_long_session(db, session_id: str, count: int) -> datetime:
+    _seed_coach_session(db, session_id)
+    start = datetime.now(UTC)
+    for i in range(count):
+        db.seed(f"sessions/{session_id}/messages/n{i:02d}", {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i}",
+            "metadata": None,
+            "created_at": start + timedelta(minutes=i + 1),
+        })
+    return start
+
+
+async def test_coach_sends_summary_and_only_unsummarized_turns(fake_firestore):
+    start = _seed_long_session(fake_firestore, "s1", 10)
+    fake_firestore.docs["sessions/s1"].update(
+        summary="仕事で疲れている",
+        summary_until=start + timedelta(minutes=6),
+    )
+
+    with patch(
+        "app.routers.coach.coach_service.chat",
+        new_callable=AsyncMock,
+        return_value=CoachReply("うんうん"),
+    ) as mock_chat:
+        await _post_coach(fake_firestore, {"message": "続き", "session_id": "s1"})
+
+    kwargs = mock_chat.call_args.kwargs
+    assert kwargs["summary"] == "仕事で疲れている"
+    # message 0〜5 は要約済み
+    assert [m["content"] for m in kwargs["history"]] == [
+        f"message {i}" for i in range(6, 10)
+    ]
+
+
+async def test_coach_folds_old_turns_into_summary_after_reply(fake_firestore):
+    _seed_long_session(fake_firestore, "s1", 10)
+
+    with (
+        patch(
+            "app.routers.coach.coach_service.chat",
+            new_callable=AsyncMock,
+            return_value=CoachReply("うんうん"),
+        ),
+        patch(
+            "app.routers.coach.coach_service.summarize",
+            new_callable=AsyncMock,
+            return_value="要約",
+        ) as mock_summarize,
+    ):
+        await _post_coach(fake_firestore, {"message": "続き", "session_id": "s1"})
+
+    # 既存2件 + 10件 + 今回の2件 = 14件のうち、直近6件を残して要約する
+    previous, folded = mock_summarize.call_args.args
+    assert previous is None
+    assert len(folded) == 8
+    assert folded[-1]["content"] == "message 5"
+
+    session = fake_firestore.docs["sessions/s1"]
+    assert session["summary"] == "要約"
+    assert session["summary_until"] == folded[-1]["created_at"]
+
+
+async def test_coach_skips_summary_for_short_sessions(fake_firestore):
+    _seed_coach_session(fake_firestore, "s1")
+
+    with (
+        patch(
+            "app.routers.coach.coach_service.chat",
+            new_callable=AsyncMock,
+            return_value=CoachReply("うんうん"),
+        ),
+        patch(
+            "app.routers.coach.coach_service.summarize", new_callable=AsyncMock
+        ) as mock_summarize,
+    ):
+        await _post_coach(fake_firestore, {"message": "続き", "session_id": "s1"})
+
+    mock_summarize.assert_not_awaited()
+
+
+async def test_coach_records_cache_usage_in_metadata(fake_firestore):
+    with patch(
+        "app.services.coach_service.get_client",
+        return_value=_slow_client(0, "うんうん"),
+    ):
+        await _post_coach(fake_firestore, {"message": "はじめまして"})
+
+    assistant = next(
+        doc for path, doc in fake_firestore.docs.items()
+        if "/messages/" in path and doc["role"] == "assistant"
+    )
+    assert assistant["metadata"]["usage"] == {
+        "input_tokens": 1200,
+        "output_tokens": 40,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 1100,
+    }
+
+
+async def test_coach_new_session_single_commit(fake_firestore):
+    """新規セッション: 作成・メッセージ・カウンタを1回のコミットで保存."""
+    with patch(
+        "app.routers.coach.coach_service.chat",
+        new_callable=AsyncMock,
+        return_value=CoachReply("うんうん"),
+    ):
+        response = await _post_coach(fake_firestore, {"message": "はじめまして"})
+
+    session_id = response.json()["data"]["session_id"]
+    assert fake_firestore.rpcs == {"commit": 1}
+    assert fake_firestore.docs[f"sessions/{session_id}"]["message_count"] == 2
+    stats = fake_firestore.docs["users/test-user-123/stats/summary"]
+    assert stats["session_count"] == 1
+
+
+async def test_coach_other_users_session_starts_new(fake_firestore):
+    _seed_coach_session(fake_firestore, "s1", user_id="someone-else")
+
+    with patch(
+        "app.routers.coach.coach_service.chat",
+        new_callable=AsyncMock,
+        return_value=CoachReply("うんうん"),
+    ) as mock_chat:
+        response = await _post_coach(
+            fake_firestore, {"message": "hi", "session_id": "s1"}
+        )
+
+    assert response.json()["data"]["session_id"] != "s1"
+    assert mock_chat.call_args.kwargs["history"] == []
+    assert fake_firestore.docs["sessions/s1"]["message_count"] == 2
+
+
+class _SlowMessages:
+    """messages.create が一定時間かかる非同期スタブ."""
+
+    def __init__(self, delay: float, text: str):
+        self.delay = delay
+        self.text = text
+
+    async def create(self, **_kwargs):
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(content=[SimpleNamespace(text=self.text)], usage=USAGE)
+
+
+def _slow_client(delay: float, text: str = "safe"):
+    return SimpleNamespace(messages=_SlowMessages(delay, text))
+
+
+async def _post_concurrently(mock_firestore, n: int):
+    from app.dependencies import get_current_user, get_firestore
+    from app.main import app
+
+    app.dependency_overrides[get_firestore] = lambda: mock_firestore
+    app.dependency_overrides[get_current_user] = lambda: "test-user-123"
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            started = time.perf_counter()
+            responses = await asyncio.gather(
+                *(ac.post("/coach", json={"message": f"msg {i}"}) for i in range(n))
+            )
+            elapsed = time.perf_counter() - started
+    finally:
+        app.dependency_overrides.clear()
+    return responses, elapsed
+
+
+async def test_coach_requests_do_not_serialize(mock_firestore):
+    """重なった /coach 呼び出しがモデル待ちで直列化しない."""
+    delay, n = 0.2, 5
+    with patch(
+        "app.services.coach_service.get_client",
+        return_value=_slow_client(delay, "そう感じたんだね。"),
+    ):
+        responses, elapsed = await _post_concurrently(mock_firestore, n)
+
+    assert all(r.status_code == 200 for r in responses)
+    # 直列なら n * delay 秒かかる
+    assert elapsed < delay * n / 2
+
+
+async def test_coach_langgraph_requests_do_not_serialize(mock_firestore):
+    """LangGraphフローでも重なった呼び出しが並行に進む."""
+    delay, n = 0.1, 5
+    with (
+        patch("app.routers.coach.settings.use_langgraph", True),
+        patch(
+            "app.services.coach_graph.get_client",
+            return_value=_slow_client(delay),
+        ),
+    ):
+        responses, elapsed = await _post_concurrently(mock_firestore, n)
+
+    assert all(r.status_code == 200 for r in responses)
+    # 1リクエストあたり4ノード分のモデル呼び出し
+    assert elapsed < delay * 4 * n / 2
+
+
+class _StubStream:
+    """messages.stream() が返す非同期コンテキストマネージャのスタブ."""
+
+    def __init__(self, tokens: list[str]):
+        self.tokens = tokens
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        self.closed = True
+
+    @property
+    async def text_stream(self):
+        for token in self.tokens:
+            yield token
+
+    async def get_final_message(self):
+        return SimpleNamespace(usage=USAGE)
+
+
+class _StreamingMessages(_SlowMessages):
+    def __init__(self, tokens: list[str], text: str = "safe"):
+        super().__init__(0, text)
+        self.streams: list[_StubStream] = []
+        self.tokens = tokens
+
+    def stream(self, **_kwargs):
+        stream = _StubStream(self.tokens)
+        self.streams.append(stream)
+        return stream
+
+
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_coach_stream_delivers_tokens_then_done(auth_client, mock_firestore):
+    messages = _StreamingMessages(["そう", "感じた", "んだね。"])
+    with patch(
+        "app.services.coach_service.get_client",
+        return_value=SimpleNamespace(messages=messages),
+    ):
+        response = auth_client.post("/coach/stream", json={"message": "今日は疲れた"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    kinds = [kind for kind, _ in events]
+    assert kinds == ["session", "token", "token", "token", "done"]
+    assert events[-1][1]["message"] == "そう感じたんだね。"
+    assert events[-1][1]["session_id"] == events[0][1]["session_id"]
+    assert messages.streams[0].closed
+
+    # 完了後にユーザー・アシスタント・セッションが1回のコミットで保存される
+    batch = mock_firestore._mock_batch
+    saved = [call.args[1] for call in batch.set.call_args_list]
+    assert [m.get("role") for m in saved[:2]] == ["user", "assistant"]
+    assert saved[1]["metadata"]["usage"]["cache_read_input_tokens"] == 1100
+    batch.commit.assert_awaited_once()
+    assert saved[1]["content"] == "そう感じたんだね。"
+
+
+def test_coach_stream_langgraph_sends_trailing_safety_event(auth_client):
+    # プレスクリーンでLLM判定に回る応答（「診断」を含む）
+    messages = _StreamingMessages(["病院で診断してもらおう"], text="unsafe")
+    with (
+        patch("app.routers.coach.settings.use_langgraph", True),
+        patch(
+            "app.services.coach_graph.get_client",
+            return_value=SimpleNamespace(messages=messages),
+        ),
+    ):
+        response = auth_client.post("/coach/stream", json={"message": "hello"})
+
+    events = _parse_sse(response.text)
+    kinds = [kind for kind, _ in events]
+    assert kinds == ["session", "token", "safety", "done"]
+    safety = events[2][1]
+    assert safety["is_safe"] is False
+    # unsafe の場合はフォールバック文言で置き換えて保存・返却する
+    assert events[-1][1]["message"] == safety["message"]
+
+
+async def test_coach_stream_closes_upstream_on_disconnect(mock_firestore):
+    from app.models.coach import CoachRequest
+    from app.routers.coach import _SessionContext, _stream_events
+
+    messages = _StreamingMessages(["a", "b", "c"])
+    request = MagicMock()
+    request.is_disconnected = AsyncMock(side_effect=[False, True])
+    session = _SessionContext("session-1", mock_firestore._mock_doc, None, [], [])
+
+    with patch(
+        "app.services.coach_service.get_client",
+        return_value=SimpleNamespace(messages=messages),
+    ):
+        events = [
+            event
+            async for event in _stream_events(
+                request,
+                mock_firestore,
+                CoachRequest(message="hello"),
+                "test-user-123",
+                session,
+                datetime.now(UTC),
+                BackgroundTasks(),
+            )
+        ]
+
+    assert [e.split("\n", 1)[0] for e in events] == ["event: session", "event: token"]
+    assert messages.streams[0].closed
+    mock_firestore._mock_batch.commit.assert_not_awaited()
@@ -0,0 +1,94 @@
+"""LangGraph coaching workflow tests."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.services.coach_graph import CoachState, _response_request, build_coach_graph
+
+DELAY = 0.05
+
+
+class _StubMessages:
+    """プロンプトに応じて固定の応答を返す遅延付きスタブ."""
+
+    def __init__(self):
+        self.prompts: list[str] = []
+
+    async def create(self, **kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        self.prompts.append(prompt)
+        await asyncio.sleep(DELAY)
+        if "感情" in prompt and "Cycleモデル" not in prompt:
+            text = "疲れ"
+        elif "Cycleモデル" in prompt:
+            text = "Leaf"
+        elif "安全" in prompt:
+            text = "safe"
+        else:
+            text = "そう感じたんだね。"
+        return SimpleNamespace(content=[SimpleNamespace(text=text)], usage=None)
+
+
+async def _run(cycle_uses_emotion: bool):
+    stub = SimpleNamespace(messages=_StubMessages())
+    graph = build_coach_graph(cycle_uses_emotion=cycle_uses_emotion)
+    with patch("app.services.coach_graph.get_client", return_value=stub):
+        started = time.perf_counter()
+        result = await graph.ainvoke({"user_message": "今日は疲れた", "history": []})
+        elapsed = time.perf_counter() - started
+    return result, elapsed, stub.messages.prompts
+
+
+async def test_parallel_graph_produces_full_result():
+    result, _, _ = await _run(cycle_uses_emotion=False)
+
+    assert result["detected_emotion"] == "疲れ"
+    assert result["cycle_element"] == "Leaf"
+    assert result["response"] == "そう感じたんだね。"
+    assert result["is_safe"] is True
+
+
+async def test_parallel_graph_runs_classifiers_concurrently():
+    _, sequential, _ = await _run(cycle_uses_emotion=True)
+    _, parallel, _ = await _run(cycle_uses_emotion=False)
+
+    # 安全性チェックはプレスクリーンで通過する
+    # 直列: 3往復 / 並列: 2往復
+    assert sequential >= DELAY * 3
+    assert parallel < DELAY * 2.8
+
+
+async def test_cycle_prompt_includes_emotion_only_when_configured():
+    _, _, parallel_prompts = await _run(cycle_uses_emotion=False)
+    _, _, sequential_prompts = await _run(cycle_uses_emotion=True)
+
+    def cycle_prompt(prompts):
+        return next(p for p in prompts if "Cycleモデル" in p)
+
+    assert "検出された感情" not in cycle_prompt(parallel_prompts)
+    assert "検出された感情: 疲れ" in cycle_prompt(sequential_prompts)
+
+
+def test_response_request_keeps_per_turn_analysis_out_of_cached_prefix():
+    state = CoachState(
+        user_message="今日は疲れた",
+        history=[
+            {"role": "user", "content": "こんにちは"},
+            {"role": "assistant", "content": "こんにちは。"},
+        ],
+        detected_emotion="疲れ",
+        cycle_element="Leaf",
+    )
+
+    request = _response_request(state)
+
+    # システムプロンプトと履歴の末尾がキャッシュのブレークポイント
+    assert request["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" in request["messages"][1]["content"][0]
+    # 分析結果は今回のユーザーメッセージ側に付く
+    current = request["messages"][-1]["content"]
+    assert current[0]["text"] == "今日は疲れた"
+    assert "検出された感情: 疲れ" in current[1]["text"]
+    assert all("現在の分析結果" not in block["text"] for block in request["system"])
@@ -0,0 +1,77 @@
+"""Coach service tests."""
+
+from unittest.mock import patch
+
+from app.services.coach_service import (
+    SYSTEM_PROMPT,
+    build_messages,
+    build_system,
+    estimate_tokens,
+    trim_history,
+)
+
+
+def _turns(n: int, content: str) -> list[dict]:
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"{content}{i}"}
+        for i in range(n)
+    ]
+
+
+def test_estimate_tokens_counts_japanese_per_char():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("疲れた") == 3
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_trim_history_keeps_latest_within_budget():
+    history = _turns(10, "あ" * 99)  # 1件あたり100トークン
+
+    trimmed = trim_history(history, max_tokens=450)
+
+    assert trimmed == history[6:]
+
+
+def test_trim_history_starts_with_user_message():
+    history = _turns(10, "あ" * 99)
+
+    # 直近5件が収まるが、先頭がアシスタントなら1件落とす
+    trimmed = trim_history(history, max_tokens=500)
+
+    assert trimmed == history[6:]
+    assert trimmed[0]["role"] == "user"
+
+
+def test_trim_history_returns_everything_under_budget():
+    history = _turns(4, "hi")
+    assert trim_history(history, max_tokens=1000) == history
+
+
+def test_build_system_caches_static_prompt_before_summary():
+    blocks = build_system("仕事で疲れている")
+
+    assert blocks[0]["text"] == SYSTEM_PROMPT
+    assert blocks[0]["cache_control"] == {"type": "ephemeral"}
+    assert "仕事で疲れている" in blocks[1]["text"]
+    assert "cache_control" not in blocks[1]
+
+
+def test_build_messages_marks_end_of_history_for_caching():
+    history = _turns(4, "hi")
+
+    messages = build_messages("今日は", history)
+
+    assert messages[:3] == history[:3]
+    assert messages[3]["content"] == [
+        {"type": "text", "text": "hi3", "cache_control": {"type": "ephemeral"}}
+    ]
+    assert messages[4] == {"role": "user", "content": "今日は"}
+
+
+def test_prompt_cache_can_be_disabled():
+    with patch("app.services.coach_service.settings.claude_prompt_cache", False):
+        blocks = build_system()
+        messages = build_messages("今日は", _turns(2, "hi"))
+
+    assert "cache_control" not in blocks[0]
+    assert "cache_control" not in messages[1]["content"][0]
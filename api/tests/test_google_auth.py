@@ -0,0 +1,86 @@
+"""Google ID token verification tests."""
+
+import time
+from unittest.mock import patch
+
+import jwt
+import pytest
+
+from app.services import google_auth
+from app.services.jwks import JWKSCache
+from tests.signing import JWKSServer, SigningKey
+
+CLIENT_ID = "ios-client.apps.googleusercontent.com"
+
+
+@pytest.fixture(scope="module")
+def google_key():
+    return SigningKey("google-kid-1")
+
+
+@pytest.fixture
+def jwks(google_key):
+    server = JWKSServer(
+        google_key, headers={"Cache-Control": "public, max-age=19800, must-revalidate"}
+    )
+    cache = JWKSCache(google_auth.GOOGLE_CERTS_URL, respect_cache_control=True)
+    with (
+        patch("app.services.jwks.get_http_client", side_effect=server.client),
+        patch.object(google_auth, "google_keys", cache),
+        patch("app.services.google_auth.settings.google_client_id", CLIENT_ID),
+    ):
+        yield server, cache
+
+
+def _token(key, **claims):
+    return key.sign(
+        **{"iss": "https://accounts.google.com", "aud": CLIENT_ID, "sub": "g-1"}
+        | claims
+    )
+
+
+async def test_verify_google_token_locally(jwks, google_key):
+    server, _ = jwks
+    for _ in range(3):
+        claims = await google_auth.verify_google_token(_token(google_key))
+        assert claims["sub"] == "g-1"
+    assert server.fetches == 1
+
+
+async def test_cache_ttl_follows_max_age(jwks, google_key):
+    _, cache = jwks
+    await google_auth.verify_google_token(_token(google_key))
+    remaining = cache._expires_at - time.monotonic()
+    assert 19700 < remaining <= 19800
+
+
+async def test_short_issuer_accepted(jwks, google_key):
+    claims = await google_auth.verify_google_token(
+        _token(google_key, iss="accounts.google.com")
+    )
+    assert claims["sub"] == "g-1"
+
+
+@pytest.mark.parametrize(
+    "claims",
+    [
+        {"iss": "https://evil.example.com"},
+        {"aud": "another-client"},
+    ],
+)
+async def test_invalid_tokens_raise_value_error(jwks, google_key, claims):
+    with pytest.raises(ValueError):
+        await google_auth.verify_google_token(_token(google_key, **claims))
+
+
+async def test_expired_token_raises_expired_signature(jwks, google_key):
+    with pytest.raises(jwt.ExpiredSignatureError):
+        await google_auth.verify_google_token(
+            _token(google_key, exp=int(time.time()) - 60)
+        )
+
+
+async def test_malformed_token_raises_value_error(jwks):
+    with pytest.raises(ValueError):
+        await google_auth.verify_google_token("not-a-jwt")
+
@@ -14,3 +14,19 @@ def test_health_includes_stage(client):
     response = client.get("/health")
     data = response.json()
     assert "stage" in data
+
+
+def test_health_includes_auth_cache_metrics(client):
+    data = client.get("/health").json()
+    assert set(data["auth_token_cache"]) >= {"hits", "misses", "hit_rate"}
+
+
+def test_health_includes_safety_prescreen_counters(client):
+    data = client.get("/health").json()
+    assert set(data["safety_prescreen"]) == {
+        "pass",
+        "escalate",
+        "blocked",
+        "cleared",
+        "pass_rate",
+    }
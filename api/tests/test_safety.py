@@ -0,0 +1,114 @@
+"""Safety pre-screen tests."""
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.services.coach_graph import SAFE_FALLBACK, CoachState, safety_filter
+from app.services.safety import prescreen, safety_counters
+
+CORPUS = [
+    json.loads(line)
+    for line in (Path(__file__).parent / "safety_corpus.jsonl").read_text().splitlines()
+    if line.strip()
+]
+
+
+@pytest.fixture(autouse=True)
+def _clear_counters():
+    safety_counters.clear()
+    yield
+    safety_counters.clear()
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=lambda case: case["text"][:20])
+def test_prescreen_regression_corpus(case):
+    assert prescreen(case["text"]).verdict == case["verdict"]
+
+
+def test_corpus_never_passes_risky_replies():
+    risky = [case for case in CORPUS if case["verdict"] != "pass"]
+    assert risky
+    assert all(prescreen(case["text"]).verdict != "pass" for case in risky)
+
+
+def test_prescreen_counts_verdicts():
+    prescreen("そう感じたんだね。")
+    prescreen("病院で相談してみよう")
+    prescreen("住所を教えて")
+
+    assert safety_counters.stats() == {
+        "pass": 1,
+        "escalate": 2,
+        "blocked": 0,
+        "cleared": 0,
+        "pass_rate": 1 / 3,
+    }
+
+
+class _Judge:
+    def __init__(self, text: str):
+        self.text = text
+        self.calls = 0
+
+    async def create(self, **_kwargs):
+        self.calls += 1
+        return SimpleNamespace(content=[SimpleNamespace(text=self.text)], usage=None)
+
+
+async def _filter(response: str, judge: _Judge) -> dict:
+    with patch(
+        "app.services.coach_graph.get_client",
+        return_value=SimpleNamespace(messages=judge),
+    ):
+        return await safety_filter(CoachState(response=response))
+
+
+async def test_safety_filter_passes_gentle_reply_without_llm():
+    judge = _Judge("unsafe")
+
+    assert await _filter("そう感じたんだね。", judge) == {"is_safe": True}
+    assert judge.calls == 0
+    assert safety_counters.stats()["blocked"] == 0
+
+
+async def test_safety_filter_leaves_mirrored_reply_to_llm():
+    judge = _Judge("safe")
+
+    reply = "「消えたほうがいい」って思うくらい、つらかったんだね"
+
+    result = await _filter(reply, judge)
+
+    assert result == {"is_safe": True}
+    assert judge.calls == 1
+    assert safety_counters.stats()["cleared"] == 1
+
+
+async def test_safety_filter_replaces_reply_judged_unsafe():
+    judge = _Judge("unsafe")
+
+    result = await _filter("あなたはうつ病です", judge)
+
+    assert result == {"is_safe": False, "response": SAFE_FALLBACK}
+    assert judge.calls == 1
+    stats = safety_counters.stats()
+    assert (stats["escalate"], stats["blocked"], stats["cleared"]) == (1, 1, 0)
+
+
+async def test_safety_filter_escalates_suspicious_reply_to_llm():
+    judge = _Judge("safe")
+
+    assert await _filter("病院で相談してみよう", judge) == {"is_safe": True}
+    assert judge.calls == 1
+
+
+async def test_safety_filter_always_asks_llm_when_prescreen_disabled():
+    judge = _Judge("safe")
+
+    with patch("app.services.coach_graph.settings.coach_safety_prescreen", False):
+        await _filter("そう感じたんだね。", judge)
+
+    assert judge.calls == 1
@@ -1,5 +1,10 @@
 """Session endpoint tests."""
 
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+from google.api_core.exceptions import ServiceUnavailable
+
 
 def test_list_sessions_requires_auth(client):
     response = client.get("/sessions")
@@ -9,3 +14,196 @@ def test_list_sessions_requires_auth(client):
 def test_create_session_requires_auth(client):
     response = client.post("/sessions", json={})
     assert response.status_code == 401
+
+
+def _seed_sessions(db, count, user_id="test-user-123", prefix="s"):
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    for i in range(count):
+        created = base + timedelta(minutes=i)
+        db.seed(
+            f"sessions/{prefix}{i:04d}",
+            {
+                "user_id": user_id,
+                "title": f"session {i}",
+                "message_count": 0,
+                "last_message_at": created,
+                "created_at": created,
+                "updated_at": created,
+            },
+        )
+
+
+def test_list_sessions_cursor_walks_all_pages(fake_client, fake_firestore):
+    _seed_sessions(fake_firestore, 25)
+    _seed_sessions(fake_firestore, 3, user_id="other-user", prefix="x")
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 10} | ({"cursor": cursor} if cursor else {})
+        data = fake_client.get("/sessions", params=params).json()["data"]
+        seen.extend(s["session_id"] for s in data["sessions"])
+        if not data["has_more"]:
+            assert data["next_cursor"] is None
+            break
+        cursor = data["next_cursor"]
+
+    # 作成日の降順で、他ユーザーを含まず重複なく全件
+    assert seen == [f"s{i:04d}" for i in reversed(range(25))]
+
+
+def test_list_sessions_cursor_reads_only_one_page(fake_client, fake_firestore):
+    _seed_sessions(fake_firestore, 200)
+    first = fake_client.get("/sessions", params={"limit": 10}).json()["data"]
+
+    fake_firestore.reset_counters()
+    response = fake_client.get(
+        "/sessions",
+        params={
+            "limit": 10,
+            "cursor": first["next_cursor"],
+            "include_total": "false",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json()["data"]["total"] is None
+    assert fake_firestore.reads == 11  # limit + 1
+    assert fake_firestore.rpcs["aggregate"] == 0
+
+
+def test_list_sessions_total_uses_count_aggregation(fake_client, fake_firestore):
+    _seed_sessions(fake_firestore, 200)
+
+    data = fake_client.get("/sessions", params={"limit": 10}).json()["data"]
+
+    assert data["total"] == 200
+    assert fake_firestore.rpcs["aggregate"] == 1
+    # ページ分 (limit + 1) + 集計1回分だけ読み、全件はダウンロードしない
+    assert fake_firestore.reads == 12
+
+
+def test_list_sessions_offset_fallback(fake_client, fake_firestore):
+    _seed_sessions(fake_firestore, 5)
+    data = fake_client.get("/sessions", params={"limit": 2, "offset": 2}).json()["data"]
+
+    assert [s["session_id"] for s in data["sessions"]] == ["s0002", "s0001"]
+    assert data["total"] == 5
+    assert data["has_more"] is True
+
+
+def test_list_sessions_invalid_cursor(fake_client):
+    response = fake_client.get("/sessions", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def _seed_session_with_messages(db, session_id, count):
+    _seed_sessions(db, 1, prefix=session_id)
+    db.docs[f"sessions/{session_id}0000"]["message_count"] = count
+    for i in range(count):
+        db.seed(f"sessions/{session_id}0000/messages/m{i:05d}", {"content": str(i)})
+    return f"{session_id}0000"
+
+
+def test_delete_session_removes_messages_in_batches(fake_client, fake_firestore):
+    session_id = _seed_session_with_messages(fake_firestore, "d", 600)
+
+    response = fake_client.delete(f"/sessions/{session_id}")
+
+    assert response.status_code == 204
+    assert not any(p.startswith(f"sessions/{session_id}") for p in fake_firestore.docs)
+    # 1件ずつの削除（600 RPC）ではなく、ページごとのバッチ + 本体の削除
+    assert fake_firestore.rpcs["commit"] == 3
+    assert "delete" not in fake_firestore.rpcs
+
+
+def test_delete_large_session_continues_in_background(fake_client, fake_firestore):
+    session_id = _seed_session_with_messages(fake_firestore, "d", 30)
+
+    with patch("app.routers.sessions.settings.cascade_delete_background_threshold", 10):
+        response = fake_client.delete(f"/sessions/{session_id}")
+
+    assert response.status_code == 202
+    # TestClient はバックグラウンドタスクの完了まで待つ
+    assert not any(p.startswith(f"sessions/{session_id}") for p in fake_firestore.docs)
+
+
+def test_failed_background_delete_is_retried_by_sync(
+    fake_client, fake_firestore, caplog
+):
+    session_id = _seed_session_with_messages(fake_firestore, "d", 30)
+    since = datetime.now(UTC) - timedelta(minutes=1)
+
+    with (
+        patch("app.routers.sessions.settings.cascade_delete_background_threshold", 10),
+        patch(
+            "app.services.cascade_delete.delete_collection",
+            side_effect=ServiceUnavailable("unavailable"),
+        ),
+    ):
+        assert fake_client.delete(f"/sessions/{session_id}").status_code == 202
+
+    assert "Failed to delete messages" in caplog.text
+    assert fake_firestore.docs[f"tombstones/session_{session_id}"]["children_pending"]
+    assert any(p.startswith(f"sessions/{session_id}/") for p in fake_firestore.docs)
+
+    with patch("app.routers.sync.settings.sync_settle_seconds", 0):
+        fake_client.get("/sync", params={"since": since.isoformat()})
+
+    assert not any(p.startswith(f"sessions/{session_id}") for p in fake_firestore.docs)
+    tombstone = fake_firestore.docs[f"tombstones/session_{session_id}"]
+    assert tombstone["children_pending"] is False
+
+
+def _seed_chat(db, session_id: str, turns: int) -> None:
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    db.seed(f"sessions/{session_id}", {
+        "user_id": "test-user-123",
+        "message_count": 2 * turns,
+        "created_at": base,
+        "updated_at": base + timedelta(minutes=turns),
+    })
+    for i in range(2 * turns):
+        db.seed(f"sessions/{session_id}/messages/m{i:04d}", {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": str(i),
+            "created_at": base + timedelta(seconds=i),
+        })
+
+
+def test_get_session_not_modified_costs_one_read(fake_client, fake_firestore):
+    _seed_chat(fake_firestore, "s1", turns=50)
+    first = fake_client.get("/sessions/s1")
+    etag = first.headers["etag"]
+
+    fake_firestore.reset_counters()
+    response = fake_client.get("/sessions/s1", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert len(first.json()["data"]["messages"]) == 100
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    # セッション本体の読み取りのみ（メッセージは読まない）
+    assert fake_firestore.rpcs == {"get": 1}
+    assert fake_firestore.reads == 1
+
+
+def test_get_session_etag_changes_with_new_messages(fake_client, fake_firestore):
+    _seed_chat(fake_firestore, "s1", turns=1)
+    etag = fake_client.get("/sessions/s1").headers["etag"]
+
+    # /coach の1ターン分を反映
+    session = fake_firestore.docs["sessions/s1"]
+    session["message_count"] += 2
+    session["updated_at"] += timedelta(minutes=1)
+    for i in (2, 3):
+        fake_firestore.seed(f"sessions/s1/messages/m{i:04d}", {
+            "role": "user" if i == 2 else "assistant",
+            "content": str(i),
+            "created_at": datetime(2026, 1, 2, tzinfo=UTC) + timedelta(seconds=i),
+        })
+    response = fake_client.get("/sessions/s1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()["data"]["messages"]) == 4
@@ -0,0 +1,209 @@
+"""Delta sync endpoint tests."""
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.config import settings
+from app.services.coach_service import CoachReply
+from app.services.sync import fetch_changes
+
+USER = "test-user-123"
+
+
+@pytest.fixture(autouse=True)
+def no_settle_window():
+    with patch.object(settings, "sync_settle_seconds", 0):
+        yield
+
+
+def _seed_task(db, task_id: str, updated_at: datetime, user_id: str = USER) -> None:
+    db.seed(f"tasks/{task_id}", {
+        "user_id": user_id,
+        "title": task_id,
+        "status": "pending",
+        "created_at": updated_at,
+        "updated_at": updated_at,
+    })
+
+
+def _sync(client, since: datetime, **params) -> dict:
+    response = client.get("/sync", params={"since": since.isoformat(), **params})
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+def test_sync_returns_changes_since_watermark(fake_client, fake_firestore):
+    old = datetime.now(UTC) - timedelta(days=1)
+    for i in range(3):
+        _seed_task(fake_firestore, f"old{i}", old)
+    _seed_task(fake_firestore, "theirs", datetime.now(UTC), user_id="other-user")
+    since = datetime.now(UTC) - timedelta(hours=1)
+
+    created = fake_client.post("/tasks", json={"title": "new"}).json()["data"]
+    fake_client.put("/tasks/old0", json={"status": "completed"})
+    fake_client.delete("/tasks/old1")
+    session_id = fake_client.post("/sessions", json={}).json()["data"]["session_id"]
+
+    data = _sync(fake_client, since)
+
+    assert {t["task_id"] for t in data["tasks"]} == {created["task_id"], "old0"}
+    assert [s["session_id"] for s in data["sessions"]] == [session_id]
+    assert [(d["kind"], d["id"]) for d in data["deleted"]] == [("task", "old1")]
+    assert data["has_more"] is False
+
+    # 変更がなければ次回は空
+    again = _sync(fake_client, datetime.fromisoformat(data["watermark"]))
+    assert again["tasks"] == again["sessions"] == again["deleted"] == []
+
+
+def _seed_message(db, session_id: str, message_id: str, created_at: datetime):
+    db.seed(f"sessions/{session_id}/messages/{message_id}", {
+        "role": "user",
+        "content": message_id,
+        "user_id": USER,
+        "session_id": session_id,
+        "created_at": created_at,
+        "written_at": created_at,
+    })
+
+
+def test_sync_returns_new_messages(fake_client, fake_firestore):
+    now = datetime.now(UTC)
+    fake_firestore.seed("sessions/s1", {
+        "user_id": USER,
+        "message_count": 2,
+        "created_at": now - timedelta(days=1),
+        "updated_at": now - timedelta(minutes=1),
+    })
+    _seed_message(fake_firestore, "s1", "m0", now - timedelta(days=1))
+    _seed_message(fake_firestore, "s1", "m1", now - timedelta(minutes=1))
+    _seed_message(fake_firestore, "other", "x", now - timedelta(minutes=1))
+    fake_firestore.docs["sessions/other/messages/x"]["user_id"] = "other-user"
+
+    data = _sync(fake_client, now - timedelta(minutes=10))
+
+    assert [(m["session_id"], m["content"]) for m in data["messages"]] == [
+        ("s1", "m1")
+    ]
+
+
+def test_sync_keeps_messages_of_sessions_updated_after_watermark(
+    fake_client, fake_firestore
+):
+    """セッションの updated_at がウォーターマークより後でも範囲内のメッセージは返す."""
+    now = datetime.now(UTC)
+    fake_firestore.seed("sessions/s1", {
+        "user_id": USER,
+        "message_count": 2,
+        "created_at": now - timedelta(minutes=1),
+        "updated_at": now - timedelta(seconds=1),
+    })
+    _seed_message(fake_firestore, "s1", "m0", now - timedelta(minutes=1))
+    _seed_message(fake_firestore, "s1", "m1", now - timedelta(seconds=1))
+
+    with patch.object(settings, "sync_settle_seconds", 5):
+        first = _sync(fake_client, now - timedelta(minutes=10))
+    second = _sync(fake_client, datetime.fromisoformat(first["watermark"]))
+
+    assert first["sessions"] == []
+    assert [m["content"] for m in first["messages"]] == ["m0"]
+    assert [s["session_id"] for s in second["sessions"]] == ["s1"]
+    assert [m["content"] for m in second["messages"]] == ["m1"]
+
+
+def test_sync_skips_messages_of_deleted_sessions(fake_client, fake_firestore):
+    now = datetime.now(UTC)
+    _seed_message(fake_firestore, "gone", "m0", now - timedelta(minutes=2))
+    _seed_message(fake_firestore, "s1", "m1", now - timedelta(minutes=2))
+    fake_firestore.seed("tombstones/session_gone", {
+        "user_id": USER,
+        "kind": "session",
+        "resource_id": "gone",
+        "children_pending": False,
+        "deleted_at": now - timedelta(minutes=1),
+    })
+
+    data = _sync(fake_client, now - timedelta(minutes=10))
+
+    assert [m["content"] for m in data["messages"]] == ["m1"]
+    assert [d["id"] for d in data["deleted"]] == ["gone"]
+
+
+def test_sync_during_slow_reply_keeps_the_turn_for_next_sync(
+    fake_client, fake_firestore
+):
+    """応答生成中に同期しても、そのターンのメッセージは次回の同期で返る."""
+    since = datetime.now(UTC) - timedelta(minutes=1)
+    during: dict = {}
+
+    async def slow_reply(**_kwargs):
+        # 保存前の同期でウォーターマークがリクエスト開始時刻より後に進む
+        during["changes"] = await fetch_changes(fake_firestore, USER, since, 100)
+        return CoachReply("うんうん")
+
+    with patch("app.routers.coach.coach_service.chat", side_effect=slow_reply):
+        assert fake_client.post("/coach", json={"message": "hi"}).status_code == 200
+
+    assert during["changes"].messages == []
+    data = _sync(fake_client, during["changes"].watermark)
+
+    assert [m["role"] for m in data["messages"]] == ["user", "assistant"]
+
+
+def test_sync_cost_scales_with_changes_not_history(fake_client, fake_firestore):
+    old = datetime.now(UTC) - timedelta(days=1)
+    for i in range(1000):
+        _seed_task(fake_firestore, f"old{i:04d}", old)
+    since = datetime.now(UTC) - timedelta(minutes=1)
+    _seed_task(fake_firestore, "changed", datetime.now(UTC) - timedelta(seconds=1))
+
+    fake_firestore.reset_counters()
+    data = _sync(fake_client, since)
+
+    assert [t["task_id"] for t in data["tasks"]] == ["changed"]
+    # sessions / tasks / tombstones / messages のクエリ各1回（結果0件でも1読み取り）
+    assert fake_firestore.rpcs == {"query": 4}
+    assert fake_firestore.reads == 4
+
+
+def test_sync_pages_through_changes(fake_client, fake_firestore):
+    base = datetime.now(UTC) - timedelta(minutes=30)
+    for i in range(5):
+        _seed_task(fake_firestore, f"t{i}", base + timedelta(minutes=i))
+    # 同じ時刻に更新された3件（一括作成など）は同じページで返す
+    for i in range(3):
+        _seed_task(fake_firestore, f"batch{i}", base + timedelta(minutes=10))
+
+    since = base - timedelta(seconds=1)
+    seen = []
+    while True:
+        data = _sync(fake_client, since, limit=2)
+        seen += [t["task_id"] for t in data["tasks"]]
+        since = datetime.fromisoformat(data["watermark"])
+        if not data["has_more"]:
+            break
+
+    # 重複も取りこぼしもなく時刻順に返る
+    assert seen == ["t0", "t1", "t2", "t3", "t4", "batch0", "batch1", "batch2"]
+
+
+def test_sync_holds_back_changes_inside_settle_window(fake_client, fake_firestore):
+    now = datetime.now(UTC)
+    _seed_task(fake_firestore, "recent", now - timedelta(seconds=1))
+
+    with patch.object(settings, "sync_settle_seconds", 5):
+        data = _sync(fake_client, now - timedelta(minutes=1))
+
+    assert data["tasks"] == []
+    assert datetime.fromisoformat(data["watermark"]) < now - timedelta(seconds=1)
+
+
+def test_sync_rejects_expired_watermark(fake_client):
+    since = datetime.now(UTC) - timedelta(days=settings.tombstone_ttl_days + 1)
+
+    response = fake_client.get("/sync", params={"since": since.isoformat()})
+
+    assert response.status_code == 410
+    assert response.json()["error"]["code"] == "WatermarkExpired"
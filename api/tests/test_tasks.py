@@ -1,5 +1,12 @@
 """Task endpoint tests."""
 
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import httpx
+
+from tests.fake_firestore import FakeFirestore
+
 
 def test_list_tasks_requires_auth(client):
     response = client.get("/tasks")
@@ -9,3 +16,273 @@ def test_list_tasks_requires_auth(client):
 def test_create_task_requires_auth(client):
     response = client.post("/tasks", json={"title": "Test"})
     assert response.status_code == 401
+
+
+def test_list_tasks_cursor_with_status_filter(fake_client, fake_firestore):
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    for i in range(12):
+        created = base + timedelta(minutes=i)
+        fake_firestore.seed(
+            f"tasks/t{i:04d}",
+            {
+                "user_id": "test-user-123",
+                "title": f"task {i}",
+                "status": "completed" if i % 2 else "pending",
+                "created_at": created,
+                "updated_at": created,
+            },
+        )
+
+    first = fake_client.get(
+        "/tasks", params={"status": "pending", "limit": 4}
+    ).json()["data"]
+    second = fake_client.get(
+        "/tasks",
+        params={"status": "pending", "limit": 4, "cursor": first["next_cursor"]},
+    ).json()["data"]
+
+    ids = [t["task_id"] for t in first["tasks"] + second["tasks"]]
+    assert ids == ["t0010", "t0008", "t0006", "t0004", "t0002", "t0000"]
+    assert first["has_more"] is True
+    assert second["has_more"] is False
+    assert first["total"] == second["total"] == 6
+
+
+def test_delete_task_removes_reflections(fake_client, fake_firestore):
+    created = datetime(2026, 1, 1, tzinfo=UTC)
+    fake_firestore.seed("tasks/t1", {
+        "user_id": "test-user-123",
+        "title": "散歩",
+        "status": "completed",
+        "created_at": created,
+        "updated_at": created,
+    })
+    for i in range(3):
+        fake_firestore.seed(f"tasks/t1/reflections/r{i}", {"content": str(i)})
+
+    response = fake_client.delete("/tasks/t1")
+
+    assert response.status_code == 204
+    assert not any(p.startswith("tasks/t1") for p in fake_firestore.docs)
+    assert fake_firestore.rpcs["commit"] == 2
+
+
+def _seed_task(db, task_id: str, status: str = "pending") -> None:
+    created = datetime(2026, 1, 1, tzinfo=UTC)
+    db.seed(f"tasks/{task_id}", {
+        "user_id": "test-user-123",
+        "title": "散歩",
+        "description": "近所を歩く",
+        "status": status,
+        "created_at": created,
+        "updated_at": created,
+    })
+
+
+def test_update_task_costs_two_rpcs(fake_client, fake_firestore):
+    _seed_task(fake_firestore, "t1")
+
+    response = fake_client.put("/tasks/t1", json={"title": "ジョギング"})
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    # 更新していないフィールドは読み取ったデータから返す
+    assert data["title"] == "ジョギング"
+    assert data["description"] == "近所を歩く"
+    assert data["created_at"].startswith("2026-01-01")
+    assert fake_firestore.docs["tasks/t1"]["title"] == "ジョギング"
+    assert fake_firestore.rpcs == {"get": 1, "commit": 1}
+
+
+async def test_concurrent_task_updates_conflict():
+    from app.dependencies import get_current_user, get_firestore
+    from app.main import app
+
+    # RPCに遅延を入れて、2つの編集の読み取りと書き込みを重ねる
+    fake_firestore = FakeFirestore(rpc_delay=0.01)
+    _seed_task(fake_firestore, "t1")
+
+    app.dependency_overrides[get_firestore] = lambda: fake_firestore
+    app.dependency_overrides[get_current_user] = lambda: "test-user-123"
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            responses = await asyncio.gather(
+                ac.put("/tasks/t1", json={"status": "completed"}),
+                ac.put("/tasks/t1", json={"status": "completed"}),
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    # 両方が pending を読んでいるが、書き込めるのは先にコミットした方だけ
+    assert sorted(r.status_code for r in responses) == [200, 409]
+    conflict = next(r for r in responses if r.status_code == 409)
+    assert conflict.json()["error"]["code"] == "Conflict"
+    # ステータス別カウンタも1回分だけ動く
+    stats = fake_firestore.docs["users/test-user-123/stats/summary"]
+    assert stats["tasks_by_status"]["completed"] == 1
+
+
+def test_create_tasks_batch_commits_in_chunks(fake_client, fake_firestore):
+    tasks = [{"title": f"task {i}"} for i in range(500)]
+
+    response = fake_client.post("/tasks:batch", json={"tasks": tasks})
+
+    assert response.status_code == 200
+    results = response.json()["data"]["results"]
+    assert [r["index"] for r in results] == list(range(500))
+    assert all(r["status"] == 201 for r in results)
+    assert results[3]["data"]["title"] == "task 3"
+    assert fake_firestore.docs[f"tasks/{results[3]['task_id']}"]["title"] == "task 3"
+    # カウンタ更新を含めて500件以下のチャンク2つ
+    assert fake_firestore.rpcs == {"commit": 2}
+    stats = fake_firestore.docs["users/test-user-123/stats/summary"]
+    assert stats["task_count"] == 500
+    assert stats["tasks_by_status"] == {"pending": 500}
+
+
+def test_create_tasks_batch_validates_every_item(fake_client, fake_firestore):
+    tasks = [{"title": "ok"}, {"title": ""}]
+
+    response = fake_client.post("/tasks:batch", json={"tasks": tasks})
+
+    assert response.status_code == 422
+    assert fake_firestore.rpc_count == 0
+
+
+def test_update_tasks_batch_reports_per_item_results(fake_client, fake_firestore):
+    _seed_task(fake_firestore, "t1")
+    _seed_task(fake_firestore, "t2", status="completed")
+    fake_firestore.seed("tasks/theirs", {"user_id": "other-user", "title": "x"})
+
+    response = fake_client.patch("/tasks:batch", json={"tasks": [
+        {"task_id": "t1", "status": "completed"},
+        {"task_id": "missing", "title": "x"},
+        {"task_id": "theirs", "title": "x"},
+        {"task_id": "t2", "title": "読書"},
+    ]})
+
+    results = response.json()["data"]["results"]
+    assert [r["status"] for r in results] == [200, 404, 404, 200]
+    assert results[0]["data"]["status"] == "completed"
+    assert results[3]["data"]["description"] == "近所を歩く"
+    assert results[1]["error"]["code"] == "NotFound"
+    assert fake_firestore.docs["tasks/theirs"]["title"] == "x"
+    assert fake_firestore.docs["tasks/t2"]["title"] == "読書"
+    # 読み取り1回 + コミット1回
+    assert fake_firestore.rpcs == {"batch_get": 1, "commit": 1}
+    stats = fake_firestore.docs["users/test-user-123/stats/summary"]
+    assert stats["tasks_by_status"] == {"pending": -1, "completed": 1}
+
+
+def test_update_tasks_batch_isolates_conflicts(fake_client, fake_firestore):
+    _seed_task(fake_firestore, "t1")
+    _seed_task(fake_firestore, "t2")
+    get_all = fake_firestore.get_all
+
+    async def get_all_then_concurrent_edit(references):
+        async for snapshot in get_all(references):
+            yield snapshot
+        # 読み取り後、コミット前に別の端末が t2 を編集
+        fake_firestore.seed("tasks/t2", {
+            **fake_firestore.docs["tasks/t2"], "title": "別端末で編集"
+        })
+
+    fake_firestore.get_all = get_all_then_concurrent_edit
+    response = fake_client.patch("/tasks:batch", json={"tasks": [
+        {"task_id": "t1", "status": "completed"},
+        {"task_id": "t2", "status": "completed"},
+    ]})
+
+    results = response.json()["data"]["results"]
+    assert [r["status"] for r in results] == [200, 409]
+    assert results[1]["error"]["code"] == "Conflict"
+    assert fake_firestore.docs["tasks/t1"]["status"] == "completed"
+    assert fake_firestore.docs["tasks/t2"]["title"] == "別端末で編集"
+    assert fake_firestore.docs["tasks/t2"]["status"] == "pending"
+    stats = fake_firestore.docs["users/test-user-123/stats/summary"]
+    assert stats["tasks_by_status"]["completed"] == 1
+
+
+def test_update_tasks_batch_rejects_duplicate_ids(fake_client):
+    response = fake_client.patch("/tasks:batch", json={"tasks": [
+        {"task_id": "t1", "title": "a"},
+        {"task_id": "t1", "title": "b"},
+    ]})
+
+    assert response.status_code == 400
+
+
+def test_create_reflections_batch(fake_client, fake_firestore):
+    _seed_task(fake_firestore, "t1")
+    _seed_task(fake_firestore, "t2")
+    fake_firestore.seed("tasks/theirs", {"user_id": "other-user", "title": "x"})
+    reflection = {"what_i_did": "歩いた", "what_i_noticed": "気持ちいい"}
+
+    response = fake_client.post("/tasks/reflections:batch", json={"reflections": [
+        {**reflection, "task_id": "t1"},
+        {**reflection, "task_id": "t1"},
+        {**reflection, "task_id": "theirs"},
+        {**reflection, "task_id": "t2"},
+    ]})
+
+    results = response.json()["data"]["results"]
+    assert [r["status"] for r in results] == [201, 201, 404, 201]
+    assert results[3]["data"]["task_id"] == "t2"
+    stored = [p for p in fake_firestore.docs if "/reflections/" in p]
+    assert len(stored) == 3
+    assert f"tasks/t1/reflections/{results[0]['reflection_id']}" in stored
+    assert not any(p.startswith("tasks/theirs/") for p in fake_firestore.docs)
+    # 重複するタスクもまとめて1回で読み取り、1回でコミット
+    assert fake_firestore.rpcs == {"batch_get": 1, "commit": 1}
+
+
+def test_list_tasks_not_modified_costs_one_read(fake_client, fake_firestore):
+    for i in range(3):
+        fake_client.post("/tasks", json={"title": f"task {i}"})
+    first = fake_client.get("/tasks")
+    etag = first.headers["etag"]
+
+    fake_firestore.reset_counters()
+    response = fake_client.get("/tasks", headers={"If-None-Match": etag})
+
+    assert len(first.json()["data"]["tasks"]) == 3
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    # カウンタドキュメントの読み取りのみ（一覧・件数のクエリは実行しない）
+    assert fake_firestore.rpcs == {"get": 1}
+
+
+def test_list_tasks_etag_differs_after_account_recreated(fake_client):
+    fake_client.post("/tasks", json={"title": "前のタスク"})
+    etag = fake_client.get("/tasks").headers["etag"]
+
+    # 削除でカウンタが消え、作り直したアカウントでは tasks_version が同じ値になる
+    assert fake_client.delete("/users/me").status_code == 202
+    fake_client.post("/tasks", json={"title": "新しいタスク"})
+    response = fake_client.get("/tasks", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["data"]["tasks"][0]["title"] == "新しいタスク"
+
+
+def test_list_tasks_etag_changes_on_any_task_write(fake_client, fake_firestore):
+    _seed_task(fake_firestore, "t1")
+    etag = fake_client.get("/tasks").headers["etag"]
+
+    # ステータスの変わらない更新でも tasks_version が進む
+    fake_client.put("/tasks/t1", json={"title": "ジョギング"})
+    response = fake_client.get("/tasks", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["data"]["tasks"][0]["title"] == "ジョギング"
+    # クエリパラメータが違えば別の ETag
+    filtered = fake_client.get(
+        "/tasks",
+        params={"status": "pending"},
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+    assert filtered.status_code == 200
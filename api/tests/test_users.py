@@ -0,0 +1,231 @@
+"""User endpoint tests."""
+
+import json
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+from app.config import settings
+from app.routers.auth import known_users
+
+USER = "test-user-123"
+
+
+def _seed_account(db, user_id: str, sessions: int = 3, tasks: int = 2) -> None:
+    now = datetime.now(UTC)
+    db.seed(f"users/{user_id}", {"email": f"{user_id}@example.com", "created_at": now})
+    db.seed(f"users/{user_id}/stats/summary", {"session_count": sessions})
+    for i in range(sessions):
+        db.seed(f"sessions/{user_id}-s{i}", {"user_id": user_id, "created_at": now})
+        for j in range(4):
+            db.seed(
+                f"sessions/{user_id}-s{i}/messages/m{j}",
+                {"role": "user", "content": str(j), "created_at": now + timedelta(j)},
+            )
+    for i in range(tasks):
+        db.seed(f"tasks/{user_id}-t{i}", {"user_id": user_id, "created_at": now})
+        db.seed(
+            f"tasks/{user_id}-t{i}/reflections/r0",
+            {"content": "ok", "created_at": now},
+        )
+
+
+def test_get_me_requires_auth(client):
+    response = client.get("/users/me")
+    assert response.status_code == 401
+
+
+def test_stats_track_session_and_task_writes(fake_client, fake_firestore):
+    fake_client.post("/sessions", json={})
+    session_id = fake_client.post("/sessions", json={}).json()["data"]["session_id"]
+    task_ids = [
+        fake_client.post("/tasks", json={"title": f"t{i}"}).json()["data"]["task_id"]
+        for i in range(3)
+    ]
+    fake_client.put(f"/tasks/{task_ids[0]}", json={"status": "completed"})
+    fake_client.put(f"/tasks/{task_ids[0]}", json={"status": "completed"})
+    fake_client.delete(f"/tasks/{task_ids[1]}")
+    fake_client.delete(f"/sessions/{session_id}")
+
+    stats = fake_firestore.docs["users/test-user-123/stats/summary"]
+    assert stats["session_count"] == 1
+    assert stats["task_count"] == 2
+    assert stats["tasks_by_status"] == {"pending": 1, "completed": 1}
+
+
+def test_stats_endpoint_costs_one_read(fake_client, fake_firestore):
+    fake_client.post("/tasks", json={"title": "task"})
+    # 初回はカウンタを集計クエリで初期化
+    fake_client.get("/users/me/stats")
+
+    fake_firestore.reset_counters()
+    data = fake_client.get("/users/me/stats").json()["data"]
+
+    assert data["task_count"] == 1
+    assert data["tasks_by_status"] == {"pending": 1, "completed": 0}
+    assert fake_firestore.reads == 1
+    assert fake_firestore.rpc_count == 1
+
+
+def test_stats_rebuilt_for_existing_history(fake_client, fake_firestore):
+    now = datetime.now(UTC)
+    for i in range(4):
+        fake_firestore.seed(
+            f"tasks/t{i}",
+            {
+                "user_id": "test-user-123",
+                "status": "completed" if i == 0 else "pending",
+                "created_at": now,
+            },
+        )
+    fake_firestore.seed(
+        "sessions/s0", {"user_id": "test-user-123", "created_at": now}
+    )
+
+    data = fake_client.get("/users/me/stats").json()["data"]
+
+    assert data["session_count"] == 1
+    assert data["task_count"] == 4
+    assert data["tasks_by_status"] == {"pending": 3, "completed": 1}
+    assert fake_firestore.docs["users/test-user-123/stats/summary"]["initialized"]
+
+
+def test_export_streams_ndjson_in_pages(fake_client, fake_firestore):
+    _seed_account(fake_firestore, USER)
+    _seed_account(fake_firestore, "other-user")
+
+    with patch.object(settings, "account_page_size", 2):
+        response = fake_client.get("/users/me/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert records[0]["type"] == "user"
+    assert records[0]["data"]["email"] == f"{USER}@example.com"
+    types = [r["type"] for r in records]
+    assert types.count("session") == 3
+    assert types.count("message") == 12
+    assert types.count("task") == 2
+    assert types.count("reflection") == 2
+    # メッセージは親セッションの直後に作成順で並ぶ
+    assert records[1]["id"] == f"{USER}-s0"
+    assert [r["data"]["content"] for r in records[2:6]] == ["0", "1", "2", "3"]
+    assert {r["session_id"] for r in records[2:6]} == {f"{USER}-s0"}
+    assert all("other-user" not in r["id"] for r in records[1:])
+    # ページ単位で読む（1回のクエリで読むのは最大2件）
+    assert fake_firestore.reads <= fake_firestore.rpc_count * 2
+
+
+def test_export_requires_user(fake_client):
+    assert fake_client.get("/users/me/export").status_code == 404
+
+
+def test_user_not_recreated_while_deletion_running(fake_client, fake_firestore):
+    now = datetime.now(UTC)
+    fake_firestore.seed(
+        f"account_deletions/{USER}",
+        {"status": "running", "started_at": now, "updated_at": now},
+    )
+
+    assert fake_client.get("/users/me").status_code == 404
+    assert f"users/{USER}" not in fake_firestore.docs
+
+
+def test_delete_me_removes_all_user_data(fake_client, fake_firestore):
+    _seed_account(fake_firestore, USER)
+    _seed_account(fake_firestore, "other-user")
+    fake_firestore.seed(f"tombstones/task_{USER}-t9", {"user_id": USER})
+    known_users.put(USER, datetime.now(UTC))
+
+    response = fake_client.delete("/users/me")
+
+    assert response.status_code == 202
+    assert response.json()["data"]["status"] == "running"
+    remaining = [p for p in fake_firestore.docs if USER in p]
+    assert remaining == [f"account_deletions/{USER}"]
+    # user + stats + セッション3件(各メッセージ4件) + タスク2件(各振り返り1件)
+    assert sum("other-user" in p for p in fake_firestore.docs) == 2 + 3 * 5 + 2 * 2
+    assert known_users.get(USER) is None
+
+    job = fake_client.get("/users/me/deletion").json()["data"]
+    assert job["status"] == "completed"
+    assert job["sessions_deleted"] == 3
+    assert job["messages_deleted"] == 12
+    assert job["tasks_deleted"] == 2
+    assert job["reflections_deleted"] == 2
+    assert job["completed_at"] is not None
+
+
+def test_delete_me_removes_messages_left_by_session_delete(
+    fake_client, fake_firestore
+):
+    _seed_account(fake_firestore, USER, sessions=1, tasks=0)
+    # 親セッションは削除済み（メッセージの削除が途中で終わった）
+    for i in range(3):
+        fake_firestore.seed(
+            f"sessions/gone/messages/m{i}",
+            {"user_id": USER, "session_id": "gone", "content": str(i)},
+        )
+    fake_firestore.seed(
+        "sessions/theirs/messages/m0", {"user_id": "other-user", "content": "x"}
+    )
+
+    fake_client.delete("/users/me")
+
+    assert not any(p.startswith("sessions/gone/") for p in fake_firestore.docs)
+    assert "sessions/theirs/messages/m0" in fake_firestore.docs
+    job = fake_firestore.docs[f"account_deletions/{USER}"]
+    assert job["messages_deleted"] == 4 + 3
+
+
+def test_delete_me_resumes_failed_job(fake_client, fake_firestore):
+    _seed_account(fake_firestore, USER, sessions=2)
+    now = datetime.now(UTC)
+    # 前回の実行でセッション3件・メッセージ12件を削除した後に失敗
+    fake_firestore.seed(
+        f"account_deletions/{USER}",
+        {
+            "status": "failed",
+            "sessions_deleted": 3,
+            "messages_deleted": 12,
+            "tasks_deleted": 0,
+            "reflections_deleted": 0,
+            "error": "ServiceUnavailable",
+            "started_at": now - timedelta(minutes=5),
+            "updated_at": now - timedelta(minutes=5),
+            "completed_at": None,
+        },
+    )
+
+    fake_client.delete("/users/me")
+
+    job = fake_firestore.docs[f"account_deletions/{USER}"]
+    assert job["status"] == "completed"
+    assert job["error"] is None
+    assert job["sessions_deleted"] == 5
+    assert job["messages_deleted"] == 20
+    assert job["started_at"] == now - timedelta(minutes=5)
+    assert [p for p in fake_firestore.docs if USER in p] == [
+        f"account_deletions/{USER}"
+    ]
+
+
+def test_delete_me_does_not_start_second_run(fake_client, fake_firestore):
+    _seed_account(fake_firestore, USER)
+    now = datetime.now(UTC)
+    fake_firestore.seed(
+        f"account_deletions/{USER}",
+        {
+            "status": "running",
+            "sessions_deleted": 1,
+            "started_at": now,
+            "updated_at": now,
+        },
+    )
+
+    response = fake_client.delete("/users/me")
+
+    assert response.status_code == 202
+    assert response.json()["data"]["sessions_deleted"] == 1
+    # 実行中のジョブが続けるので、このリクエストでは何も削除しない
+    assert f"users/{USER}" in fake_firestore.docs
+    assert fake_firestore.rpcs == {"get": 1}
@@ -53,6 +53,11 @@ resource "google_cloud_run_v2_service" "api" {
         name  = "GOOGLE_CLIENT_ID"
         value = var.google_client_id
       }
+
+      env {
+        name  = "CLAUDE_WARMUP"
+        value = "true"
+      }
     }
   }
 
@@ -24,6 +24,23 @@ resource "google_firestore_index" "sessions_by_created_at" {
   }
 }
 
+# タスク一覧取得用（ユーザー別・作成日降順）
+resource "google_firestore_index" "tasks_by_created_at" {
+  project    = var.project_id
+  database   = google_firestore_database.main.name
+  collection = "tasks"
+
+  fields {
+    field_path = "user_id"
+    order      = "ASCENDING"
+  }
+
+  fields {
+    field_path = "created_at"
+    order      = "DESCENDING"
+  }
+}
+
 # タスク一覧取得用（ユーザー別・ステータス・作成日降順）
 resource "google_firestore_index" "tasks_by_status" {
   project    = var.project_id
@@ -45,3 +62,111 @@ resource "google_firestore_index" "tasks_by_status" {
     order      = "DESCENDING"
   }
 }
+
+# 分類器の学習データ書き出し用（全セッションのメッセージを横断して検索）
+resource "google_firestore_field" "messages_emotion_source" {
+  project    = var.project_id
+  database   = google_firestore_database.main.name
+  collection = "messages"
+  field      = "metadata.emotion_source"
+
+  index_config {
+    indexes {
+      order       = "ASCENDING"
+      query_scope = "COLLECTION_GROUP"
+    }
+  }
+}
+
+# アカウント削除用（親セッションの削除後に残ったメッセージをユーザー別に検索）
+resource "google_firestore_field" "messages_user_id" {
+  project    = var.project_id
+  database   = google_firestore_database.main.name
+  collection = "messages"
+  field      = "user_id"
+
+  index_config {
+    indexes {
+      order       = "ASCENDING"
+      query_scope = "COLLECTION_GROUP"
+    }
+  }
+}
+
+# 差分同期用（ユーザー別・更新日時昇順）
+resource "google_firestore_index" "sessions_by_updated_at" {
+  project    = var.project_id
+  database   = google_firestore_database.main.name
+  collection = "sessions"
+
+  fields {
+    field_path = "user_id"
+    order      = "ASCENDING"
+  }
+
+  fields {
+    field_path = "updated_at"
+    order      = "ASCENDING"
+  }
+}
+
+resource "google_firestore_index" "tasks_by_updated_at" {
+  project    = var.project_id
+  database   = google_firestore_database.main.name
+  collection = "tasks"
+
+  fields {
+    field_path = "user_id"
+    order      = "ASCENDING"
+  }
+
+  fields {
+    field_path = "updated_at"
+    order      = "ASCENDING"
+  }
+}
+
+# 差分同期用（全セッションのメッセージを横断・ユーザー別・書き込み日時昇順）
+resource "google_firestore_index" "messages_by_written_at" {
+  project     = var.project_id
+  database    = google_firestore_database.main.name
+  collection  = "messages"
+  query_scope = "COLLECTION_GROUP"
+
+  fields {
+    field_path = "user_id"
+    order      = "ASCENDING"
+  }
+
+  fields {
+    field_path = "written_at"
+    order      = "ASCENDING"
+  }
+}
+
+# 差分同期用（削除の記録・ユーザー別・削除日時昇順）
+resource "google_firestore_index" "tombstones_by_deleted_at" {
+  project    = var.project_id
+  database   = google_firestore_database.main.name
+  collection = "tombstones"
+
+  fields {
+    field_path = "user_id"
+    order      = "ASCENDING"
+  }
+
+  fields {
+    field_path = "deleted_at"
+    order      = "ASCENDING"
+  }
+}
+
+# 削除の記録は expire_at を過ぎたら自動削除（settings.tombstone_ttl_days）
+resource "google_firestore_field" "tombstones_expire_at" {
+  project    = var.project_id
+  database   = google_firestore_database.main.name
+  collection = "tombstones"
+  field      = "expire_at"
+
+  ttl_config {}
+}